@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import gzip
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson", "application/javascript")
+_UNCOMPRESSED_STATUSES = (204, 206, 304)
+
+BYTES_IN = metrics.counter(
+    "rifaapp_compression_input_bytes_total", "Response bytes before compression by route"
+)
+BYTES_OUT = metrics.counter(
+    "rifaapp_compression_output_bytes_total", "Response bytes after compression by route"
+)
+COMPRESS_SECONDS = metrics.histogram(
+    "rifaapp_compression_seconds",
+    "Time spent compressing a response by route",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5),
+)
+
+
+def _accepts_gzip(scope: Scope) -> bool:
+    accept = Headers(scope=scope).get("accept-encoding", "")
+    for item in accept.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, level: int = 5) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _accepts_gzip(scope):
+            await self.app(scope, receive, send)
+            return
+        responder = _GzipResponder(scope, send, self.minimum_size, self.level)
+        await self.app(scope, receive, responder.send)
+
+
+class _GzipResponder:
+    def __init__(self, scope: Scope, send: Send, minimum_size: int, level: int) -> None:
+        self.scope = scope
+        self.downstream = send
+        self.minimum_size = minimum_size
+        self.level = level
+        self.start_message: Message | None = None
+        self.passthrough = False
+        self.compressor = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                message["status"] < 200
+                or message["status"] in _UNCOMPRESSED_STATUSES
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self.passthrough:
+                await self.downstream(message)
+            else:
+                # Held back until the first body chunk tells us whether the
+                # response is worth compressing and whether it streams.
+                self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.downstream(start)
+                await self.downstream(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                # Whole body is already in memory: compress it in one shot.
+                compressed = self._timed(gzip.compress, body, self.level, mtime=0)
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream(start)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                self._record(len(body), len(compressed))
+                return
+            # Streaming response: compress chunk by chunk, never buffering it.
+            del headers["Content-Length"]
+            self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            await self.downstream(start)
+
+        chunk = self._timed(self.compressor.compress, body)
+        self.bytes_in += len(body)
+        if more_body:
+            chunk += self._timed(self.compressor.flush, zlib.Z_SYNC_FLUSH)
+        else:
+            chunk += self._timed(self.compressor.flush)
+        self.bytes_out += len(chunk)
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self._record(self.bytes_in, self.bytes_out)
+
+    def _timed(self, func, *args, **kwargs) -> bytes:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def _record(self, bytes_in: int, bytes_out: int) -> None:
+        route = _route_label(self.scope)
+        BYTES_IN.inc(bytes_in, route=route)
+        BYTES_OUT.inc(bytes_out, route=route)
+        COMPRESS_SECONDS.observe(self.seconds, route=route)
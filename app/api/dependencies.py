@@ -1,8 +1,33 @@
-from fastapi import HTTPException
+import uuid
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.config import db_configured
+from app.core.security import verify_session_token
+from app.storage import get_store
+
+_bearer = HTTPBearer(auto_error=False)
 
 
 def require_db() -> None:
     if not db_configured():
         raise HTTPException(status_code=500, detail="Database is not configured")
+
+
+def require_store() -> None:
+    if get_store().requires_database:
+        require_db()
+
+
+def require_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> uuid.UUID:
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=401,
+            detail="Missing session token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return verify_session_token(credentials.credentials)
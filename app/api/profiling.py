@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import random
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.profiling import (
+    PROFILED_REQUESTS,
+    StackSampler,
+    verify_profile_token,
+    write_collapsed,
+)
+
+PROFILE_HEADER = "x-rifaapp-profile"
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        sampler: StackSampler,
+        directory: str,
+        sample_rate: float = 0.0,
+        secret: str = "",
+        max_stacks: int = 2000,
+    ) -> None:
+        self.app = app
+        self.sampler = sampler
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.max_stacks = max_stacks
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        token = Headers(scope=scope).get(PROFILE_HEADER)
+        if token and verify_profile_token(self.secret, token):
+            return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        PROFILED_REQUESTS.inc(trigger=trigger)
+        stacks = self.sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.stop(stacks)
+            if stacks:
+                # Disk I/O off the event loop, so other requests don't wait on it.
+                await anyio.to_thread.run_sync(
+                    write_collapsed,
+                    self.directory,
+                    f"{scope['method']} {_route_label(scope)}",
+                    stacks,
+                    self.max_stacks,
+                )
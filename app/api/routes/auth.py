@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.dependencies import require_db
-from app.models.schemas import UserLogin, UserOut, UserRegister
+from app.models.schemas import LoginResponse, UserLogin, UserOut, UserRegister
 from app.cqrs.commands import auth as auth_commands
 from app.cqrs.queries import auth as auth_queries
 
@@ -14,7 +14,7 @@ def register(payload: UserRegister):
     return auth_commands.register_user(payload)
 
 
-@router.post("/login", response_model=UserOut)
+@router.post("/login", response_model=LoginResponse)
 def login(payload: UserLogin):
     require_db()
     return auth_queries.login_user(payload)
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from fastapi import APIRouter
+
+from app.api.dependencies import require_store
+from app.api.routes.raffles_v2 import IdempotencyKey
+from app.models.schemas import (
+    CartConfirmRequest,
+    CartConfirmResponse,
+    CartReservationRequest,
+    CartReservationResponse,
+)
+from app.cqrs.commands import cart as cart_commands
+
+router = APIRouter(prefix="/v2/cart", tags=["cart"])
+
+
+@router.post("/reservations", response_model=CartReservationResponse)
+def reserve_cart(payload: CartReservationRequest, idempotency_key: Optional[str] = IdempotencyKey):
+    require_store()
+    return cart_commands.reserve_cart(payload, idempotency_key)
+
+
+@router.post("/confirm", response_model=CartConfirmResponse)
+def confirm_cart(payload: CartConfirmRequest, idempotency_key: Optional[str] = IdempotencyKey):
+    require_store()
+    return cart_commands.confirm_cart(payload, idempotency_key)
@@ -0,0 +1,24 @@
+from typing import Optional
+import uuid
+
+from fastapi import APIRouter, Query
+
+from app.api.dependencies import require_store
+from app.api.serialization import FastJSONResponse
+from app.models.schemas import OwnerRafflesPage
+from app.cqrs.queries import raffles as raffles_queries
+
+router = APIRouter(prefix="/v2/owners", tags=["owners"])
+
+
+@router.get("/{owner_id}/raffles", response_model=OwnerRafflesPage)
+def list_owner_raffles(
+    owner_id: uuid.UUID,
+    status: Optional[list[str]] = Query(None, description="Filter by status (repeatable)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    require_store()
+    return FastJSONResponse(
+        raffles_queries.list_owner_raffles(owner_id, status, cursor=cursor, limit=limit)
+    )
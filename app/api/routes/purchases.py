@@ -2,7 +2,8 @@ import uuid
 
 from fastapi import APIRouter
 
-from app.api.dependencies import require_db
+from app.api.dependencies import require_store
+from app.api.serialization import FastJSONResponse
 from app.models.schemas import PurchaseOut
 from app.cqrs.queries import purchases
 
@@ -11,5 +12,5 @@ router = APIRouter(prefix="/v2/participants", tags=["purchases"])
 
 @router.get("/{participant_id}/purchases", response_model=list[PurchaseOut])
 def list_purchases(participant_id: uuid.UUID):
-    require_db()
-    return purchases.list_purchases(participant_id)
+    require_store()
+    return FastJSONResponse(purchases.list_purchases(participant_id))
@@ -1,9 +1,11 @@
 import uuid
-from typing import Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Header, Query
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
 
-from app.api.dependencies import require_db
+from app.api.dependencies import require_store, require_user
+from app.api.serialization import FastJSONResponse, iter_csv, iter_ndjson
 from app.models.schemas import (
     DrawResponse,
     PurchaseConfirmRequest,
@@ -21,41 +23,48 @@ from app.cqrs.queries import raffles as raffles_queries
 
 router = APIRouter(prefix="/v2/raffles", tags=["raffles-v2"])
 
+IdempotencyKey = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Retries with the same key replay the stored response",
+)
+
 
 @router.post("", response_model=RaffleOutV2, status_code=201)
-def create_raffle(payload: RaffleCreateV2):
-    require_db()
-    return raffles_commands.create_raffle(payload)
+def create_raffle(payload: RaffleCreateV2, idempotency_key: Optional[str] = IdempotencyKey):
+    require_store()
+    return raffles_commands.create_raffle(payload, idempotency_key)
 
 
 @router.patch("/{raffle_id}", response_model=RaffleOutV2)
 def update_raffle(
     raffle_id: uuid.UUID,
     payload: RaffleUpdateV2,
-    user_id: Optional[str] = Header(None, alias="X-User-Id"),
+    user_id: uuid.UUID = Depends(require_user),
 ):
-    require_db()
+    require_store()
     return raffles_commands.update_raffle(raffle_id, payload, user_id)
 
 
 @router.delete("/{raffle_id}")
 def delete_raffle(
     raffle_id: uuid.UUID,
-    user_id: Optional[str] = Header(None, alias="X-User-Id"),
+    user_id: uuid.UUID = Depends(require_user),
 ):
-    require_db()
+    require_store()
     return raffles_commands.delete_raffle(raffle_id, user_id)
 
 
 @router.get("", response_model=list[RaffleOutV2])
 def list_raffles(status: Optional[str] = Query(None, description="Filter by status")):
-    require_db()
-    return raffles_queries.list_raffles(status)
+    require_store()
+    return FastJSONResponse(raffles_queries.list_raffles(status))
 
 
 @router.get("/{raffle_id}", response_model=RaffleOutV2)
 def get_raffle(raffle_id: uuid.UUID):
-    require_db()
+    require_store()
     return raffles_queries.get_raffle(raffle_id)
 
 
@@ -65,29 +74,66 @@ def list_numbers(
     offset: int = Query(0, ge=0),
     limit: Optional[int] = Query(None, ge=1),
 ):
-    require_db()
-    return raffles_queries.list_numbers(raffle_id, offset=offset, limit=limit)
+    require_store()
+    return FastJSONResponse(raffles_queries.list_numbers(raffle_id, offset=offset, limit=limit))
+
+
+@router.get("/{raffle_id}/export", response_class=StreamingResponse)
+def export_sold_numbers(
+    raffle_id: uuid.UUID,
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    user_id: uuid.UUID = Depends(require_user),
+):
+    require_store()
+    rows = raffles_queries.export_sold_numbers(raffle_id, user_id)
+    if export_format == "ndjson":
+        body, media_type = iter_ndjson(rows), "application/x-ndjson"
+    else:
+        body, media_type = iter_csv(rows, raffles_queries.EXPORT_COLUMNS), "text/csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="raffle-{raffle_id}.{export_format}"'
+        },
+    )
 
 
 @router.post("/{raffle_id}/reservations", response_model=ReservationResponse, status_code=201)
-def reserve_numbers(raffle_id: uuid.UUID, payload: ReservationRequest):
-    require_db()
-    return raffles_commands.reserve_numbers(raffle_id, payload)
+def reserve_numbers(
+    raffle_id: uuid.UUID,
+    payload: ReservationRequest,
+    idempotency_key: Optional[str] = IdempotencyKey,
+):
+    require_store()
+    return raffles_commands.reserve_numbers(raffle_id, payload, idempotency_key)
 
 
 @router.post("/{raffle_id}/confirm", response_model=PurchaseConfirmResponse)
-def confirm_purchase(raffle_id: uuid.UUID, payload: PurchaseConfirmRequest):
-    require_db()
-    return raffles_commands.confirm_purchase(raffle_id, payload)
+def confirm_purchase(
+    raffle_id: uuid.UUID,
+    payload: PurchaseConfirmRequest,
+    idempotency_key: Optional[str] = IdempotencyKey,
+):
+    require_store()
+    return raffles_commands.confirm_purchase(raffle_id, payload, idempotency_key)
 
 
 @router.post("/{raffle_id}/release")
 def release_reservation(raffle_id: uuid.UUID, payload: ReservationReleaseRequest):
-    require_db()
+    require_store()
     return raffles_commands.release_reservation(raffle_id, payload.reservation_id)
 
 
 @router.post("/{raffle_id}/draw", response_model=DrawResponse)
-def draw_raffle(raffle_id: uuid.UUID):
-    require_db()
-    return raffles_commands.draw_raffle(raffle_id)
+def draw_raffle(
+    raffle_id: uuid.UUID,
+    prizes: int = Query(
+        1,
+        ge=1,
+        le=raffles_commands.MAX_DRAW_PRIZES,
+        description="Number of distinct winners to draw (prize ranks 1..N)",
+    ),
+):
+    require_store()
+    return raffles_commands.draw_raffle(raffle_id, prizes)
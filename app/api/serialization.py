@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import csv
+from datetime import date, datetime
+from decimal import Decimal
+import io
+import json
+from typing import Any, Iterable, Iterator
+import uuid
+
+from fastapi.responses import JSONResponse
+
+try:  # orjson is a runtime dependency; json is kept for images built without it.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment image
+    orjson = None
+
+# Streamed bodies are sent in chunks of about this size: one per row would
+# mean a send (and a gzip flush) for every few dozen bytes.
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _default(value: Any):
+    # Mirrors pydantic's JSON mode, which is what response_model validation
+    # would have produced: Decimal as string, UTC datetimes with a "Z" suffix.
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        if text.endswith("+00:00"):
+            text = text[:-6] + "Z"
+        return text
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for large read endpoints.
+
+    Returning a Response from a path operation makes FastAPI skip the
+    response_model validation and jsonable_encoder pass, while the declared
+    response_model still documents the payload in OpenAPI. Handlers feeding it
+    must already produce output shaped like that model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    buffer = bytearray()
+    for row in rows:
+        buffer += dumps(row)
+        buffer += b"\n"
+        if len(buffer) >= STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return _default(value)
+
+
+def iter_csv(rows: Iterable[dict], columns: tuple[str, ...]) -> Iterator[bytes]:
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+        if text.tell() >= STREAM_CHUNK_BYTES:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics, timing
+
+REQUEST_SECONDS = metrics.histogram(
+    "rifaapp_http_request_duration_seconds", "Request latency by method, route and status"
+)
+REQUEST_DB_SECONDS = metrics.histogram(
+    "rifaapp_http_request_db_seconds", "Database time spent per request by route"
+)
+REQUEST_DB_QUERIES = metrics.histogram(
+    "rifaapp_http_request_db_queries",
+    "Database statements executed per request by route",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class TimingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_timings, token = timing.begin_request()
+        status = {"code": 500}
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                elapsed_ms = (time.perf_counter() - request_timings.started) * 1000
+                db_ms = request_timings.db_seconds * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={elapsed_ms:.1f}, '
+                    f'db;dur={db_ms:.1f};desc="{request_timings.db_queries} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            timing.end_request(token)
+            route = _route_label(scope)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - request_timings.started,
+                method=scope["method"],
+                route=route,
+                status=status["code"],
+            )
+            REQUEST_DB_SECONDS.observe(request_timings.db_seconds, route=route)
+            REQUEST_DB_QUERIES.observe(request_timings.db_queries, route=route)
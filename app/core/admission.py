@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import math
+import threading
+import time
+from typing import Hashable, Iterator
+
+from fastapi import HTTPException
+
+from app.core import metrics
+from app.core.config import settings
+
+REQUESTS = metrics.counter(
+    "rifaapp_admission_requests_total", "Write admission decisions by operation and outcome"
+)
+WAITING = metrics.gauge("rifaapp_admission_waiting", "Writers queued for a raffle slot")
+ACTIVE = metrics.gauge("rifaapp_admission_active", "Writers currently holding a raffle slot")
+WAIT_SECONDS = metrics.histogram(
+    "rifaapp_admission_wait_seconds",
+    "Time spent queued before being admitted",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class _Slot:
+    __slots__ = ("active", "waiting", "cond")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.active = 0
+        self.waiting = 0
+        # One condition per key over the shared lock: a release wakes a writer
+        # of that raffle only.
+        self.cond = threading.Condition(lock)
+
+
+class AdmissionController:
+    """Per-key concurrency limit with a bounded, deadline-limited wait queue.
+
+    Writers to the same raffle serialize on its row lock anyway, so letting more
+    than a handful reach the database only lengthens the lock queue. Excess
+    callers are turned away with a 429 instead of waiting on statement timeouts.
+    Queued writers park a threadpool thread, so ``max_waiting_total`` bounds
+    them across all keys, well below the pool size, to keep reads flowing.
+    """
+
+    def __init__(
+        self,
+        max_active: int,
+        max_waiting: int,
+        max_wait_seconds: float,
+        max_waiting_total: int,
+    ) -> None:
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.max_waiting_total = max_waiting_total
+        self._slots: dict[Hashable, _Slot] = {}
+        self._lock = threading.Lock()
+        self._waiting_total = 0
+
+    def _reject(self, operation: str, outcome: str) -> HTTPException:
+        REQUESTS.inc(operation=operation, outcome=outcome)
+        return HTTPException(
+            status_code=429,
+            detail="Too many concurrent requests for this raffle, retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(self.max_wait_seconds)))},
+        )
+
+    @contextmanager
+    def admit(self, key: Hashable, operation: str) -> Iterator[None]:
+        started = time.perf_counter()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _Slot(self._lock)
+            if slot.active >= self.max_active:
+                if (
+                    slot.waiting >= self.max_waiting
+                    or self._waiting_total >= self.max_waiting_total
+                ):
+                    self._discard_if_idle(key, slot)
+                    raise self._reject(operation, "rejected_queue_full")
+                slot.waiting += 1
+                self._waiting_total += 1
+                WAITING.inc()
+                deadline = started + self.max_wait_seconds
+                try:
+                    while slot.active >= self.max_active:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            break
+                        slot.cond.wait(remaining)
+                finally:
+                    slot.waiting -= 1
+                    self._waiting_total -= 1
+                    WAITING.dec()
+                if slot.active >= self.max_active:
+                    self._discard_if_idle(key, slot)
+                    raise self._reject(operation, "rejected_timeout")
+            slot.active += 1
+            ACTIVE.inc()
+        WAIT_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        REQUESTS.inc(operation=operation, outcome="admitted")
+        try:
+            yield
+        finally:
+            with self._lock:
+                slot.active -= 1
+                ACTIVE.dec()
+                self._discard_if_idle(key, slot)
+                # One slot freed: one waiter can take it.
+                slot.cond.notify()
+
+    def _discard_if_idle(self, key: Hashable, slot: _Slot) -> None:
+        if slot.active == 0 and slot.waiting == 0 and self._slots.get(key) is slot:
+            del self._slots[key]
+
+
+raffle_writes = AdmissionController(
+    max_active=settings.admission_max_writers,
+    max_waiting=settings.admission_max_queue,
+    max_wait_seconds=settings.admission_max_wait_seconds,
+    max_waiting_total=settings.admission_max_queue_total,
+)
@@ -10,6 +10,16 @@ def _split_csv(value: str) -> list[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
+def _parse_timeouts(value: str) -> dict[str, tuple[int, int]]:
+    # "reserve=1000/5000,draw=3000/20000": lock/statement timeout in ms per operation.
+    timeouts = {}
+    for item in _split_csv(value):
+        operation, _, limits = item.partition("=")
+        lock_ms, _, statement_ms = limits.partition("/")
+        timeouts[operation.strip()] = (int(lock_ms), int(statement_ms))
+    return timeouts
+
+
 @dataclass(frozen=True)
 class Settings:
     db_host: str = os.getenv("DB_HOST", "")
@@ -28,6 +38,45 @@ class Settings:
         default_factory=lambda: _split_csv(os.getenv("CORS_ALLOW_HEADERS", "*"))
     )
     expose_errors: bool = _as_bool(os.getenv("EXPOSE_ERRORS", "true"))
+    auto_draw_interval_seconds: float = float(os.getenv("AUTO_DRAW_INTERVAL_SECONDS", "0"))
+    auto_draw_batch_size: int = int(os.getenv("AUTO_DRAW_BATCH_SIZE", "50"))
+    auto_draw_concurrency: int = int(os.getenv("AUTO_DRAW_CONCURRENCY", "4"))
+    password_hash_executor: str = os.getenv("PASSWORD_HASH_EXECUTOR", "process").lower()
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0"))
+    password_hash_timeout_seconds: float = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+    session_secret: str = os.getenv("SESSION_SECRET", "")
+    session_ttl_seconds: int = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    session_token_cache_size: int = int(os.getenv("SESSION_TOKEN_CACHE_SIZE", "4096"))
+    compression_enabled: bool = _as_bool(os.getenv("COMPRESSION_ENABLED", "true"))
+    compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    compression_level: int = int(os.getenv("COMPRESSION_LEVEL", "5"))
+    admission_max_writers: int = int(os.getenv("ADMISSION_MAX_WRITERS", "4"))
+    admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "4"))
+    # Queued writers across all raffles; each parks one of AnyIO's 40 threadpool
+    # tokens, so keep this well below that.
+    admission_max_queue_total: int = int(os.getenv("ADMISSION_MAX_QUEUE_TOTAL", "8"))
+    admission_max_wait_seconds: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "2"))
+    idempotency_ttl_seconds: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "postgres").lower()
+    partition_count: int = int(os.getenv("PARTITION_COUNT", "16"))
+    profile_sample_rate: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    profile_secret: str = os.getenv("PROFILE_SECRET", "")
+    profile_dir: str = os.getenv("PROFILE_DIR", "/tmp/rifaapp-profiles")
+    profile_interval_ms: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    profile_max_overhead: float = float(os.getenv("PROFILE_MAX_OVERHEAD", "0.05"))
+    profile_max_stacks: int = int(os.getenv("PROFILE_MAX_STACKS", "2000"))
+    coalesce_reads: bool = _as_bool(os.getenv("COALESCE_READS", "true"))
+    cold_start_mode: bool = _as_bool(os.getenv("COLD_START_MODE", "false"))
+    db_lock_timeout_ms: int = int(os.getenv("DB_LOCK_TIMEOUT_MS", "2000"))
+    db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
+    db_operation_timeouts: dict[str, tuple[int, int]] = field(
+        default_factory=lambda: _parse_timeouts(os.getenv("DB_OPERATION_TIMEOUTS", ""))
+    )
+    db_max_retries: int = int(os.getenv("DB_MAX_RETRIES", "3"))
+    db_retry_base_ms: float = float(os.getenv("DB_RETRY_BASE_MS", "25"))
+    stream_batch_size: int = int(os.getenv("STREAM_BATCH_SIZE", "2000"))
+    participant_cache_size: int = int(os.getenv("PARTICIPANT_CACHE_SIZE", "10000"))
 
 
 settings = Settings()
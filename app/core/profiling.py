@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections import Counter
+import hashlib
+import hmac
+import os
+from pathlib import Path
+import re
+import sys
+import threading
+import time
+from typing import Optional
+
+from app.core import metrics
+
+PROFILED_REQUESTS = metrics.counter(
+    "rifaapp_profiled_requests_total", "Requests profiled by the stack sampler, by trigger"
+)
+PROFILE_SAMPLES = metrics.counter(
+    "rifaapp_profile_samples_total", "Stack samples taken while a profiled request was in flight"
+)
+
+# A sampled stack is kept only if some frame belongs to the request path;
+# idle event-loop and worker threads never match.
+_REQUEST_MODULES = ("app.", "fastapi.", "starlette.", "pydantic.")
+_ROUTE_SLUG = re.compile(r"[^A-Za-z0-9]+")
+_WRITE_LOCK = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_qualname}"
+
+
+def collapse(frame, max_depth: int = 64) -> Optional[str]:
+    names = []
+    relevant = False
+    while frame is not None and len(names) < max_depth:
+        name = _frame_name(frame)
+        if name.startswith(__name__):
+            return None
+        relevant = relevant or name.startswith(_REQUEST_MODULES)
+        names.append(name)
+        frame = frame.f_back
+    if not relevant:
+        return None
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Wall-clock stack sampler shared by every profiled request in flight.
+
+    A daemon thread snapshots ``sys._current_frames()`` every ``interval``
+    seconds while at least one profile is open, and adds each collapsed stack to
+    all of them. On Lambda an instance serves one request at a time, so the
+    attribution is exact; under uvicorn, frames of concurrent requests can show
+    up in a profile. The interval stretches so that sampling never takes more
+    than ``max_overhead`` of the wall time.
+    """
+
+    def __init__(self, interval: float = 0.005, max_overhead: float = 0.05, max_depth: int = 64):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._profiles: list[Counter] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> Counter:
+        stacks: Counter = Counter()
+        with self._lock:
+            self._profiles.append(stacks)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="rifaapp-profiler", daemon=True
+                )
+                self._thread.start()
+            self._wakeup.notify()
+        return stacks
+
+    def stop(self, stacks: Counter) -> Counter:
+        with self._lock:
+            self._profiles.remove(stacks)
+        return stacks
+
+    def sample(self) -> int:
+        own = threading.get_ident()
+        taken = 0
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = collapse(frame, self.max_depth)
+            if stack is None:
+                continue
+            taken += 1
+            with self._lock:
+                for profile in self._profiles:
+                    profile[stack] += 1
+        return taken
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._profiles:
+                    self._wakeup.wait()
+            started = time.perf_counter()
+            PROFILE_SAMPLES.inc(self.sample())
+            cost = time.perf_counter() - started
+            time.sleep(max(self.interval, cost / self.max_overhead - cost))
+
+
+def _read_collapsed(path: Path) -> Counter:
+    stacks: Counter = Counter()
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        return stacks
+    for line in lines:
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def write_collapsed(directory: str, route: str, stacks: Counter, max_stacks: int = 2000) -> Path:
+    """Merge ``stacks`` into ``<directory>/<route>.folded``.
+
+    The file uses the collapsed format (``frame;frame;frame count`` per line)
+    read by flamegraph.pl and speedscope. Counts are summed per stack and only
+    the ``max_stacks`` heaviest stacks are kept, so each route's file stays
+    bounded no matter how many requests get profiled. The file is rewritten
+    through a temporary file, so readers never see a partial profile.
+    """
+    path = Path(directory) / f"{_ROUTE_SLUG.sub('_', route).strip('_') or 'root'}.folded"
+    with _WRITE_LOCK:
+        merged = _read_collapsed(path)
+        merged.update(stacks)
+        lines = "".join(f"{stack} {count}\n" for stack, count in merged.most_common(max_stacks))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".folded.tmp")
+        partial.write_text(lines)
+        os.replace(partial, path)
+    return path
+
+
+def _signature(secret: str, expires: int) -> str:
+    return hmac.new(
+        secret.encode("utf-8"), f"profile:{expires}".encode("ascii"), hashlib.sha256
+    ).hexdigest()
+
+
+def issue_profile_token(secret: str, ttl_seconds: int) -> str:
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def verify_profile_token(secret: str, token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    # isdigit() alone accepts digits like "²" that int() rejects.
+    if not secret or not (expires.isascii() and expires.isdigit()):
+        return False
+    if int(expires) <= time.time():
+        return False
+    # Compare bytes: compare_digest raises TypeError on non-ASCII str.
+    expected = _signature(secret, int(expires)).encode("ascii")
+    return hmac.compare_digest(signature.encode("utf-8", "replace"), expected)
@@ -1,8 +1,201 @@
 from __future__ import annotations
 
+import base64
+import binascii
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from functools import lru_cache
 import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_ITERATIONS = 120_000
+
+HASH_QUEUE_DEPTH = metrics.gauge(
+    "rifaapp_password_hash_queue_depth", "Password hashes admitted and not yet finished"
+)
+HASH_REJECTED = metrics.counter(
+    "rifaapp_password_hash_rejected_total", "Password hashes rejected because the queue was full"
+)
+HASH_SECONDS = metrics.histogram(
+    "rifaapp_password_hash_seconds", "Password hash latency including queue wait"
+)
+
+_HASHER_LOCK = threading.Lock()
+_EXECUTOR: Optional[Executor] = None
+_EXECUTOR_KIND: Optional[str] = None
+_PENDING = 0
 
 
 def hash_password(password: str, salt: bytes) -> str:
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 120_000)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PASSWORD_HASH_ITERATIONS)
     return digest.hex()
+
+
+def _hash_workers() -> int:
+    return settings.password_hash_workers or max(1, min(4, os.cpu_count() or 1))
+
+
+def _max_pending() -> int:
+    return settings.password_hash_max_pending or _hash_workers() * 4
+
+
+def _build_executor(kind: str) -> Optional[Executor]:
+    if kind == "inline":
+        return None
+    workers = _hash_workers()
+    if kind == "process":
+        try:
+            return ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            # AWS Lambda has no /dev/shm, so multiprocessing primitives are
+            # unavailable. hashlib releases the GIL during PBKDF2, which makes a
+            # thread pool a sound fallback.
+            logger.warning("Process pool unavailable for password hashing, using threads")
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+
+def _get_executor() -> Optional[Executor]:
+    global _EXECUTOR, _EXECUTOR_KIND
+    if _EXECUTOR_KIND is None:
+        with _HASHER_LOCK:
+            if _EXECUTOR_KIND is None:
+                _EXECUTOR = _build_executor(settings.password_hash_executor)
+                _EXECUTOR_KIND = settings.password_hash_executor
+    return _EXECUTOR
+
+
+def shutdown_hasher() -> None:
+    global _EXECUTOR, _EXECUTOR_KIND
+    with _HASHER_LOCK:
+        executor = _EXECUTOR
+        _EXECUTOR = None
+        _EXECUTOR_KIND = None
+    # Outside the lock: finishing hashes release their slot through it.
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _admit() -> None:
+    global _PENDING
+    with _HASHER_LOCK:
+        if _PENDING >= _max_pending():
+            HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        _PENDING += 1
+        HASH_QUEUE_DEPTH.set(_PENDING)
+
+
+def _release() -> None:
+    global _PENDING
+    with _HASHER_LOCK:
+        _PENDING -= 1
+        HASH_QUEUE_DEPTH.set(_PENDING)
+
+
+def hash_password_bounded(password: str, salt: bytes) -> str:
+    executor = _get_executor()
+    if executor is None:
+        return hash_password(password, salt)
+    _admit()
+    started = time.perf_counter()
+    try:
+        future = executor.submit(hash_password, password, salt)
+    except BaseException:
+        _release()
+        raise
+    # The slot is held until the hash really ends: cancel() can't stop one that
+    # is already running, and releasing early would let the backlog grow past
+    # the cap under overload.
+    future.add_done_callback(lambda _: _release())
+    try:
+        return future.result(timeout=settings.password_hash_timeout_seconds)
+    except FutureTimeoutError as exc:
+        future.cancel()
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is busy, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from exc
+    finally:
+        HASH_SECONDS.observe(time.perf_counter() - started)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _session_key() -> bytes:
+    # No per-process fallback key: tokens signed by one instance (or before a
+    # restart) would fail everywhere else as random 401s.
+    if not settings.session_secret:
+        logger.error("SESSION_SECRET is not set; refusing to sign or verify session tokens")
+        raise HTTPException(status_code=500, detail="Session signing is not configured")
+    return settings.session_secret.encode("utf-8")
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_session_key(), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_session_token(user_id: uuid.UUID | str) -> tuple[str, datetime]:
+    expires = int(time.time()) + settings.session_ttl_seconds
+    payload = _b64encode(
+        json.dumps({"sub": str(user_id), "exp": expires}, separators=(",", ":")).encode("utf-8")
+    )
+    token = f"{payload}.{_sign(payload)}"
+    return token, datetime.fromtimestamp(expires, tz=timezone.utc)
+
+
+@lru_cache(maxsize=settings.session_token_cache_size)
+def _verified_claims(token: str) -> tuple[uuid.UUID, int]:
+    # Only successfully verified tokens are cached: lru_cache never stores the
+    # exceptions raised for forged or malformed ones.
+    payload, _, signature = token.partition(".")
+    if not payload or not signature or not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid token signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+        return uuid.UUID(claims["sub"]), int(claims["exp"])
+    except (binascii.Error, KeyError, TypeError, ValueError) as exc:
+        raise ValueError("Malformed token") from exc
+
+
+def verify_session_token(token: str) -> uuid.UUID:
+    try:
+        user_id, expires = _verified_claims(token)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid session token",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from exc
+    if expires <= time.time():
+        raise HTTPException(
+            status_code=401,
+            detail="Session token expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import functools
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+CALLS = metrics.counter(
+    "rifaapp_singleflight_calls_total",
+    "Coalesced calls by group and role (leader executed, follower shared the result)",
+)
+IN_FLIGHT = metrics.gauge("rifaapp_singleflight_in_flight", "Distinct keys currently executing")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls sharing a key into one execution.
+
+    Callers that arrive while a call for the same key is running wait for it
+    and receive the very same result object (or exception), so results must be
+    treated as read-only. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+        if not leader:
+            # Followers are the coalesced requests: each one saved a DB execution.
+            CALLS.inc(group=self.name, role="follower")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        CALLS.inc(group=self.name, role="leader")
+        IN_FLIGHT.inc(group=self.name)
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            IN_FLIGHT.dec(group=self.name)
+
+
+def _default_key(*args, **kwargs) -> Hashable:
+    return args, tuple(sorted(kwargs.items()))
+
+
+def coalesce(name: Optional[str] = None, key: Optional[Callable[..., Hashable]] = None):
+    def decorator(func: Callable):
+        group = SingleFlight(name or func.__qualname__)
+        key_func = key or _default_key
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.coalesce_reads:
+                return func(*args, **kwargs)
+            return group.do(key_func(*args, **kwargs), func, *args, **kwargs)
+
+        wrapper.singleflight = group
+        return wrapper
+
+    return decorator
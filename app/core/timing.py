@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+import time
+from typing import Optional
+
+from app.core import metrics
+
+DB_QUERY_SECONDS = metrics.histogram("rifaapp_db_query_seconds", "Database statement latency")
+
+
+@dataclass
+class RequestTimings:
+    started: float
+    db_seconds: float = 0.0
+    db_queries: int = 0
+
+
+# Starlette copies the context into the threadpool that runs sync endpoints, so
+# the same RequestTimings object is visible (and mutable) from the DB layer.
+_CURRENT: ContextVar[Optional[RequestTimings]] = ContextVar("rifaapp_request_timings", default=None)
+
+
+def begin_request() -> tuple[RequestTimings, Token]:
+    timings = RequestTimings(started=time.perf_counter())
+    return timings, _CURRENT.set(timings)
+
+
+def end_request(token: Token) -> None:
+    _CURRENT.reset(token)
+
+
+def current() -> Optional[RequestTimings]:
+    return _CURRENT.get()
+
+
+def record_query(seconds: float) -> None:
+    DB_QUERY_SECONDS.observe(seconds)
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.db_seconds += seconds
+        timings.db_queries += 1
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from typing import Optional
+
+from app.core import metrics
+from app.db.connection import fetch_all, run_transaction
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED = metrics.counter("rifaapp_archive_raffles_total", "Raffle archival attempts by outcome")
+ROWS_REMOVED = metrics.counter(
+    "rifaapp_archive_rows_removed_total", "Per-number rows deleted by archival, by table"
+)
+
+
+def find_archivable(limit: int, min_age_seconds: float) -> list[uuid.UUID]:
+    rows = fetch_all(
+        """
+        SELECT r.id
+        FROM raffles r
+        WHERE r.status = 'drawn'
+          AND r.updated_at <= now() - make_interval(secs => %s)
+          AND NOT EXISTS (SELECT 1 FROM raffle_archives a WHERE a.raffle_id = r.id)
+        ORDER BY r.updated_at
+        LIMIT %s
+        """,
+        (min_age_seconds, limit),
+    )
+    return [row["id"] for row in rows]
+
+
+def archive_raffle(raffle_id: uuid.UUID) -> Optional[dict]:
+    def _handler(conn):
+        cur = conn.cursor()
+        # Same row lock as draw and update_raffle, so the status cannot change
+        # underneath the copy.
+        cur.execute("SELECT status FROM raffles WHERE id = %s FOR UPDATE", (raffle_id,))
+        row = cur.fetchone()
+        if not row or row[0] != "drawn":
+            cur.close()
+            return None
+        cur.execute(
+            """
+            INSERT INTO raffle_archives (
+                raffle_id, tickets_sold, sold_numbers, purchase_ids, participant_ids
+            )
+            SELECT %s,
+                   COUNT(*),
+                   COALESCE(array_agg(number ORDER BY number), '{}'),
+                   COALESCE(array_agg(purchase_id ORDER BY number), '{}'),
+                   COALESCE(array_agg(participant_id ORDER BY number), '{}')
+            FROM tickets
+            WHERE raffle_id = %s AND status IN ('paid', 'sold')
+            ON CONFLICT (raffle_id) DO NOTHING
+            RETURNING tickets_sold
+            """,
+            (raffle_id, raffle_id),
+        )
+        archived = cur.fetchone()
+        if not archived:
+            cur.close()
+            return None
+        cur.execute("DELETE FROM raffle_numbers_read WHERE raffle_id = %s", (raffle_id,))
+        numbers_removed = cur.rowcount
+        # raffle_winners keeps its ticket ids without a foreign key, so the
+        # draw results outlive the tickets.
+        cur.execute("DELETE FROM tickets WHERE raffle_id = %s", (raffle_id,))
+        tickets_removed = cur.rowcount
+        cur.execute(
+            "UPDATE purchases_read SET raffle_status = 'drawn' WHERE raffle_id = %s",
+            (raffle_id,),
+        )
+        cur.close()
+        return {
+            "raffle_id": str(raffle_id),
+            "tickets_sold": archived[0],
+            "raffle_numbers_removed": numbers_removed,
+            "tickets_removed": tickets_removed,
+        }
+
+    return run_transaction(_handler, operation="archive")
+
+
+def run_once(batch_size: int = 20, min_age_seconds: float = 3600) -> dict:
+    started = time.perf_counter()
+    summary = {"archived": 0, "skipped": 0, "failed": 0, "rows_removed": 0}
+    for raffle_id in find_archivable(batch_size, min_age_seconds):
+        try:
+            result = archive_raffle(raffle_id)
+        except Exception:
+            logger.exception("Archival failed for raffle %s", raffle_id)
+            outcome = "failed"
+        else:
+            outcome = "archived" if result else "skipped"
+            if result:
+                ROWS_REMOVED.inc(result["raffle_numbers_removed"], table="raffle_numbers_read")
+                ROWS_REMOVED.inc(result["tickets_removed"], table="tickets")
+                summary["rows_removed"] += (
+                    result["raffle_numbers_removed"] + result["tickets_removed"]
+                )
+                logger.info("Archived raffle %s: %s", raffle_id, result)
+        ARCHIVED.inc(outcome=outcome)
+        summary[outcome] += 1
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 4)
+    return summary
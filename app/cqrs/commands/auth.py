@@ -5,12 +5,17 @@ import uuid
 
 from fastapi import HTTPException
 
-from app.core.security import hash_password
+from app.core.security import hash_password_bounded
 from app.db.connection import run_transaction
 from app.models.schemas import UserRegister
 
 
 def register_user(payload: UserRegister) -> dict:
+    # Hash before opening the transaction so a DB connection is never held
+    # while waiting on the hashing executor.
+    salt = secrets.token_bytes(16)
+    password_hash = hash_password_bounded(payload.password, salt)
+
     def _handler(conn):
         cur = conn.cursor()
         cur.execute("SELECT id FROM users WHERE email = %s", (payload.email,))
@@ -18,8 +23,6 @@ def register_user(payload: UserRegister) -> dict:
             cur.close()
             raise HTTPException(status_code=409, detail="Email already registered")
         user_id = uuid.uuid4()
-        salt = secrets.token_bytes(16)
-        password_hash = hash_password(payload.password, salt)
         cur.execute(
             """
             INSERT INTO users (id, name, email, password_hash, password_salt)
@@ -40,4 +43,4 @@ def register_user(payload: UserRegister) -> dict:
             "created_at": row[3],
         }
 
-    return run_transaction(_handler)
+    return run_transaction(_handler, operation="register")
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import logging
+import threading
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core import metrics
+from app.core.config import settings
+from app.cqrs.commands.raffles import apply_draw
+from app.db.connection import fetch_all, run_transaction
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-int advisory lock form, so auto-draw locks never collide
+# with other advisory locks taken on the same database.
+AUTO_DRAW_LOCK_NAMESPACE = 2701
+
+DRAWS = metrics.counter("rifaapp_auto_draw_total", "Scheduled draws by outcome")
+DRAW_SECONDS = metrics.histogram(
+    "rifaapp_auto_draw_duration_seconds", "Time spent drawing a single due raffle"
+)
+DRAW_LAG_SECONDS = metrics.histogram(
+    "rifaapp_auto_draw_lag_seconds",
+    "Delay between a raffle's draw_at and its scheduled draw",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+TICK_SECONDS = metrics.histogram(
+    "rifaapp_auto_draw_tick_seconds", "Duration of a full scheduler tick"
+)
+
+
+def find_due_raffles(limit: int) -> list[dict]:
+    # Ordered by the index, not shuffled: draw_due_raffle only tries the
+    # advisory lock, so a worker that meets a raffle another one holds skips it
+    # instead of queueing behind it.
+    return fetch_all(
+        """
+        SELECT r.id, r.draw_at
+        FROM raffles r
+        WHERE r.status IN ('open', 'closed')
+          AND r.draw_at IS NOT NULL
+          AND r.draw_at <= now()
+          AND EXISTS (
+              SELECT 1
+              FROM tickets t
+              WHERE t.raffle_id = r.id AND t.status IN ('paid', 'sold')
+          )
+        ORDER BY r.draw_at, r.id
+        LIMIT %s
+        """,
+        (limit,),
+    )
+
+
+def draw_due_raffle(raffle_id: uuid.UUID, prizes: int = 1) -> Optional[dict]:
+    def _handler(conn):
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))",
+            (AUTO_DRAW_LOCK_NAMESPACE, str(raffle_id)),
+        )
+        if not cur.fetchone()[0]:
+            cur.close()
+            return None
+        cur.execute(
+            "SELECT status, draw_at FROM raffles WHERE id = %s",
+            (raffle_id,),
+        )
+        row = cur.fetchone()
+        cur.close()
+        if not row or row[0] not in ("open", "closed") or row[1] is None:
+            return None
+        if row[1] > datetime.now(timezone.utc):
+            return None
+        return apply_draw(conn, raffle_id, prizes)
+
+    return run_transaction(_handler, operation="auto_draw")
+
+
+def _draw_and_record(raffle: dict, prizes: int) -> str:
+    raffle_id = raffle["id"]
+    started = time.perf_counter()
+    try:
+        result = draw_due_raffle(raffle_id, prizes)
+    except HTTPException as exc:
+        logger.warning("Auto-draw skipped raffle %s: %s", raffle_id, exc.detail)
+        outcome = "failed"
+    except Exception:
+        logger.exception("Auto-draw failed for raffle %s", raffle_id)
+        outcome = "failed"
+    else:
+        outcome = "drawn" if result else "skipped"
+        if result:
+            draw_at = raffle.get("draw_at")
+            if draw_at:
+                lag = (datetime.now(timezone.utc) - draw_at).total_seconds()
+                DRAW_LAG_SECONDS.observe(max(lag, 0.0))
+            logger.info(
+                "Auto-draw raffle %s winner ticket %s", raffle_id, result["winner_ticket_id"]
+            )
+    DRAW_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+    DRAWS.inc(outcome=outcome)
+    return outcome
+
+
+def run_once(
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    prizes: int = 1,
+) -> dict:
+    batch_size = batch_size or settings.auto_draw_batch_size
+    concurrency = concurrency or settings.auto_draw_concurrency
+    started = time.perf_counter()
+    due = find_due_raffles(batch_size)
+    summary = {"due": len(due), "drawn": 0, "skipped": 0, "failed": 0}
+    if due:
+        with ThreadPoolExecutor(
+            max_workers=min(concurrency, len(due)), thread_name_prefix="auto-draw"
+        ) as pool:
+            for outcome in pool.map(lambda raffle: _draw_and_record(raffle, prizes), due):
+                summary[outcome] += 1
+    TICK_SECONDS.observe(time.perf_counter() - started)
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 4)
+    return summary
+
+
+def run_forever(
+    interval_seconds: float,
+    stop_event: Optional[threading.Event] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    prizes: int = 1,
+) -> None:
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            summary = run_once(batch_size=batch_size, concurrency=concurrency, prizes=prizes)
+        except Exception:
+            logger.exception("Auto-draw tick failed")
+        else:
+            if summary["due"]:
+                logger.info("Auto-draw tick %s", summary)
+            # A full batch that made progress means more raffles are probably
+            # waiting; poll again right away instead of sleeping a whole interval.
+            if summary["drawn"] and summary["due"] >= (batch_size or settings.auto_draw_batch_size):
+                continue
+        stop_event.wait(interval_seconds)
+
+
+def start_background_loop(interval_seconds: Optional[float] = None) -> threading.Event:
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_forever,
+        args=(interval_seconds or settings.auto_draw_interval_seconds, stop_event),
+        name="auto-draw-loop",
+        daemon=True,
+    )
+    thread.start()
+    return stop_event
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+
+from app.cqrs.commands import idempotency
+from app.cqrs.commands.participants import get_or_create_participant
+from app.cqrs.commands.raffles import (
+    MAX_RESERVATION_MINUTES,
+    check_reservation_selection,
+    confirm_in_transaction,
+    reserve_in_transaction,
+    resolve_buyer,
+)
+from app.models.schemas import CartConfirmRequest, CartReservationRequest, ParticipantCreate
+from app.storage import get_store
+
+
+def _check_unique_raffles(items) -> None:
+    raffle_ids = [item.raffle_id for item in items]
+    if len(set(raffle_ids)) != len(raffle_ids):
+        raise HTTPException(status_code=400, detail="Each raffle may appear only once per cart")
+
+
+def cart_scope(
+    operation: str, participant_id: Optional[str], participant: Optional[ParticipantCreate]
+) -> str:
+    # Participants are unique by email, so the email identifies a buyer that
+    # has no participant_id yet; one without either is only known by name.
+    buyer = participant_id or (participant and (participant.email or participant.name))
+    return idempotency.client_scope(operation, buyer)
+
+
+def apply_cart_items(items, result_key: str, apply: Callable, conn=None) -> list[dict]:
+    """Apply ``apply`` to each item; a failed item doesn't stop the others.
+
+    Raffles are locked in raffle_id order whatever the order in the request,
+    so two carts sharing raffles can never wait on each other in a cycle. With
+    a ``conn``, each item runs in a savepoint, so a failed item is undone
+    without aborting the rest of the cart. Results keep the request order.
+    """
+    results: list[Optional[dict]] = [None] * len(items)
+    cur = conn.cursor() if conn is not None else None
+    for index in sorted(range(len(items)), key=lambda i: items[i].raffle_id):
+        item = items[index]
+        if cur is not None:
+            cur.execute("SAVEPOINT cart_item")
+        try:
+            value = apply(item)
+        except HTTPException as exc:
+            if cur is not None:
+                cur.execute("ROLLBACK TO SAVEPOINT cart_item")
+            results[index] = {
+                "raffle_id": str(item.raffle_id),
+                "ok": False,
+                "error": {"status_code": exc.status_code, "detail": exc.detail},
+            }
+        else:
+            if cur is not None:
+                cur.execute("RELEASE SAVEPOINT cart_item")
+            results[index] = {"raffle_id": str(item.raffle_id), "ok": True, result_key: value}
+    if cur is not None:
+        cur.close()
+    return results
+
+
+def reserve_cart_in_transaction(conn, payload: CartReservationRequest, ttl_minutes: int) -> dict:
+    participant_id = get_or_create_participant(conn, payload.participant)
+
+    def _reserve_item(item):
+        check_reservation_selection(item.numbers, item.count)
+        return reserve_in_transaction(
+            conn, item.raffle_id, item.numbers, ttl_minutes, participant_id, item.count
+        )
+
+    results = apply_cart_items(payload.items, "reservation", _reserve_item, conn)
+    return {"participant_id": str(participant_id), "items": results}
+
+
+def confirm_cart_in_transaction(conn, payload: CartConfirmRequest) -> dict:
+    participant_id = resolve_buyer(conn, payload.participant_id, payload.participant)
+    results = apply_cart_items(
+        payload.items,
+        "purchase",
+        lambda item: confirm_in_transaction(
+            conn, item.raffle_id, item.reservation_id, participant_id, payload.payment_method
+        ),
+        conn,
+    )
+    return {"participant_id": str(participant_id), "items": results}
+
+
+def reserve_cart(payload: CartReservationRequest, idempotency_key: Optional[str] = None) -> dict:
+    _check_unique_raffles(payload.items)
+    ttl_minutes = min(payload.ttl_minutes, MAX_RESERVATION_MINUTES)
+    return get_store().reserve_cart(payload, ttl_minutes, idempotency_key)
+
+
+def confirm_cart(payload: CartConfirmRequest, idempotency_key: Optional[str] = None) -> dict:
+    _check_unique_raffles(payload.items)
+    return get_store().confirm_cart(payload, idempotency_key)
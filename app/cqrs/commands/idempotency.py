@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+import hashlib
+import json
+from typing import Any, Callable, Optional
+import uuid
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.connection import fetch_one, run_transaction
+
+REQUESTS = metrics.counter(
+    "rifaapp_idempotency_requests_total", "Idempotency-Key requests by operation and outcome"
+)
+
+
+def _encode(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def fingerprint(*parts: Any) -> str:
+    canonical = [part.model_dump(mode="json") if isinstance(part, BaseModel) else part for part in parts]
+    encoded = json.dumps(canonical, default=_encode, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def client_scope(operation: str, client: Any) -> str:
+    # Commands that aren't tied to one raffle keep their keys per client, so two
+    # clients that happen to pick the same Idempotency-Key never collide.
+    return f"{operation}:{client or 'anonymous'}"
+
+
+def _mismatch(operation: str) -> HTTPException:
+    REQUESTS.inc(operation=operation, outcome="mismatch")
+    return HTTPException(
+        status_code=422,
+        detail="Idempotency-Key was already used with a different request",
+    )
+
+
+def _replay(operation: str, row_fingerprint: str, response, request_fingerprint: str) -> dict:
+    if row_fingerprint != request_fingerprint:
+        raise _mismatch(operation)
+    REQUESTS.inc(operation=operation, outcome="replayed")
+    return json.loads(response) if isinstance(response, str) else response
+
+
+def lookup(operation: str, scope: str, key: Optional[str], request_fingerprint: str) -> Optional[dict]:
+    # Lock-free fast path: a retry of a committed request is answered from the
+    # stored response without taking the raffle lock or an admission slot.
+    if not key:
+        return None
+    row = fetch_one(
+        """
+        SELECT fingerprint, response
+        FROM idempotency_keys
+        WHERE scope = %s AND key = %s AND expires_at > now() AND response IS NOT NULL
+        """,
+        (scope, key),
+    )
+    if not row:
+        return None
+    return _replay(operation, row["fingerprint"], row["response"], request_fingerprint)
+
+
+def guard(
+    handler: Callable,
+    operation: str,
+    scope: str,
+    key: Optional[str],
+    request_fingerprint: str,
+) -> Callable:
+    if not key:
+        return handler
+
+    def _handler(conn):
+        cur = conn.cursor()
+        # Claiming the key first serializes concurrent retries: the second one
+        # blocks on the uncommitted row and, once the first commits, replays its
+        # response instead of running the command again. Errors roll the claim
+        # back, so only successful responses are ever stored.
+        cur.execute(
+            """
+            INSERT INTO idempotency_keys (scope, key, fingerprint, expires_at)
+            VALUES (%s, %s, %s, now() + make_interval(secs => %s))
+            ON CONFLICT (scope, key) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint,
+                response = NULL,
+                created_at = now(),
+                expires_at = EXCLUDED.expires_at
+            WHERE idempotency_keys.expires_at <= now()
+            RETURNING 1
+            """,
+            (scope, key, request_fingerprint, settings.idempotency_ttl_seconds),
+        )
+        claimed = cur.fetchone() is not None
+        if not claimed:
+            cur.execute(
+                "SELECT fingerprint, response FROM idempotency_keys WHERE scope = %s AND key = %s",
+                (scope, key),
+            )
+            row = cur.fetchone()
+            cur.close()
+            return _replay(operation, row[0], row[1], request_fingerprint)
+        cur.close()
+
+        result = handler(conn)
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE idempotency_keys SET response = %s::jsonb WHERE scope = %s AND key = %s",
+            (json.dumps(result, default=_encode), scope, key),
+        )
+        cur.close()
+        REQUESTS.inc(operation=operation, outcome="stored")
+        return result
+
+    return _handler
+
+
+def purge_expired(batch_size: int = 1000) -> int:
+    def _handler(conn):
+        cur = conn.cursor()
+        cur.execute(
+            """
+            DELETE FROM idempotency_keys
+            WHERE ctid IN (
+                SELECT ctid FROM idempotency_keys
+                WHERE expires_at <= now()
+                LIMIT %s
+            )
+            """,
+            (batch_size,),
+        )
+        deleted = cur.rowcount
+        cur.close()
+        return deleted
+
+    total = 0
+    while True:
+        deleted = run_transaction(_handler, operation="purge_idempotency")
+        total += deleted
+        if deleted < batch_size:
+            return total
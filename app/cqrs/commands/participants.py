@@ -2,19 +2,40 @@ from __future__ import annotations
 
 import uuid
 
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.models.schemas import ParticipantCreate
 
+# email -> participant id. Only ids already committed by an earlier transaction
+# are cached: an id inserted by the current transaction could still be rolled
+# back (e.g. a 409 on the reservation), and participants are never deleted.
+_PARTICIPANT_IDS: LRUCache[str, uuid.UUID] = LRUCache(settings.participant_cache_size)
+
 
 def get_or_create_participant(conn, participant: ParticipantCreate) -> uuid.UUID:
+    if participant.email:
+        cached = _PARTICIPANT_IDS.get(participant.email)
+        if cached is not None:
+            return cached
     cur = conn.cursor()
     participant_id: uuid.UUID
     if participant.email:
-        cur.execute("SELECT id FROM participants WHERE email = %s", (participant.email,))
-        row = cur.fetchone()
-        if row:
-            participant_id = row[0]
-            cur.close()
-            return participant_id
+        # Single round trip, and concurrent first-time buyers sharing an email
+        # converge on one row instead of aborting on a unique violation.
+        cur.execute(
+            """
+            INSERT INTO participants (id, name, email)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (email) DO UPDATE SET email = EXCLUDED.email
+            RETURNING id, (xmax = 0) AS inserted
+            """,
+            (uuid.uuid4(), participant.name, participant.email),
+        )
+        participant_id, inserted = cur.fetchone()
+        cur.close()
+        if not inserted:
+            _PARTICIPANT_IDS.set(participant.email, participant_id)
+        return participant_id
     participant_id = uuid.uuid4()
     cur.execute(
         "INSERT INTO participants (id, name, email) VALUES (%s, %s, %s)",
@@ -4,7 +4,7 @@ import secrets
 
 from fastapi import HTTPException
 
-from app.core.security import hash_password
+from app.core.security import hash_password_bounded, issue_session_token
 from app.db.connection import fetch_one
 from app.models.schemas import UserLogin
 
@@ -21,12 +21,16 @@ def login_user(payload: UserLogin) -> dict:
     if not row:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     salt = bytes.fromhex(row["password_salt"])
-    password_hash = hash_password(payload.password, salt)
+    password_hash = hash_password_bounded(payload.password, salt)
     if not secrets.compare_digest(row["password_hash"], password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    access_token, expires_at = issue_session_token(row["id"])
     return {
         "id": str(row["id"]),
         "name": row["name"],
         "email": row["email"],
         "created_at": row["created_at"],
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_at": expires_at,
     }
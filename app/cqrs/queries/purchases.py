@@ -2,20 +2,11 @@ from __future__ import annotations
 
 import uuid
 
-from app.db.connection import fetch_all
+from app.storage import get_store
 
 
 def list_purchases(participant_id: uuid.UUID) -> list[dict]:
-    rows = fetch_all(
-        """
-        SELECT purchase_id, raffle_id, participant_id, raffle_title, raffle_status,
-               numbers, total_price, currency, status, payment_method, created_at
-        FROM purchases_read
-        WHERE participant_id = %s
-        ORDER BY created_at DESC
-        """,
-        (participant_id,),
-    )
+    rows = get_store().purchase_rows(participant_id)
     purchases: list[dict] = []
     for row in rows:
         numbers = row.get("numbers") or []
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import base64
 from datetime import datetime, timezone
 import uuid
-from typing import Optional
+from typing import Iterator, Mapping, Optional
 
 from fastapi import HTTPException
 
-from app.db.connection import fetch_all, fetch_one
+from app.core.singleflight import coalesce
+from app.storage import get_store
 
 
 def _normalize_status(status: Optional[str]) -> Optional[str]:
@@ -31,6 +33,7 @@ def _raffle_row(row: dict) -> dict:
         "status": row["status"],
         "draw_at": row.get("draw_at"),
         "winner_ticket_id": str(row["winner_ticket_id"]) if row.get("winner_ticket_id") else None,
+        "winners": row.get("winners") or [],
         "number_start": row["number_start"],
         "number_end": row["number_end"],
         "number_padding": row.get("number_padding"),
@@ -40,78 +43,65 @@ def _raffle_row(row: dict) -> dict:
     }
 
 
+@coalesce("list_raffles", key=lambda status=None: _normalize_status(status))
 def list_raffles(status: Optional[str] = None) -> list[dict]:
     normalized = _normalize_status(status)
-    sql = """
-        SELECT r.id, r.title, r.description, r.ticket_price, r.currency, r.total_tickets,
-               r.status, r.draw_at, r.winner_ticket_id, r.number_start, r.number_end,
-               r.number_padding, r.owner_id, r.created_at, r.updated_at,
-               COALESCE(s.sold, 0) AS tickets_sold,
-               COALESCE(res.reserved, 0) AS tickets_reserved
-        FROM raffles_read r
-        LEFT JOIN (
-            SELECT raffle_id, COUNT(*) AS sold
-            FROM raffle_numbers_read
-            WHERE status = 'sold'
-            GROUP BY raffle_id
-        ) s ON s.raffle_id = r.id
-        LEFT JOIN (
-            SELECT raffle_id, COUNT(*) AS reserved
-            FROM raffle_numbers_read
-            WHERE status = 'reserved' AND reserved_until > now()
-            GROUP BY raffle_id
-        ) res ON res.raffle_id = r.id
-    """
-    params: tuple = ()
-    if normalized:
-        sql += " WHERE r.status = %s"
-        params = (normalized,)
-    sql += " ORDER BY r.created_at DESC"
-    rows = fetch_all(sql, params)
+    rows = get_store().raffle_rows(normalized)
     return [_raffle_row(row) for row in rows]
 
 
+def _encode_cursor(row: Mapping) -> str:
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, raffle_id = raw.split("|")
+        after = datetime.fromisoformat(created_at), uuid.UUID(raffle_id)
+        # Issued cursors carry an offset; a naive one would be compared in the
+        # session's time zone (or not at all, in the memory store).
+        if after[0].tzinfo is None:
+            raise ValueError("Cursor timestamp has no time zone")
+        return after
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def list_owner_raffles(
+    owner_id: uuid.UUID,
+    statuses: Optional[list[str]] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> dict:
+    normalized = sorted({_normalize_status(status) for status in statuses or [] if status})
+    after = _decode_cursor(cursor) if cursor else None
+    # One extra row tells whether there is a next page without a COUNT.
+    rows = get_store().owner_raffle_rows(owner_id, normalized or None, after, limit + 1)
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {
+        "items": [_raffle_row(row) for row in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
+@coalesce("get_raffle", key=lambda raffle_id: raffle_id)
 def get_raffle(raffle_id: uuid.UUID) -> dict:
-    row = fetch_one(
-        """
-        SELECT r.id, r.title, r.description, r.ticket_price, r.currency, r.total_tickets,
-               r.status, r.draw_at, r.winner_ticket_id, r.number_start, r.number_end,
-               r.number_padding, r.owner_id, r.created_at, r.updated_at,
-               COALESCE(s.sold, 0) AS tickets_sold,
-               COALESCE(res.reserved, 0) AS tickets_reserved
-        FROM raffles_read r
-        LEFT JOIN (
-            SELECT raffle_id, COUNT(*) AS sold
-            FROM raffle_numbers_read
-            WHERE status = 'sold'
-            GROUP BY raffle_id
-        ) s ON s.raffle_id = r.id
-        LEFT JOIN (
-            SELECT raffle_id, COUNT(*) AS reserved
-            FROM raffle_numbers_read
-            WHERE status = 'reserved' AND reserved_until > now()
-            GROUP BY raffle_id
-        ) res ON res.raffle_id = r.id
-        WHERE r.id = %s
-        """,
-        (raffle_id,),
-    )
+    row = get_store().raffle_row(raffle_id)
     if not row:
         raise HTTPException(status_code=404, detail="Raffle not found")
     return _raffle_row(row)
 
 
+@coalesce(
+    "list_numbers",
+    key=lambda raffle_id, offset=0, limit=None: (raffle_id, offset, limit),
+)
 def list_numbers(raffle_id: uuid.UUID, offset: int = 0, limit: Optional[int] = None) -> dict:
     if offset < 0:
         raise HTTPException(status_code=400, detail="Offset must be >= 0")
-    raffle = fetch_one(
-        """
-        SELECT id, total_tickets, number_start, number_end, number_padding, status
-        FROM raffles_read
-        WHERE id = %s
-        """,
-        (raffle_id,),
-    )
+    raffle = get_store().numbers_header(raffle_id)
     if not raffle:
         raise HTTPException(status_code=404, detail="Raffle not found")
     total_tickets = raffle["total_tickets"]
@@ -138,33 +128,22 @@ def list_numbers(raffle_id: uuid.UUID, offset: int = 0, limit: Optional[int] = N
             "numbers": [],
         }
     end_number = min(number_end, start_number + limit - 1)
-    rows = fetch_all(
-        """
-        SELECT number, status, reserved_until, label
-        FROM raffle_numbers_read
-        WHERE raffle_id = %s AND number BETWEEN %s AND %s
-        ORDER BY number ASC
-        """,
-        (raffle_id, start_number, end_number),
+    rows = get_store().number_rows(
+        raffle_id, start_number, end_number, archived=bool(raffle.get("archived"))
     )
     now = datetime.now(timezone.utc)
-    status_by_number: dict[int, dict] = {}
+    status_by_number: dict[int, Mapping] = {}
     for row in rows:
-        status = row["status"]
         reserved_until = row.get("reserved_until")
-        if status == "reserved" and reserved_until and reserved_until < now:
+        if row["status"] == "reserved" and reserved_until and reserved_until < now:
             continue
-        status_by_number[row["number"]] = {
-            "status": status,
-            "reserved_until": reserved_until,
-            "label": row.get("label"),
-        }
+        status_by_number[row["number"]] = row
     padding = raffle.get("number_padding")
     numbers = []
     counts = {"available": 0, "reserved": 0, "sold": 0}
     for number in range(start_number, end_number + 1):
         ticket = status_by_number.get(number)
-        if not ticket:
+        if ticket is None:
             status = "available"
             reserved_until = None
             label = str(number).zfill(padding) if padding else str(number)
@@ -195,3 +174,27 @@ def list_numbers(raffle_id: uuid.UUID, offset: int = 0, limit: Optional[int] = N
         "counts": counts,
         "numbers": numbers,
     }
+
+
+EXPORT_COLUMNS = (
+    "number",
+    "label",
+    "purchase_id",
+    "participant_id",
+    "participant_name",
+    "participant_email",
+    "payment_method",
+    "purchased_at",
+)
+
+
+def export_sold_numbers(raffle_id: uuid.UUID, user_id: uuid.UUID) -> Iterator[dict]:
+    # Checked eagerly so a 404/403 is raised before the response starts
+    # streaming; the rows themselves are only read as the body is sent.
+    raffle = get_store().numbers_header(raffle_id)
+    if not raffle:
+        raise HTTPException(status_code=404, detail="Raffle not found")
+    owner_id = raffle.get("owner_id")
+    if owner_id is None or owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to export this raffle")
+    return get_store().sold_rows(raffle_id, archived=bool(raffle.get("archived")))
@@ -1,19 +1,67 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import count
+import random
+import re
 import threading
-from typing import Callable, Optional
+import time
+from typing import Any, Callable, Iterator, Optional
 
-import pg8000.dbapi as pgapi
+from fastapi import HTTPException
 
+from app.core import metrics
 from app.core.config import db_configured, settings
+from app.core.timing import record_query
 from app.db.migrations import ensure_migrations
 
+TRANSACTION_RETRIES = metrics.counter(
+    "rifaapp_db_transaction_retries_total",
+    "Transactions rolled back and retried, by operation and SQLSTATE",
+)
+TRANSACTION_FAILURES = metrics.counter(
+    "rifaapp_db_transaction_failures_total",
+    "Transactions answered with a 503 after retries or a timeout, by operation and SQLSTATE",
+)
+LOCK_WAIT_SECONDS = metrics.histogram(
+    "rifaapp_db_lock_wait_seconds",
+    "Duration of row-locking statements (FOR UPDATE/SHARE) by operation",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+# serialization_failure, deadlock_detected, lock_not_available (lock_timeout).
+RETRYABLE_SQLSTATES = frozenset({"40001", "40P01", "55P03"})
+# query_canceled, raised by statement_timeout.
+QUERY_CANCELED = "57014"
+# (lock_timeout, statement_timeout) in ms for operations that differ from the
+# DB_LOCK_TIMEOUT_MS/DB_STATEMENT_TIMEOUT_MS defaults; 0 disables a timeout.
+# DB_OPERATION_TIMEOUTS overrides any of them.
+OPERATION_TIMEOUTS: dict[str, tuple[int, int]] = {
+    # Backfill batches and index builds over whole tables.
+    "partition": (5000, 0),
+    "archive": (2000, 60000),
+    "auto_draw": (2000, 30000),
+    "benchmark": (0, 0),
+}
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.I)
+
 _DB_LOCAL = threading.local()
+# Connections opened ahead of time (Lambda init) and adopted by the first
+# thread that needs one.
+_WARM_CONNECTIONS: list = []
+_WARM_LOCK = threading.Lock()
+# Unique cursor names, so overlapping streams on one session never clash.
+_CURSOR_IDS = count()
 
 
 def _connect():
     if not db_configured():
         raise RuntimeError("Database configuration is missing")
+    # Imported lazily so code paths that never touch the database (health,
+    # docs, warm-up pings) don't pay for pg8000 and its dependencies.
+    import pg8000.dbapi as pgapi
+
     return pgapi.connect(
         host=settings.db_host,
         port=settings.db_port,
@@ -23,8 +71,24 @@ def _connect():
     )
 
 
+def prewarm_connection() -> None:
+    conn = _connect()
+    conn.autocommit = True
+    with _WARM_LOCK:
+        _WARM_CONNECTIONS.append(conn)
+
+
+def _adopt_warm_connection():
+    with _WARM_LOCK:
+        return _WARM_CONNECTIONS.pop() if _WARM_CONNECTIONS else None
+
+
 def get_conn():
     conn = getattr(_DB_LOCAL, "conn", None)
+    if conn is None:
+        conn = _adopt_warm_connection()
+        if conn is not None:
+            _DB_LOCAL.conn = conn
     if conn is None:
         conn = _connect()
         conn.autocommit = True
@@ -43,21 +107,105 @@ def get_conn():
     return conn
 
 
-def fetch_all(sql: str, params: tuple = ()) -> list[dict]:
+class _TimedCursor:
+    __slots__ = ("_cursor", "_label")
+
+    def __init__(self, cursor, label: str = "transaction") -> None:
+        self._cursor = cursor
+        self._label = label
+
+    def execute(self, operation, args=(), stream=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, args, stream=stream)
+        finally:
+            elapsed = time.perf_counter() - started
+            record_query(elapsed)
+            # Row-locking reads are cheap once they hold the lock: their time
+            # is, to a close approximation, time spent waiting for it.
+            if _LOCKING_READ.search(operation):
+                LOCK_WAIT_SECONDS.observe(elapsed, operation=self._label)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class _TimedConnection:
+    __slots__ = ("_conn", "_label")
+
+    def __init__(self, conn, label: str = "transaction") -> None:
+        self._conn = conn
+        self._label = label
+
+    def cursor(self):
+        return _TimedCursor(self._conn.cursor(), self._label)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class Row(tuple):
+    """Result row readable by position or by column name, like a read-only dict.
+
+    Subclasses built by ``light_row`` hold the column -> position map once per
+    result, so each row costs a tuple instead of a dict with its own keys.
+    """
+
+    __slots__ = ()
+    _positions: dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._positions[key]
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        position = self._positions.get(key)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def keys(self):
+        return self._positions.keys()
+
+
+RowFactory = Callable[[tuple], Callable[[list], Any]]
+
+
+def dict_row(columns: tuple) -> Callable[[list], dict]:
+    return lambda row: dict(zip(columns, row))
+
+
+def tuple_row(columns: tuple) -> Callable[[list], tuple]:
+    return tuple
+
+
+@lru_cache(maxsize=128)
+def light_row(columns: tuple) -> type[Row]:
+    positions = {column: position for position, column in enumerate(columns)}
+    return type("Row", (Row,), {"__slots__": (), "_positions": positions})
+
+
+def fetch_all(sql: str, params: tuple = (), row_factory: RowFactory = dict_row) -> list:
     conn = get_conn()
     cur = conn.cursor()
+    started = time.perf_counter()
     cur.execute(sql, params)
     rows = cur.fetchall()
-    columns = [col[0] for col in cur.description]
+    record_query(time.perf_counter() - started)
+    make_row = row_factory(tuple(col[0] for col in cur.description))
     cur.close()
-    return [dict(zip(columns, row)) for row in rows]
+    return [make_row(row) for row in rows]
 
 
 def fetch_one(sql: str, params: tuple = ()) -> Optional[dict]:
     conn = get_conn()
     cur = conn.cursor()
+    started = time.perf_counter()
     cur.execute(sql, params)
     row = cur.fetchone()
+    record_query(time.perf_counter() - started)
     if row is None:
         cur.close()
         return None
@@ -66,17 +214,158 @@ def fetch_one(sql: str, params: tuple = ()) -> Optional[dict]:
     return dict(zip(columns, row))
 
 
-def run_transaction(handler: Callable):
+def _stream(conn, sql: str, params: tuple, batch_size: int, row_factory: RowFactory) -> Iterator:
+    cursor_name = f"rifaapp_stream_{next(_CURSOR_IDS)}"
+    cur = conn.cursor()
+    try:
+        started = time.perf_counter()
+        cur.execute(f"DECLARE {cursor_name} NO SCROLL CURSOR FOR {sql}", params)
+        record_query(time.perf_counter() - started)
+        make_row = None
+        while True:
+            started = time.perf_counter()
+            cur.execute(f"FETCH FORWARD {int(batch_size)} FROM {cursor_name}")
+            rows = cur.fetchall()
+            record_query(time.perf_counter() - started)
+            if not rows:
+                break
+            if make_row is None:
+                make_row = row_factory(tuple(col[0] for col in cur.description))
+            for row in rows:
+                yield make_row(row)
+    finally:
+        cur.close()
+
+
+@contextmanager
+def iter_rows(
+    sql: str,
+    params: tuple = (),
+    batch_size: Optional[int] = None,
+    row_factory: RowFactory = dict_row,
+) -> Iterator[Iterator]:
+    """Read the rows of ``sql`` in batches through a server-side cursor.
+
+    pg8000 buffers a whole result set on ``execute``; a ``DECLARE``d cursor read
+    ``batch_size`` rows per ``FETCH`` keeps only one batch in memory. The cursor
+    lives in a short transaction on the thread's connection that ends with the
+    ``with`` block (ROLLBACK if it raised), read to the end or not, so the
+    shared connection is never left idle in a transaction::
+
+        with iter_rows(sql, params) as rows:
+            for row in rows: ...
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    rows = _stream(conn, sql, params, batch_size or settings.stream_batch_size, row_factory)
+    try:
+        yield rows
+    except BaseException:
+        rows.close()
+        cur.execute("ROLLBACK")
+        cur.close()
+        raise
+    rows.close()
+    cur.execute("COMMIT")
+    cur.close()
+
+
+def stream_rows(
+    sql: str,
+    params: tuple = (),
+    batch_size: Optional[int] = None,
+    row_factory: RowFactory = dict_row,
+) -> Iterator:
+    """Like ``iter_rows``, on a dedicated connection.
+
+    For iterators handed to a ``StreamingResponse``: the body is consumed after
+    the endpoint returns, from whichever threadpool thread is free, so it can't
+    borrow the thread's shared connection. Closing it early rolls back and
+    releases the connection.
+    """
+    conn = _connect()
+    try:
+        conn.autocommit = False
+        yield from _stream(
+            conn, sql, params, batch_size or settings.stream_batch_size, row_factory
+        )
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _sqlstate(exc: BaseException) -> Optional[str]:
+    # pg8000 raises DatabaseError with the server's error fields as a dict.
+    detail = exc.args[0] if exc.args else None
+    return detail.get("C") if isinstance(detail, dict) else None
+
+
+def _timeouts(operation: str) -> tuple[int, int]:
+    override = settings.db_operation_timeouts.get(operation)
+    if override is not None:
+        return override
+    return OPERATION_TIMEOUTS.get(
+        operation, (settings.db_lock_timeout_ms, settings.db_statement_timeout_ms)
+    )
+
+
+def _attempt(handler: Callable, operation: str, lock_ms: int, statement_ms: int):
     conn = _connect()
     try:
         conn.autocommit = False
         if settings.auto_migrate:
             ensure_migrations()
-        result = handler(conn)
+        timed = _TimedConnection(conn, operation)
+        cur = timed.cursor()
+        cur.execute(
+            "SELECT set_config('lock_timeout', %s, true), "
+            "set_config('statement_timeout', %s, true)",
+            (str(lock_ms), str(statement_ms)),
+        )
+        cur.close()
+        result = handler(timed)
+        started = time.perf_counter()
         conn.commit()
+        record_query(time.perf_counter() - started)
         return result
     except Exception:
         conn.rollback()
         raise
     finally:
         conn.close()
+
+
+def run_transaction(handler: Callable, operation: str = "transaction"):
+    """Run ``handler(conn)`` in a transaction and commit it.
+
+    ``lock_timeout`` and ``statement_timeout`` are set per ``operation``, so a
+    writer stuck behind a raffle lock fails in seconds instead of at the API
+    Gateway timeout. Deadlocks, serialization failures and lock timeouts roll
+    back and rerun the handler, up to ``DB_MAX_RETRIES`` times with full
+    jitter; handlers must not have side effects outside the transaction.
+    Once retries run out (or a statement times out) the caller gets a 503.
+    """
+    lock_ms, statement_ms = _timeouts(operation)
+    attempt = 0
+    while True:
+        try:
+            return _attempt(handler, operation, lock_ms, statement_ms)
+        except Exception as exc:
+            sqlstate = _sqlstate(exc)
+            if sqlstate in RETRYABLE_SQLSTATES and attempt < settings.db_max_retries:
+                TRANSACTION_RETRIES.inc(operation=operation, sqlstate=sqlstate)
+                # Full jitter over base * 2**attempt: the first retry waits at
+                # most DB_RETRY_BASE_MS.
+                backoff_ms = settings.db_retry_base_ms * 2 ** attempt
+                attempt += 1
+                time.sleep(random.uniform(0, backoff_ms) / 1000)
+                continue
+            if sqlstate in RETRYABLE_SQLSTATES or sqlstate == QUERY_CANCELED:
+                TRANSACTION_FAILURES.inc(operation=operation, sqlstate=sqlstate)
+                raise HTTPException(
+                    status_code=503,
+                    detail="Database is busy, retry shortly",
+                    headers={"Retry-After": "1"},
+                ) from exc
+            raise
@@ -1,15 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
 import subprocess
 import threading
 from pathlib import Path
 from shutil import which
+from typing import Optional
 from urllib.parse import quote
 
-import pg8000.dbapi as pgapi
-
 from app.core.config import db_configured, settings
 
 logger = logging.getLogger(__name__)
@@ -17,6 +17,12 @@ logger = logging.getLogger(__name__)
 _MIGRATIONS_READY = False
 _MIGRATIONS_LOCK = threading.Lock()
 
+# Ledger for the direct SQL fallback; Sqitch keeps its own registry.
+LEDGER_TABLE = "rifaapp_migrations"
+# Single-key advisory lock, a separate key space from the two-key locks taken
+# by the auto-draw scheduler.
+MIGRATIONS_LOCK_KEY = 27010001
+
 
 def _resolve_sqitch() -> str:
     sqitch_bin = os.getenv("SQITCH_BIN", "sqitch")
@@ -63,6 +69,8 @@ def _run_sqitch(command: str) -> None:
 def _connect_direct():
     if not db_configured():
         raise RuntimeError("Database configuration is missing")
+    import pg8000.dbapi as pgapi
+
     return pgapi.connect(
         host=settings.db_host,
         port=settings.db_port,
@@ -88,22 +96,91 @@ def _load_plan_entries(repo_root: Path) -> list[str]:
     return entries
 
 
+def _plan_checksums(repo_root: Path) -> list[tuple[str, Path, str]]:
+    deploy_dir = repo_root / "sqitch" / "deploy"
+    changes: list[tuple[str, Path, str]] = []
+    for name in _load_plan_entries(repo_root):
+        sql_path = deploy_dir / f"{name}.sql"
+        if not sql_path.exists():
+            raise RuntimeError(f"Missing migration file: {sql_path}")
+        changes.append((name, sql_path, hashlib.sha256(sql_path.read_bytes()).hexdigest()))
+    return changes
+
+
+def _applied_checksums(cur) -> Optional[dict[str, str]]:
+    import pg8000.dbapi as pgapi
+
+    try:
+        cur.execute(f"SELECT name, checksum FROM {LEDGER_TABLE}")
+    except pgapi.DatabaseError as exc:
+        detail = exc.args[0] if exc.args else None
+        if isinstance(detail, dict) and detail.get("C") == "42P01":
+            # undefined_table: nothing was ever applied through the fallback.
+            return None
+        raise
+    return {row[0]: row[1] for row in cur.fetchall()}
+
+
+def _pending(
+    changes: list[tuple[str, Path, str]],
+    applied: dict[str, str],
+) -> list[tuple[str, Path, str]]:
+    return [change for change in changes if change[0] not in applied]
+
+
+def _warn_on_drift(changes: list[tuple[str, Path, str]], applied: dict[str, str]) -> None:
+    # Like Sqitch, a deployed change is never replayed: its script may not be
+    # idempotent, and later changes already ran on top of it. Edits to deployed
+    # scripts belong in a new plan change (or `sqitch rework`).
+    for name, sql_path, checksum in changes:
+        if name in applied and applied[name] != checksum:
+            logger.warning(
+                "Deployed migration %s changed on disk; it will not be re-applied",
+                sql_path.name,
+            )
+
+
 def _run_sql_migrations() -> None:
     repo_root = Path(os.getenv("SQITCH_DIR", Path(__file__).resolve().parents[2])).resolve()
-    deploy_dir = repo_root / "sqitch" / "deploy"
-    entries = _load_plan_entries(repo_root)
+    changes = _plan_checksums(repo_root)
     logger.warning("Sqitch not available. Running SQL migrations directly.")
-    logger.info("Applying %s migration files from %s", len(entries), deploy_dir)
     conn = _connect_direct()
     try:
         conn.autocommit = True
         cur = conn.cursor()
-        for name in entries:
-            sql_path = deploy_dir / f"{name}.sql"
-            if not sql_path.exists():
-                raise RuntimeError(f"Missing migration file: {sql_path}")
+        # Fast path: an up-to-date database costs one query and takes no lock.
+        applied = _applied_checksums(cur)
+        if applied is not None:
+            _warn_on_drift(changes, applied)
+        if applied is not None and not _pending(changes, applied):
+            logger.info("Database schema is up to date (%s changes)", len(changes))
+            cur.close()
+            return
+        # Session-level lock: concurrent cold starts queue here. If a migration
+        # fails, closing the connection releases it.
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_KEY,))
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {LEDGER_TABLE} (
+                name text PRIMARY KEY,
+                checksum text NOT NULL,
+                applied_at timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        )
+        # Another instance may have migrated while we waited for the lock.
+        pending = _pending(changes, _applied_checksums(cur) or {})
+        logger.info("Applying %s of %s migration files", len(pending), len(changes))
+        for name, sql_path, checksum in pending:
             logger.info("Applying migration %s", sql_path.name)
             cur.execute(sql_path.read_text())
+            cur.execute(
+                f"""
+                INSERT INTO {LEDGER_TABLE} (name, checksum) VALUES (%s, %s)
+                """,
+                (name, checksum),
+            )
+        cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_KEY,))
         cur.close()
     finally:
         conn.close()
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import re
+import time
+from typing import Callable, Optional, Union
+import uuid
+
+from app.db.connection import run_transaction
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    table: str
+    # Keyset used to walk the old table in batches; also the new primary key.
+    key: tuple[str, str]
+    constraints: tuple[str, ...]
+    # (final index name, column list and predicate)
+    indexes: tuple[tuple[str, str], ...]
+
+    @property
+    def shadow(self) -> str:
+        return f"{self.table}_partitioned"
+
+    @property
+    def retired(self) -> str:
+        return f"{self.table}_unpartitioned"
+
+    @property
+    def trigger(self) -> str:
+        return f"{self.table}_partition_sync"
+
+
+# Primary and unique keys of a partitioned table must include the partition
+# key, so tickets moves from PRIMARY KEY (id) to (raffle_id, id). Nothing
+# references tickets by foreign key (raffle_winners deliberately does not).
+TICKETS = PartitionSpec(
+    table="tickets",
+    key=("raffle_id", "id"),
+    constraints=(
+        "PRIMARY KEY (raffle_id, id)",
+        "UNIQUE (raffle_id, number)",
+        "FOREIGN KEY (raffle_id) REFERENCES raffles(id) ON DELETE CASCADE",
+        "FOREIGN KEY (participant_id) REFERENCES participants(id)",
+    ),
+    indexes=(),
+)
+
+RAFFLE_NUMBERS_READ = PartitionSpec(
+    table="raffle_numbers_read",
+    key=("raffle_id", "number"),
+    constraints=(
+        "PRIMARY KEY (raffle_id, number)",
+        "FOREIGN KEY (raffle_id) REFERENCES raffles(id) ON DELETE CASCADE",
+    ),
+    indexes=(
+        ("raffle_numbers_read_status_idx", "(raffle_id, status)"),
+        ("raffle_numbers_read_reserved_idx", "(raffle_id, status, reserved_until)"),
+        ("raffle_numbers_available_idx", "(raffle_id, number) WHERE status = 'available'"),
+    ),
+)
+
+SPECS = {spec.table: spec for spec in (TICKETS, RAFFLE_NUMBERS_READ)}
+
+# Statements on the request path, with the partitioned table they must prune.
+HOT_QUERIES: dict[str, tuple[str, str]] = {
+    "list_numbers": (
+        "raffle_numbers_read",
+        """
+        SELECT number, label, status, reserved_until
+        FROM raffle_numbers_read
+        WHERE raffle_id = %s
+        ORDER BY number
+        LIMIT 500
+        """,
+    ),
+    "quick_pick": (
+        "raffle_numbers_read",
+        """
+        SELECT number FROM raffle_numbers_read
+        WHERE raffle_id = %s AND status = 'available' AND number >= 1
+        ORDER BY number
+        LIMIT 20
+        """,
+    ),
+    "confirm_reservation": (
+        "tickets",
+        """
+        SELECT id, number FROM tickets
+        WHERE raffle_id = %s AND status = 'reserved' AND reservation_id = gen_random_uuid()
+        """,
+    ),
+    "sold_count": (
+        "tickets",
+        "SELECT COUNT(*) FROM tickets WHERE raffle_id = %s AND status IN ('paid', 'sold')",
+    ),
+}
+
+# Mirrors every change on the old table into the shadow while the backfill
+# runs. TG_ARGV: shadow table, then the two key columns.
+_SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION rifaapp_partition_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        EXECUTE format('DELETE FROM %I WHERE %I = ($1::%I).%I AND %I = ($1::%I).%I',
+                       TG_ARGV[0],
+                       TG_ARGV[1], TG_TABLE_NAME, TG_ARGV[1],
+                       TG_ARGV[2], TG_TABLE_NAME, TG_ARGV[2])
+        USING OLD;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        EXECUTE format('INSERT INTO %I SELECT ($1::%I).* ON CONFLICT DO NOTHING',
+                       TG_ARGV[0], TG_TABLE_NAME)
+        USING NEW;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+
+# Last key copied by the backfill, per table, committed with each batch. The
+# shadow's own max key can't be used to resume: the sync trigger mirrors new
+# writes into it with arbitrary keys.
+_PROGRESS_TABLE = """
+CREATE TABLE IF NOT EXISTS rifaapp_partition_progress (
+    table_name text PRIMARY KEY,
+    after_first text NOT NULL,
+    after_second text NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+)
+"""
+
+Statement = Union[str, tuple[str, tuple]]
+
+
+def _execute(*statements: Statement) -> None:
+    def _handler(conn):
+        cur = conn.cursor()
+        for statement in statements:
+            sql, params = (statement, ()) if isinstance(statement, str) else statement
+            cur.execute(sql, params)
+        cur.close()
+
+    run_transaction(_handler, operation="partition")
+
+
+def _fetch_one(sql: str, params: tuple) -> Optional[tuple]:
+    def _handler(conn):
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        row = cur.fetchone()
+        cur.close()
+        return row
+
+    return run_transaction(_handler, operation="partition")
+
+
+def _relkind(name: str) -> Optional[str]:
+    row = _fetch_one("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (name,))
+    return row[0] if row else None
+
+
+def is_partitioned(table: str) -> bool:
+    return _relkind(table) == "p"
+
+
+def prepare(spec: PartitionSpec, partitions: int) -> bool:
+    """Create the shadow table and start mirroring writes into it.
+
+    Safe to rerun after a failed run: an existing shadow keeps its partitions
+    and rows, and returns True so the backfill resumes from its checkpoint.
+    """
+    resumed = _relkind(spec.shadow) is not None
+    statements: list[Statement] = [_PROGRESS_TABLE]
+    if resumed:
+        logger.info("%s already exists, resuming", spec.shadow)
+    else:
+        statements += [
+            f"""
+            CREATE TABLE IF NOT EXISTS {spec.shadow} (
+                LIKE {spec.table} INCLUDING DEFAULTS,
+                {", ".join(spec.constraints)}
+            ) PARTITION BY HASH (raffle_id)
+            """
+        ]
+        statements += [
+            f"""
+            CREATE TABLE IF NOT EXISTS {spec.table}_p{remainder} PARTITION OF {spec.shadow}
+            FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+            """
+            for remainder in range(partitions)
+        ]
+        # A checkpoint left by an earlier, abandoned shadow no longer applies.
+        statements.append(
+            ("DELETE FROM rifaapp_partition_progress WHERE table_name = %s", (spec.table,))
+        )
+    statements += [
+        f"CREATE INDEX IF NOT EXISTS {name}_part ON {spec.shadow} {definition}"
+        for name, definition in spec.indexes
+    ]
+    statements += [
+        _SYNC_FUNCTION,
+        f"""
+        CREATE OR REPLACE TRIGGER {spec.trigger}
+        AFTER INSERT OR UPDATE OR DELETE ON {spec.table}
+        FOR EACH ROW EXECUTE FUNCTION
+            rifaapp_partition_sync('{spec.shadow}', '{spec.key[0]}', '{spec.key[1]}')
+        """,
+    ]
+    # Shadow, partitions and trigger appear atomically: no write to the old
+    # table can slip in between the trigger starting and the backfill.
+    _execute(*statements)
+    if not resumed:
+        logger.info("Prepared %s with %s hash partitions", spec.shadow, partitions)
+    return resumed
+
+
+def checkpoint(spec: PartitionSpec) -> Optional[tuple]:
+    # Text values: pg8000 sends str parameters untyped, so the keyset
+    # comparison casts them to the key columns' types.
+    return _fetch_one(
+        "SELECT after_first, after_second FROM rifaapp_partition_progress WHERE table_name = %s",
+        (spec.table,),
+    )
+
+
+def _copy_batch(
+    spec: PartitionSpec,
+    after: Optional[tuple],
+    batch_size: int,
+) -> tuple[int, Optional[tuple]]:
+    first, second = spec.key
+    where = f"WHERE ({first}, {second}) > (%s, %s)" if after else ""
+
+    def _handler(conn):
+        cur = conn.cursor()
+        # FOR SHARE makes concurrent updates and deletes of these rows wait for
+        # this batch to commit, so the sync trigger always applies them after
+        # the copy and never leaves a stale or resurrected row behind.
+        cur.execute(
+            f"""
+            WITH batch AS (
+                SELECT * FROM {spec.table}
+                {where}
+                ORDER BY {first}, {second}
+                LIMIT %s
+                FOR SHARE
+            ), copied AS (
+                INSERT INTO {spec.shadow}
+                SELECT * FROM batch
+                ON CONFLICT DO NOTHING
+            )
+            SELECT (SELECT COUNT(*) FROM batch), {first}, {second}
+            FROM batch
+            ORDER BY {first} DESC, {second} DESC
+            LIMIT 1
+            """,
+            (*(after or ()), batch_size),
+        )
+        row = cur.fetchone()
+        if row is None:
+            cur.close()
+            return 0, None
+        cur.execute(
+            """
+            INSERT INTO rifaapp_partition_progress (table_name, after_first, after_second)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (table_name) DO UPDATE
+            SET after_first = EXCLUDED.after_first,
+                after_second = EXCLUDED.after_second,
+                updated_at = now()
+            """,
+            (spec.table, str(row[1]), str(row[2])),
+        )
+        cur.close()
+        return row[0], (row[1], row[2])
+
+    return run_transaction(_handler, operation="partition")
+
+
+def backfill(
+    spec: PartitionSpec,
+    batch_size: int = 5000,
+    pause_seconds: float = 0.0,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    copied = 0
+    after = checkpoint(spec)
+    if after is not None:
+        logger.info("Resuming %s backfill after key %s", spec.table, after)
+    while True:
+        count, last = _copy_batch(spec, after, batch_size)
+        copied += count
+        if progress:
+            progress(copied)
+        if count < batch_size:
+            return copied
+        after = last
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def swap(spec: PartitionSpec, lock_timeout: str = "5s") -> None:
+    statements: list[Statement] = [
+        ("SELECT set_config('lock_timeout', %s, true)", (lock_timeout,)),
+        f"LOCK TABLE {spec.table} IN ACCESS EXCLUSIVE MODE",
+        f"DROP TRIGGER {spec.trigger} ON {spec.table}",
+        f"ALTER TABLE {spec.table} RENAME TO {spec.retired}",
+    ]
+    statements += [
+        f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_unpartitioned" for name, _ in spec.indexes
+    ]
+    statements.append(f"ALTER TABLE {spec.shadow} RENAME TO {spec.table}")
+    statements += [f"ALTER INDEX {name}_part RENAME TO {name}" for name, _ in spec.indexes]
+    statements.append(
+        ("DELETE FROM rifaapp_partition_progress WHERE table_name = %s", (spec.table,))
+    )
+    _execute(*statements)
+    logger.info("Swapped %s for its partitioned copy; old rows kept in %s", spec.table, spec.retired)
+
+
+def drop_retired(spec: PartitionSpec) -> None:
+    _execute(f"DROP TABLE IF EXISTS {spec.retired}")
+
+
+def partition_table(
+    spec: PartitionSpec,
+    partitions: int,
+    batch_size: int = 5000,
+    pause_seconds: float = 0.0,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    if is_partitioned(spec.table):
+        logger.info("%s is already partitioned", spec.table)
+        return 0
+    prepare(spec, partitions)
+    copied = backfill(spec, batch_size=batch_size, pause_seconds=pause_seconds, progress=progress)
+    swap(spec)
+    return copied
+
+
+def scanned_relations(plan) -> set[str]:
+    relations: set[str] = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if "Relation Name" in node:
+                relations.add(node["Relation Name"])
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    return relations
+
+
+def is_pruned(table: str, relations: list[str]) -> bool:
+    # Exact partition names: the unpartitioned shadow ({table}_partitioned)
+    # also starts with "{table}_p".
+    partition = re.compile(rf"{re.escape(table)}_p\d+")
+    return len(relations) == 1 and partition.fullmatch(relations[0]) is not None
+
+
+def check_pruning(raffle_id: Optional[uuid.UUID] = None) -> dict[str, list[str]]:
+    raffle_id = raffle_id or uuid.uuid4()
+
+    def _handler(conn):
+        cur = conn.cursor()
+        report: dict[str, list[str]] = {}
+        for name, (table, sql) in HOT_QUERIES.items():
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", (raffle_id,))
+            plan = cur.fetchone()[0]
+            report[name] = sorted(
+                relation
+                for relation in scanned_relations(plan)
+                if relation == table or relation.startswith(f"{table}_p")
+            )
+        cur.close()
+        return report
+
+    return run_transaction(_handler, operation="partition")
@@ -1,18 +1,37 @@
+import logging
 import os
 import traceback
+from contextlib import asynccontextmanager
 
 from fastapi import APIRouter, FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.responses import JSONResponse
-from mangum import Mangum
 
-from app.api.routes import auth, health, migrations, purchases, raffles_v2
-from app.core.config import settings
+from app.api.compression import CompressionMiddleware
+from app.api.routes import auth, cart, health, metrics, migrations, owners, purchases, raffles_v2
+from app.api.timing import TimingMiddleware
+from app.core.config import db_configured, settings
 from app.core.logging import configure_logging
+from app.core.security import shutdown_hasher
 
 configure_logging()
+logger = logging.getLogger("rifaapp")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    stop_auto_draw = None
+    if settings.auto_draw_interval_seconds > 0:
+        from app.cqrs.commands import auto_draw
+
+        stop_auto_draw = auto_draw.start_background_loop()
+    yield
+    if stop_auto_draw is not None:
+        stop_auto_draw.set()
+    shutdown_hasher()
+
 
 API_PREFIX = "/rifaapp"
 api_gateway_base_path = os.getenv("API_GATEWAY_BASE_PATH", "").strip()
@@ -25,6 +44,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=f"{API_PREFIX}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -34,13 +54,39 @@ app.add_middleware(
     allow_methods=settings.cors_allow_methods,
     allow_headers=settings.cors_allow_headers,
 )
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        level=settings.compression_level,
+    )
+if settings.profile_sample_rate > 0 or settings.profile_secret:
+    from app.api.profiling import ProfilingMiddleware
+    from app.core.profiling import StackSampler
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        sampler=StackSampler(
+            interval=settings.profile_interval_ms / 1000,
+            max_overhead=settings.profile_max_overhead,
+        ),
+        directory=settings.profile_dir,
+        sample_rate=settings.profile_sample_rate,
+        secret=settings.profile_secret,
+        max_stacks=settings.profile_max_stacks,
+    )
+# Outermost, so the measured time includes compression and the other middlewares.
+app.add_middleware(TimingMiddleware)
 
 api_router = APIRouter(prefix=API_PREFIX)
 api_router.include_router(auth.router)
 api_router.include_router(health.router)
+api_router.include_router(metrics.router)
 api_router.include_router(migrations.router)
 api_router.include_router(raffles_v2.router)
 api_router.include_router(purchases.router)
+api_router.include_router(owners.router)
+api_router.include_router(cart.router)
 app.include_router(api_router)
 
 
@@ -49,6 +95,7 @@ def http_exception_handler(_: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail, "type": "http_error"},
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -99,4 +146,50 @@ def redoc(request: Request):
     openapi_url = f"{base_path}{app.openapi_url}" if base_path else app.openapi_url
     return get_redoc_html(openapi_url=openapi_url, title=f"{app.title} - ReDoc")
 
-handler = Mangum(app, api_gateway_base_path=api_gateway_base_path or None)
+
+WARMUP_SOURCES = ("serverless-plugin-warmup", "rifaapp.warmup")
+
+_mangum = None
+
+
+def _is_warmup_event(event) -> bool:
+    if not isinstance(event, dict):
+        return False
+    return bool(event.get("warmup")) or event.get("source") in WARMUP_SOURCES
+
+
+def handler(event, context):
+    # Warm-up pings never reach Mangum or the ASGI app.
+    if _is_warmup_event(event):
+        return {"warmed": True}
+    global _mangum
+    if _mangum is None:
+        from mangum import Mangum
+
+        # lifespan="off": Mangum would otherwise run startup/shutdown around
+        # every invocation, tearing down process-wide state each time. So the
+        # lifespan hooks never run on Lambda: a frozen sandbox can't keep the
+        # auto-draw loop ticking anyway (schedule the auto-draw CLI instead),
+        # and the hasher pool dies with the sandbox.
+        if settings.auto_draw_interval_seconds > 0:
+            logger.warning(
+                "AUTO_DRAW_INTERVAL_SECONDS is ignored on Lambda; "
+                "run the auto-draw CLI on a schedule instead"
+            )
+        _mangum = Mangum(
+            app,
+            lifespan="off",
+            api_gateway_base_path=api_gateway_base_path or None,
+        )
+    return _mangum(event, context)
+
+
+if settings.cold_start_mode and db_configured():
+    # Open the DB connection during Lambda init (ahead of time with provisioned
+    # concurrency) instead of inside the first request.
+    from app.db.connection import prewarm_connection
+
+    try:
+        prewarm_connection()
+    except Exception:
+        logger.warning("Could not open a database connection during init", exc_info=True)
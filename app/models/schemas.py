@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
@@ -36,16 +36,30 @@ class UserOut(BaseModel):
     created_at: datetime
 
 
+class LoginResponse(UserOut):
+    access_token: str
+    token_type: str = "bearer"
+    expires_at: datetime
+
+
 class ParticipantCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=120)
     email: Optional[EmailStr] = None
 
 
+class RaffleWinner(BaseModel):
+    prize_rank: int
+    ticket_id: str
+    participant_id: str
+    number: int
+
+
 class DrawResponse(BaseModel):
     raffle_id: str
     winner_ticket_id: str
     winner_participant_id: str
     winning_number: int
+    winners: list[RaffleWinner] = []
 
 
 class RaffleCreateV2(BaseModel):
@@ -80,6 +94,7 @@ class RaffleOutV2(BaseModel):
     status: str
     draw_at: Optional[datetime]
     winner_ticket_id: Optional[str]
+    winners: list[RaffleWinner] = []
     number_start: int
     number_end: int
     number_padding: Optional[int]
@@ -88,6 +103,11 @@ class RaffleOutV2(BaseModel):
     updated_at: datetime
 
 
+class OwnerRafflesPage(BaseModel):
+    items: list[RaffleOutV2]
+    next_cursor: Optional[str] = None
+
+
 class RaffleNumber(BaseModel):
     number: int
     label: str
@@ -109,7 +129,8 @@ class RaffleNumbersResponse(BaseModel):
 
 class ReservationRequest(BaseModel):
     participant: ParticipantCreate
-    numbers: list[int] = Field(..., min_items=1, max_items=50)
+    numbers: Optional[list[int]] = Field(None, min_length=1, max_length=50)
+    count: Optional[int] = Field(None, ge=1, le=50, description="Reserve N random available numbers")
     ttl_minutes: int = Field(10, ge=1, le=60)
 
 
@@ -135,6 +156,35 @@ class PurchaseConfirmRequest(BaseModel):
     payment_method: Optional[str] = Field("demo", max_length=30)
 
 
+class CartReservationItem(BaseModel):
+    raffle_id: UUID
+    numbers: Optional[list[int]] = Field(None, min_length=1, max_length=50)
+    count: Optional[int] = Field(None, ge=1, le=50)
+
+
+class CartReservationRequest(BaseModel):
+    participant: ParticipantCreate
+    items: list[CartReservationItem] = Field(..., min_length=1, max_length=10)
+    ttl_minutes: int = Field(10, ge=1, le=60)
+
+
+class CartConfirmItem(BaseModel):
+    raffle_id: UUID
+    reservation_id: str
+
+
+class CartConfirmRequest(BaseModel):
+    participant_id: Optional[str] = None
+    participant: Optional[ParticipantCreate] = None
+    payment_method: Optional[str] = Field("demo", max_length=30)
+    items: list[CartConfirmItem] = Field(..., min_length=1, max_length=10)
+
+
+class CartItemError(BaseModel):
+    status_code: int
+    detail: Any
+
+
 class PurchaseOut(BaseModel):
     purchase_id: str
     raffle_id: str
@@ -157,3 +207,27 @@ class PurchaseConfirmResponse(BaseModel):
     currency: str
     status: str
     created_at: datetime
+
+
+class CartReservationResult(BaseModel):
+    raffle_id: str
+    ok: bool
+    reservation: Optional[ReservationResponse] = None
+    error: Optional[CartItemError] = None
+
+
+class CartReservationResponse(BaseModel):
+    participant_id: str
+    items: list[CartReservationResult]
+
+
+class CartConfirmResult(BaseModel):
+    raffle_id: str
+    ok: bool
+    purchase: Optional[PurchaseConfirmResponse] = None
+    error: Optional[CartItemError] = None
+
+
+class CartConfirmResponse(BaseModel):
+    participant_id: str
+    items: list[CartConfirmResult]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+from app.core.config import settings
+from app.storage.base import RaffleStore
+
+BACKENDS = ("postgres", "memory")
+
+_STORE: Optional[RaffleStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def create_store(backend: str) -> RaffleStore:
+    # Implementations are imported lazily: the Postgres store pulls in the
+    # command modules, which themselves import this package.
+    if backend == "postgres":
+        from app.storage.postgres import PostgresStore
+
+        return PostgresStore()
+    if backend == "memory":
+        from app.storage.memory import MemoryStore
+
+        return MemoryStore()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def get_store() -> RaffleStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = create_store(settings.storage_backend)
+    return _STORE
+
+
+def set_store(store: Optional[RaffleStore]) -> Optional[RaffleStore]:
+    """Swap the process-wide store (tests, benchmarks); returns the previous one."""
+    global _STORE
+    with _STORE_LOCK:
+        previous, _STORE = _STORE, store
+    return previous
+
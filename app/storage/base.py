@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterator, Mapping, Optional
+import uuid
+
+from app.models.schemas import (
+    CartConfirmRequest,
+    CartReservationRequest,
+    PurchaseConfirmRequest,
+    RaffleCreateV2,
+    ReservationRequest,
+)
+
+
+class RaffleStore(ABC):
+    """Storage underneath the raffle commands and queries.
+
+    Commands validate their input and delegate here; each method is one
+    atomic unit of work. Write methods return the response body, read methods
+    return read-model rows (read-only mappings keyed like the ``*_read``
+    columns) that the queries shape; ``sold_rows`` produces them lazily, so
+    iterate it once.
+    """
+
+    # False for engines that keep everything in-process (no DB_* settings needed).
+    requires_database = True
+
+    # Commands
+
+    @abstractmethod
+    def create_raffle(
+        self, payload: RaffleCreateV2, status: str, idempotency_key: Optional[str] = None
+    ) -> dict: ...
+
+    @abstractmethod
+    def update_raffle(self, raffle_id: uuid.UUID, data: dict, editor_id: uuid.UUID) -> dict: ...
+
+    @abstractmethod
+    def delete_raffle(self, raffle_id: uuid.UUID, editor_id: uuid.UUID) -> None: ...
+
+    @abstractmethod
+    def reserve(
+        self,
+        raffle_id: uuid.UUID,
+        payload: ReservationRequest,
+        ttl_minutes: int,
+        idempotency_key: Optional[str] = None,
+    ) -> dict: ...
+
+    @abstractmethod
+    def confirm(
+        self,
+        raffle_id: uuid.UUID,
+        payload: PurchaseConfirmRequest,
+        idempotency_key: Optional[str] = None,
+    ) -> dict: ...
+
+    @abstractmethod
+    def reserve_cart(
+        self,
+        payload: CartReservationRequest,
+        ttl_minutes: int,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        """Reserve every item of a cart for one buyer.
+
+        Items succeed or fail on their own: a failed item is reported in its
+        result and leaves nothing behind, the others still apply.
+        """
+
+    @abstractmethod
+    def confirm_cart(
+        self, payload: CartConfirmRequest, idempotency_key: Optional[str] = None
+    ) -> dict:
+        """Confirm every reservation of a cart, item by item like ``reserve_cart``."""
+
+    @abstractmethod
+    def release(self, raffle_id: uuid.UUID, reservation_id: str) -> int: ...
+
+    @abstractmethod
+    def draw(self, raffle_id: uuid.UUID, prizes: int) -> dict: ...
+
+    # Queries
+
+    @abstractmethod
+    def raffle_rows(self, status: Optional[str] = None) -> list[Mapping]: ...
+
+    @abstractmethod
+    def owner_raffle_rows(
+        self,
+        owner_id: uuid.UUID,
+        statuses: Optional[list[str]] = None,
+        after: Optional[tuple[datetime, uuid.UUID]] = None,
+        limit: int = 20,
+    ) -> list[Mapping]:
+        """Raffles of ``owner_id``, newest first, ordered by ``(created_at, id)``.
+
+        ``after`` is the ``(created_at, id)`` of the last row of the previous
+        page; only older rows are returned (keyset pagination).
+        """
+
+    @abstractmethod
+    def raffle_row(self, raffle_id: uuid.UUID) -> Optional[dict]: ...
+
+    @abstractmethod
+    def numbers_header(self, raffle_id: uuid.UUID) -> Optional[dict]: ...
+
+    @abstractmethod
+    def number_rows(
+        self, raffle_id: uuid.UUID, start: int, end: int, archived: bool = False
+    ) -> list[Mapping]: ...
+
+    @abstractmethod
+    def purchase_rows(self, participant_id: uuid.UUID) -> list[dict]: ...
+
+    @abstractmethod
+    def sold_rows(self, raffle_id: uuid.UUID, archived: bool = False) -> Iterator[dict]:
+        """Sold numbers of a raffle with their buyer, ordered by number.
+
+        Lazily produced so exports run in constant memory; each row has
+        ``number``, ``label``, ``purchase_id``, ``participant_id``,
+        ``participant_name``, ``participant_email``, ``payment_method`` and
+        ``purchased_at``.
+        """
@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import chain
+import threading
+import time
+from typing import Iterator, Optional, Union
+import uuid
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.cqrs.commands import idempotency
+from app.cqrs.commands.cart import apply_cart_items, cart_scope
+from app.cqrs.commands.raffles import (
+    QUICK_PICK_SPREAD,
+    _DRAW_RANDOM,
+    already_drawn,
+    check_reservation_selection,
+    draw_out,
+    raffle_out,
+    winner_out,
+)
+from app.models.schemas import (
+    CartConfirmRequest,
+    CartReservationRequest,
+    ParticipantCreate,
+    PurchaseConfirmRequest,
+    RaffleCreateV2,
+    ReservationRequest,
+)
+from app.storage.base import RaffleStore
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class _Ticket:
+    id: uuid.UUID
+    participant_id: uuid.UUID
+    number: int
+    status: str
+    reserved_until: Optional[datetime] = None
+    reservation_id: Optional[uuid.UUID] = None
+    purchase_id: Optional[uuid.UUID] = None
+
+
+@dataclass
+class _Raffle:
+    # raffles_read columns, without the aggregated counts.
+    row: dict
+    # Only taken numbers have a ticket; absent numbers are available.
+    tickets: dict[int, _Ticket] = field(default_factory=dict)
+    sold: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class _KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Requests holding or waiting for the lock.
+        self.users = 0
+
+
+class MemoryStore(RaffleStore):
+    """Thread-safe in-process engine with the Postgres store's semantics.
+
+    Each raffle has its own lock, standing in for the ``FOR UPDATE`` on its
+    row, so writes to one raffle serialize while other raffles proceed.
+    Nothing survives the process: meant for tests, microbenchmarks of the
+    Python paths and local demos (``STORAGE_BACKEND=memory``).
+    """
+
+    requires_database = False
+    # Stored Idempotency-Key responses kept at most, oldest evicted first.
+    max_stored_responses = 10_000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._raffles: dict[uuid.UUID, _Raffle] = {}
+        self._participants: dict[str, uuid.UUID] = {}
+        self._people: dict[uuid.UUID, ParticipantCreate] = {}
+        self._purchases: list[dict] = []
+        self._responses: dict[tuple[str, str], tuple[str, dict, float]] = {}
+        self._key_locks: dict[tuple[str, str], _KeyLock] = {}
+
+    def _raffle(self, raffle_id: uuid.UUID) -> _Raffle:
+        raffle = self._raffles.get(raffle_id)
+        if raffle is None:
+            raise HTTPException(status_code=404, detail="Raffle not found")
+        return raffle
+
+    def _participant(self, participant: ParticipantCreate) -> uuid.UUID:
+        with self._lock:
+            if participant.email:
+                participant_id = self._participants.setdefault(participant.email, uuid.uuid4())
+            else:
+                participant_id = uuid.uuid4()
+            # Like the participants table, the first name given for an email sticks.
+            self._people.setdefault(participant_id, participant)
+        return participant_id
+
+    def _idempotent(self, operation: str, scope: str, key: Optional[str], payload, apply) -> dict:
+        if not key:
+            return apply()
+        request_fingerprint = idempotency.fingerprint(payload)
+        scoped = (scope, key)
+        with self._lock:
+            key_lock = self._key_locks.get(scoped)
+            if key_lock is None:
+                key_lock = self._key_locks[scoped] = _KeyLock()
+            key_lock.users += 1
+        try:
+            # Holding the key's lock across the command serializes concurrent
+            # retries like the claimed row does in Postgres: the second one replays.
+            with key_lock.lock:
+                with self._lock:
+                    stored = self._responses.get(scoped)
+                if stored and stored[2] > time.monotonic():
+                    return idempotency._replay(
+                        operation, stored[0], copy.deepcopy(stored[1]), request_fingerprint
+                    )
+                response = apply()
+                self._store_response(scoped, request_fingerprint, copy.deepcopy(response))
+        finally:
+            with self._lock:
+                key_lock.users -= 1
+                # Once nobody holds or waits for it, the stored response alone
+                # answers retries; a later one gets a fresh lock.
+                if not key_lock.users:
+                    del self._key_locks[scoped]
+        idempotency.REQUESTS.inc(operation=operation, outcome="stored")
+        return response
+
+    def _store_response(self, scoped: tuple[str, str], fingerprint: str, response: dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # Reinserted at the end: with one TTL for every key, insertion order
+            # is expiry order, so expired entries are always at the front.
+            self._responses.pop(scoped, None)
+            self._responses[scoped] = (fingerprint, response, now + settings.idempotency_ttl_seconds)
+            while self._responses:
+                oldest = next(iter(self._responses))
+                if (
+                    self._responses[oldest][2] > now
+                    and len(self._responses) <= self.max_stored_responses
+                ):
+                    break
+                del self._responses[oldest]
+
+    @staticmethod
+    def _release_expired(raffle: _Raffle, now: datetime) -> None:
+        expired = [
+            number
+            for number, ticket in raffle.tickets.items()
+            if ticket.status == "reserved" and ticket.reserved_until < now
+        ]
+        for number in expired:
+            del raffle.tickets[number]
+
+    @staticmethod
+    def _pick_available(raffle: _Raffle, count: int) -> list[int]:
+        number_start, number_end = raffle.row["number_start"], raffle.row["number_end"]
+        pivot = _DRAW_RANDOM.randint(number_start, number_end)
+        window = count * QUICK_PICK_SPREAD
+        candidates: list[int] = []
+        for number in chain(range(pivot, number_end + 1), range(number_start, pivot)):
+            if number not in raffle.tickets:
+                candidates.append(number)
+                if len(candidates) == window:
+                    break
+        if len(candidates) < count:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Not enough numbers available", "available": len(candidates)},
+            )
+        return _DRAW_RANDOM.sample(candidates, count)
+
+    def _counts(self, raffle: _Raffle, now: datetime) -> dict:
+        with raffle.lock:
+            reserved = sum(
+                1
+                for ticket in raffle.tickets.values()
+                if ticket.status == "reserved" and ticket.reserved_until > now
+            )
+            return {**raffle.row, "tickets_sold": raffle.sold, "tickets_reserved": reserved}
+
+    def create_raffle(
+        self, payload: RaffleCreateV2, status: str, idempotency_key: Optional[str] = None
+    ) -> dict:
+        def _apply() -> dict:
+            now = _now()
+            number_start = 1 if payload.number_start is None else payload.number_start
+            row = {
+                "id": uuid.uuid4(),
+                "title": payload.title,
+                "description": payload.description,
+                "ticket_price": payload.ticket_price,
+                "currency": payload.currency.upper(),
+                "total_tickets": payload.total_tickets,
+                "status": status,
+                "draw_at": payload.draw_at,
+                "winner_ticket_id": None,
+                "winners": [],
+                "number_start": number_start,
+                "number_end": number_start + payload.total_tickets - 1,
+                "number_padding": payload.number_padding,
+                "owner_id": payload.owner_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            with self._lock:
+                self._raffles[row["id"]] = _Raffle(row=row)
+            return raffle_out(row)
+
+        scope = idempotency.client_scope("create", payload.owner_id)
+        return self._idempotent("create", scope, idempotency_key, payload, _apply)
+
+    def update_raffle(self, raffle_id: uuid.UUID, data: dict, editor_id: uuid.UUID) -> dict:
+        raffle = self._raffle(raffle_id)
+        with raffle.lock:
+            owner_id = raffle.row["owner_id"]
+            if owner_id is None or owner_id != editor_id:
+                raise HTTPException(status_code=403, detail="Not allowed to edit this raffle")
+            for name in ("title", "description", "draw_at", "status"):
+                if name in data:
+                    raffle.row[name] = data[name]
+            raffle.row["updated_at"] = _now()
+        return raffle_out(self._counts(raffle, _now()))
+
+    def delete_raffle(self, raffle_id: uuid.UUID, editor_id: uuid.UUID) -> None:
+        raffle = self._raffle(raffle_id)
+        with raffle.lock:
+            owner_id = raffle.row["owner_id"]
+            if owner_id is None or owner_id != editor_id:
+                raise HTTPException(status_code=403, detail="Not allowed to delete this raffle")
+            with self._lock:
+                self._raffles.pop(raffle_id, None)
+                self._purchases = [p for p in self._purchases if p["raffle_id"] != raffle_id]
+
+    def _reserve(
+        self,
+        raffle_id: uuid.UUID,
+        participant_id: uuid.UUID,
+        numbers: Optional[list[int]],
+        count: Optional[int],
+        ttl_minutes: int,
+    ) -> dict:
+        raffle = self._raffle(raffle_id)
+        with raffle.lock:
+            row = raffle.row
+            if row["status"] not in ("open", "published"):
+                raise HTTPException(status_code=400, detail="Raffle is not open for reservations")
+            for number in numbers or ():
+                if number < row["number_start"] or number > row["number_end"]:
+                    raise HTTPException(status_code=400, detail="Number out of range")
+            now = _now()
+            self._release_expired(raffle, now)
+            if numbers is None:
+                numbers = self._pick_available(raffle, count)
+            conflicts = [number for number in numbers if number in raffle.tickets]
+            if conflicts:
+                raise HTTPException(
+                    status_code=409,
+                    detail={
+                        "message": "Some numbers are no longer available",
+                        "numbers": conflicts,
+                    },
+                )
+            reservation_id = uuid.uuid4()
+            expires_at = now + timedelta(minutes=ttl_minutes)
+            for number in numbers:
+                raffle.tickets[number] = _Ticket(
+                    id=uuid.uuid4(),
+                    participant_id=participant_id,
+                    number=number,
+                    status="reserved",
+                    reserved_until=expires_at,
+                    reservation_id=reservation_id,
+                )
+            return {
+                "reservation_id": str(reservation_id),
+                "participant_id": str(participant_id),
+                "raffle_id": str(raffle_id),
+                "numbers": sorted(numbers),
+                "expires_at": expires_at,
+                "ticket_price": row["ticket_price"],
+                "currency": row["currency"],
+                "total_price": Decimal(row["ticket_price"]) * len(numbers),
+            }
+
+    def reserve(
+        self,
+        raffle_id: uuid.UUID,
+        payload: ReservationRequest,
+        ttl_minutes: int,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        def _apply() -> dict:
+            participant_id = self._participant(payload.participant)
+            return self._reserve(
+                raffle_id, participant_id, payload.numbers, payload.count, ttl_minutes
+            )
+
+        return self._idempotent(
+            "reserve", f"reserve:{raffle_id}", idempotency_key, payload, _apply
+        )
+
+    def _buyer(self, payload: Union[PurchaseConfirmRequest, CartConfirmRequest]) -> uuid.UUID:
+        if payload.participant_id:
+            try:
+                return uuid.UUID(payload.participant_id)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail="Invalid participant_id") from exc
+        if payload.participant:
+            return self._participant(payload.participant)
+        raise HTTPException(status_code=400, detail="Participant is required")
+
+    def _confirm(
+        self,
+        raffle_id: uuid.UUID,
+        reservation_id: str,
+        participant_id: uuid.UUID,
+        payment_method: Optional[str],
+    ) -> dict:
+        raffle = self._raffle(raffle_id)
+        with raffle.lock:
+            row = raffle.row
+            if row["status"] not in ("open", "published"):
+                raise HTTPException(status_code=400, detail="Raffle is not open for purchases")
+            now = _now()
+            tickets = [
+                ticket
+                for ticket in raffle.tickets.values()
+                if ticket.status == "reserved"
+                and str(ticket.reservation_id) == reservation_id
+                and ticket.participant_id == participant_id
+                and ticket.reserved_until > now
+            ]
+            if not tickets:
+                raise HTTPException(status_code=400, detail="Reservation expired or not found")
+            purchase_id = uuid.uuid4()
+            numbers = sorted(ticket.number for ticket in tickets)
+            total_price = Decimal(row["ticket_price"]) * len(tickets)
+            for ticket in tickets:
+                ticket.status = "sold"
+                ticket.reserved_until = None
+                ticket.reservation_id = None
+                ticket.purchase_id = purchase_id
+            raffle.sold += len(tickets)
+            if raffle.sold >= row["total_tickets"]:
+                row["status"] = "closed"
+                row["updated_at"] = now
+            purchase = {
+                "purchase_id": purchase_id,
+                "raffle_id": raffle_id,
+                "participant_id": participant_id,
+                "raffle_title": row["title"],
+                "raffle_status": row["status"],
+                "numbers": numbers,
+                "total_price": total_price,
+                "currency": row["currency"],
+                "status": "confirmed",
+                "payment_method": payment_method,
+                "created_at": now,
+            }
+            with self._lock:
+                self._purchases.append(purchase)
+        return {
+            "purchase_id": str(purchase_id),
+            "raffle_id": str(raffle_id),
+            "participant_id": str(participant_id),
+            "numbers": numbers,
+            "total_price": total_price,
+            "currency": purchase["currency"],
+            "status": "confirmed",
+            "created_at": now,
+        }
+
+    def confirm(
+        self,
+        raffle_id: uuid.UUID,
+        payload: PurchaseConfirmRequest,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        def _apply() -> dict:
+            participant_id = self._buyer(payload)
+            return self._confirm(
+                raffle_id, payload.reservation_id, participant_id, payload.payment_method
+            )
+
+        return self._idempotent(
+            "confirm", f"confirm:{raffle_id}", idempotency_key, payload, _apply
+        )
+
+    def reserve_cart(
+        self,
+        payload: CartReservationRequest,
+        ttl_minutes: int,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        def _reserve_item(participant_id: uuid.UUID, item) -> dict:
+            check_reservation_selection(item.numbers, item.count)
+            return self._reserve(
+                item.raffle_id, participant_id, item.numbers, item.count, ttl_minutes
+            )
+
+        def _apply() -> dict:
+            participant_id = self._participant(payload.participant)
+            # Each item checks everything before it changes anything, so a
+            # failed item leaves nothing behind, like the savepoint in Postgres.
+            results = apply_cart_items(
+                payload.items, "reservation", lambda item: _reserve_item(participant_id, item)
+            )
+            return {"participant_id": str(participant_id), "items": results}
+
+        scope = cart_scope("cart_reserve", None, payload.participant)
+        return self._idempotent("cart_reserve", scope, idempotency_key, payload, _apply)
+
+    def confirm_cart(
+        self, payload: CartConfirmRequest, idempotency_key: Optional[str] = None
+    ) -> dict:
+        def _apply() -> dict:
+            participant_id = self._buyer(payload)
+            results = apply_cart_items(
+                payload.items,
+                "purchase",
+                lambda item: self._confirm(
+                    item.raffle_id, item.reservation_id, participant_id, payload.payment_method
+                ),
+            )
+            return {"participant_id": str(participant_id), "items": results}
+
+        scope = cart_scope("cart_confirm", payload.participant_id, payload.participant)
+        return self._idempotent("cart_confirm", scope, idempotency_key, payload, _apply)
+
+    def release(self, raffle_id: uuid.UUID, reservation_id: str) -> int:
+        raffle = self._raffles.get(raffle_id)
+        if raffle is None:
+            return 0
+        with raffle.lock:
+            released = [
+                number
+                for number, ticket in raffle.tickets.items()
+                if ticket.status == "reserved" and str(ticket.reservation_id) == reservation_id
+            ]
+            for number in released:
+                del raffle.tickets[number]
+        return len(released)
+
+    def draw(self, raffle_id: uuid.UUID, prizes: int) -> dict:
+        raffle = self._raffle(raffle_id)
+        with raffle.lock:
+            row = raffle.row
+            if row["status"] == "drawn" and row["winner_ticket_id"]:
+                if len(row["winners"]) != prizes:
+                    raise already_drawn(row["winners"])
+                return draw_out(raffle_id, row["winners"])
+            sold = sorted(
+                (ticket for ticket in raffle.tickets.values() if ticket.status == "sold"),
+                key=lambda ticket: ticket.number,
+            )
+            if not sold:
+                raise HTTPException(status_code=400, detail="No tickets sold")
+            if len(sold) < prizes:
+                raise HTTPException(
+                    status_code=400, detail="Not enough tickets sold for the requested prizes"
+                )
+            positions = _DRAW_RANDOM.sample(range(len(sold)), prizes)
+            winners = [
+                winner_out(
+                    sold[position].id,
+                    sold[position].participant_id,
+                    sold[position].number,
+                    prize_rank=rank,
+                )
+                for rank, position in enumerate(positions, start=1)
+            ]
+            row["status"] = "drawn"
+            row["winner_ticket_id"] = winners[0]["ticket_id"]
+            row["winners"] = winners
+            row["updated_at"] = _now()
+            return draw_out(raffle_id, winners)
+
+    def raffle_rows(self, status: Optional[str] = None) -> list[dict]:
+        now = _now()
+        with self._lock:
+            raffles = list(self._raffles.values())
+        rows = [
+            self._counts(raffle, now)
+            for raffle in raffles
+            if not status or raffle.row["status"] == status
+        ]
+        rows.sort(key=lambda row: row["created_at"], reverse=True)
+        return rows
+
+    def owner_raffle_rows(
+        self,
+        owner_id: uuid.UUID,
+        statuses: Optional[list[str]] = None,
+        after: Optional[tuple[datetime, uuid.UUID]] = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        now = _now()
+        with self._lock:
+            raffles = [
+                raffle
+                for raffle in self._raffles.values()
+                if raffle.row["owner_id"] == owner_id
+                and (not statuses or raffle.row["status"] in statuses)
+            ]
+        raffles.sort(key=lambda raffle: (raffle.row["created_at"], raffle.row["id"]), reverse=True)
+        if after is not None:
+            raffles = [
+                raffle for raffle in raffles if (raffle.row["created_at"], raffle.row["id"]) < after
+            ]
+        return [self._counts(raffle, now) for raffle in raffles[:limit]]
+
+    def raffle_row(self, raffle_id: uuid.UUID) -> Optional[dict]:
+        raffle = self._raffles.get(raffle_id)
+        return None if raffle is None else self._counts(raffle, _now())
+
+    def numbers_header(self, raffle_id: uuid.UUID) -> Optional[dict]:
+        raffle = self._raffles.get(raffle_id)
+        if raffle is None:
+            return None
+        with raffle.lock:
+            return {**raffle.row, "archived": False}
+
+    def number_rows(
+        self, raffle_id: uuid.UUID, start: int, end: int, archived: bool = False
+    ) -> list[dict]:
+        raffle = self._raffles.get(raffle_id)
+        if raffle is None:
+            return []
+        with raffle.lock:
+            if end - start < len(raffle.tickets):
+                tickets = [raffle.tickets.get(number) for number in range(start, end + 1)]
+                tickets = [ticket for ticket in tickets if ticket is not None]
+            else:
+                tickets = sorted(
+                    (ticket for number, ticket in raffle.tickets.items() if start <= number <= end),
+                    key=lambda ticket: ticket.number,
+                )
+            rows = [
+                {
+                    "number": ticket.number,
+                    "status": ticket.status,
+                    "reserved_until": ticket.reserved_until,
+                    "label": None,
+                }
+                for ticket in tickets
+            ]
+        return rows
+
+    def purchase_rows(self, participant_id: uuid.UUID) -> list[dict]:
+        with self._lock:
+            rows = [p for p in self._purchases if p["participant_id"] == participant_id]
+        return sorted(rows, key=lambda row: row["created_at"], reverse=True)
+
+    def sold_rows(self, raffle_id: uuid.UUID, archived: bool = False) -> Iterator[dict]:
+        raffle = self._raffles.get(raffle_id)
+        if raffle is None:
+            return
+        with raffle.lock:
+            padding = raffle.row["number_padding"]
+            sold = sorted(
+                (ticket for ticket in raffle.tickets.values() if ticket.status == "sold"),
+                key=lambda ticket: ticket.number,
+            )
+        with self._lock:
+            purchases = {
+                purchase["purchase_id"]: purchase
+                for purchase in self._purchases
+                if purchase["raffle_id"] == raffle_id
+            }
+        for ticket in sold:
+            person = self._people.get(ticket.participant_id)
+            purchase = purchases.get(ticket.purchase_id, {})
+            yield {
+                "number": ticket.number,
+                "label": str(ticket.number).zfill(padding) if padding else str(ticket.number),
+                "purchase_id": ticket.purchase_id,
+                "participant_id": ticket.participant_id,
+                "participant_name": person.name if person else None,
+                "participant_email": person.email if person else None,
+                "payment_method": purchase.get("payment_method"),
+                "purchased_at": purchase.get("created_at"),
+            }
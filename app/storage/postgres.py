@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Iterator, Mapping, Optional
+import uuid
+
+from fastapi import HTTPException
+
+from app.core.admission import raffle_writes
+from app.core.config import settings
+from app.cqrs.commands import idempotency
+from app.cqrs.commands.cart import (
+    cart_scope,
+    confirm_cart_in_transaction,
+    reserve_cart_in_transaction,
+)
+from app.cqrs.commands.participants import get_or_create_participant
+from app.cqrs.commands.raffles import (
+    apply_draw,
+    confirm_in_transaction,
+    raffle_out,
+    release_in_transaction,
+    reserve_in_transaction,
+    resolve_buyer,
+)
+from app.db.connection import (
+    fetch_all,
+    fetch_one,
+    iter_rows,
+    light_row,
+    run_transaction,
+    stream_rows,
+)
+from app.models.schemas import (
+    CartConfirmRequest,
+    CartReservationRequest,
+    PurchaseConfirmRequest,
+    RaffleCreateV2,
+    ReservationRequest,
+)
+from app.storage.base import RaffleStore
+
+_RAFFLE_READ_SQL = """
+    SELECT r.id, r.title, r.description, r.ticket_price, r.currency, r.total_tickets,
+           r.status, r.draw_at, r.winner_ticket_id, r.winners, r.number_start, r.number_end,
+           r.number_padding, r.owner_id, r.created_at, r.updated_at, r.tickets_sold,
+           res.reserved AS tickets_reserved
+    FROM raffles_read r
+    -- Live reservations expire on their own, so they're counted per raffle
+    -- (an index probe) instead of kept as a counter; sold is kept on the row.
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS reserved
+        FROM raffle_numbers_read n
+        WHERE n.raffle_id = r.id AND n.status = 'reserved' AND n.reserved_until > now()
+    ) res
+"""
+
+
+_SOLD_SQL = """
+    SELECT n.number, n.label, n.purchase_id, n.participant_id,
+           pa.name AS participant_name, pa.email AS participant_email,
+           pu.payment_method, pu.created_at AS purchased_at
+    FROM raffle_numbers_read n
+    LEFT JOIN participants pa ON pa.id = n.participant_id
+    LEFT JOIN purchases pu ON pu.id = n.purchase_id
+    WHERE n.raffle_id = %s AND n.status = 'sold'
+    ORDER BY n.number
+"""
+
+# Archived raffles keep the sold numbers as parallel arrays ordered by number.
+_ARCHIVED_SOLD_SQL = """
+    SELECT s.number,
+           CASE WHEN r.number_padding IS NULL THEN s.number::text
+                ELSE lpad(s.number::text, r.number_padding, '0') END AS label,
+           s.purchase_id, s.participant_id,
+           pa.name AS participant_name, pa.email AS participant_email,
+           pu.payment_method, pu.created_at AS purchased_at
+    FROM raffle_archives a
+    JOIN raffles_read r ON r.id = a.raffle_id
+    CROSS JOIN LATERAL unnest(a.sold_numbers, a.purchase_ids, a.participant_ids)
+        WITH ORDINALITY AS s(number, purchase_id, participant_id, position)
+    LEFT JOIN participants pa ON pa.id = s.participant_id
+    LEFT JOIN purchases pu ON pu.id = s.purchase_id
+    WHERE a.raffle_id = %s
+    ORDER BY s.position
+"""
+
+def _seed_raffle_numbers(
+    cur,
+    raffle_id: uuid.UUID,
+    number_start: int,
+    number_end: int,
+    number_padding: Optional[int],
+) -> None:
+    cur.execute(
+        """
+        INSERT INTO raffle_numbers_read (
+            raffle_id, number, status, reserved_until, reservation_id,
+            purchase_id, participant_id, label, updated_at
+        )
+        SELECT %s,
+               n,
+               'available',
+               NULL,
+               NULL,
+               NULL,
+               NULL,
+               CASE WHEN %s::int IS NULL THEN n::text ELSE lpad(n::text, %s::int, '0') END,
+               now()
+        FROM generate_series(%s::int, %s::int) AS n
+        """,
+        (raffle_id, number_padding, number_padding, number_start, number_end),
+    )
+
+
+class PostgresStore(RaffleStore):
+    def create_raffle(
+        self, payload: RaffleCreateV2, status: str, idempotency_key: Optional[str] = None
+    ) -> dict:
+        scope = idempotency.client_scope("create", payload.owner_id)
+        request_fingerprint = idempotency.fingerprint(payload)
+        replay = idempotency.lookup("create", scope, idempotency_key, request_fingerprint)
+        if replay is not None:
+            return replay
+
+        def _handler(conn):
+            cur = conn.cursor()
+            raffle_id = uuid.uuid4()
+            cur.execute(
+                """
+                INSERT INTO raffles (
+                    id, title, description, ticket_price, currency, total_tickets,
+                    status, draw_at, number_start, number_padding, owner_id
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id, title, description, ticket_price, currency, total_tickets,
+                          status, draw_at, winner_ticket_id, number_start, number_padding,
+                          owner_id, created_at, updated_at
+                """,
+                (
+                    raffle_id,
+                    payload.title,
+                    payload.description,
+                    payload.ticket_price,
+                    payload.currency.upper(),
+                    payload.total_tickets,
+                    status,
+                    payload.draw_at,
+                    payload.number_start,
+                    payload.number_padding,
+                    payload.owner_id,
+                ),
+            )
+            row = cur.fetchone()
+            number_start = 1 if row[9] is None else row[9]
+            total_tickets = row[5]
+            number_end = number_start + total_tickets - 1
+            number_padding = row[10]
+            cur.execute(
+                """
+                INSERT INTO raffles_read (
+                    id, title, description, ticket_price, currency, total_tickets,
+                    status, draw_at, winner_ticket_id, number_start, number_end,
+                    number_padding, owner_id, created_at, updated_at
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (
+                    row[0],
+                    row[1],
+                    row[2],
+                    row[3],
+                    row[4],
+                    row[5],
+                    row[6],
+                    row[7],
+                    row[8],
+                    number_start,
+                    number_end,
+                    number_padding,
+                    row[11],
+                    row[12],
+                    row[13],
+                ),
+            )
+            _seed_raffle_numbers(cur, raffle_id, number_start, number_end, number_padding)
+            cur.close()
+            return raffle_out(
+                {
+                    "id": row[0],
+                    "title": row[1],
+                    "description": row[2],
+                    "ticket_price": row[3],
+                    "currency": row[4],
+                    "total_tickets": row[5],
+                    "status": row[6],
+                    "draw_at": row[7],
+                    "winner_ticket_id": row[8],
+                    "number_start": number_start,
+                    "number_end": number_end,
+                    "number_padding": number_padding,
+                    "owner_id": row[11],
+                    "created_at": row[12],
+                    "updated_at": row[13],
+                }
+            )
+
+        return run_transaction(
+            idempotency.guard(_handler, "create", scope, idempotency_key, request_fingerprint),
+            operation="create",
+        )
+
+    def update_raffle(self, raffle_id: uuid.UUID, data: dict, editor_id: uuid.UUID) -> dict:
+        def _handler(conn):
+            cur = conn.cursor()
+            cur.execute("SELECT owner_id FROM raffles WHERE id = %s FOR UPDATE", (raffle_id,))
+            row = cur.fetchone()
+            if not row:
+                cur.close()
+                raise HTTPException(status_code=404, detail="Raffle not found")
+            owner_id = row[0]
+            if owner_id is None or owner_id != editor_id:
+                cur.close()
+                raise HTTPException(status_code=403, detail="Not allowed to edit this raffle")
+            if "status" in data:
+                cur.execute("SELECT 1 FROM raffle_archives WHERE raffle_id = %s", (raffle_id,))
+                if cur.fetchone():
+                    cur.close()
+                    raise HTTPException(
+                        status_code=409, detail="Archived raffles cannot change status"
+                    )
+
+            set_clauses = []
+            params: list = []
+            for field in ("title", "description", "draw_at", "status"):
+                if field in data:
+                    set_clauses.append(f"{field} = %s")
+                    params.append(data[field])
+            set_clauses.append("updated_at = now()")
+            params.append(raffle_id)
+            set_clause = ", ".join(set_clauses)
+            cur.execute(f"UPDATE raffles SET {set_clause} WHERE id = %s", params)
+            cur.execute(f"UPDATE raffles_read SET {set_clause} WHERE id = %s", params)
+
+            cur.execute(_RAFFLE_READ_SQL + " WHERE r.id = %s", (raffle_id,))
+            row = cur.fetchone()
+            if not row:
+                cur.close()
+                raise HTTPException(status_code=404, detail="Raffle not found")
+            columns = [col[0] for col in cur.description]
+            cur.close()
+            return raffle_out(dict(zip(columns, row)))
+
+        return run_transaction(_handler, operation="update")
+
+    def delete_raffle(self, raffle_id: uuid.UUID, editor_id: uuid.UUID) -> None:
+        def _handler(conn):
+            cur = conn.cursor()
+            cur.execute("SELECT owner_id FROM raffles WHERE id = %s FOR UPDATE", (raffle_id,))
+            row = cur.fetchone()
+            if not row:
+                cur.close()
+                raise HTTPException(status_code=404, detail="Raffle not found")
+            owner_id = row[0]
+            if owner_id is None or owner_id != editor_id:
+                cur.close()
+                raise HTTPException(status_code=403, detail="Not allowed to delete this raffle")
+
+            cur.execute("DELETE FROM purchases_read WHERE raffle_id = %s", (raffle_id,))
+            cur.execute("DELETE FROM raffle_numbers_read WHERE raffle_id = %s", (raffle_id,))
+            cur.execute("DELETE FROM raffles_read WHERE id = %s", (raffle_id,))
+            cur.execute("DELETE FROM raffles WHERE id = %s", (raffle_id,))
+            cur.close()
+
+        run_transaction(_handler, operation="delete")
+
+    def reserve(
+        self,
+        raffle_id: uuid.UUID,
+        payload: ReservationRequest,
+        ttl_minutes: int,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        scope = f"reserve:{raffle_id}"
+        request_fingerprint = idempotency.fingerprint(payload)
+        replay = idempotency.lookup("reserve", scope, idempotency_key, request_fingerprint)
+        if replay is not None:
+            return replay
+
+        def _handler(conn):
+            participant_id = get_or_create_participant(conn, payload.participant)
+            return reserve_in_transaction(
+                conn, raffle_id, payload.numbers, ttl_minutes, participant_id, payload.count
+            )
+
+        with raffle_writes.admit(raffle_id, "reserve"):
+            return run_transaction(
+                idempotency.guard(_handler, "reserve", scope, idempotency_key, request_fingerprint),
+                operation="reserve",
+            )
+
+    def confirm(
+        self,
+        raffle_id: uuid.UUID,
+        payload: PurchaseConfirmRequest,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        scope = f"confirm:{raffle_id}"
+        request_fingerprint = idempotency.fingerprint(payload)
+        replay = idempotency.lookup("confirm", scope, idempotency_key, request_fingerprint)
+        if replay is not None:
+            return replay
+
+        def _handler(conn):
+            participant_id = resolve_buyer(conn, payload.participant_id, payload.participant)
+            return confirm_in_transaction(
+                conn, raffle_id, payload.reservation_id, participant_id, payload.payment_method
+            )
+
+        with raffle_writes.admit(raffle_id, "confirm"):
+            return run_transaction(
+                idempotency.guard(_handler, "confirm", scope, idempotency_key, request_fingerprint),
+                operation="confirm",
+            )
+
+    def _cart(self, operation: str, scope: str, payload, handler, idempotency_key) -> dict:
+        request_fingerprint = idempotency.fingerprint(payload)
+        replay = idempotency.lookup(operation, scope, idempotency_key, request_fingerprint)
+        if replay is not None:
+            return replay
+        # Admitted in raffle_id order, the same order the rows are locked in.
+        with ExitStack() as stack:
+            for raffle_id in sorted(item.raffle_id for item in payload.items):
+                stack.enter_context(raffle_writes.admit(raffle_id, operation))
+            return run_transaction(
+                idempotency.guard(handler, operation, scope, idempotency_key, request_fingerprint),
+                operation=operation,
+            )
+
+    def reserve_cart(
+        self,
+        payload: CartReservationRequest,
+        ttl_minutes: int,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        return self._cart(
+            "cart_reserve",
+            cart_scope("cart_reserve", None, payload.participant),
+            payload,
+            lambda conn: reserve_cart_in_transaction(conn, payload, ttl_minutes),
+            idempotency_key,
+        )
+
+    def confirm_cart(
+        self, payload: CartConfirmRequest, idempotency_key: Optional[str] = None
+    ) -> dict:
+        return self._cart(
+            "cart_confirm",
+            cart_scope("cart_confirm", payload.participant_id, payload.participant),
+            payload,
+            lambda conn: confirm_cart_in_transaction(conn, payload),
+            idempotency_key,
+        )
+
+    def release(self, raffle_id: uuid.UUID, reservation_id: str) -> int:
+        return run_transaction(
+            lambda conn: release_in_transaction(conn, raffle_id, reservation_id),
+            operation="release",
+        )
+
+    def draw(self, raffle_id: uuid.UUID, prizes: int) -> dict:
+        return run_transaction(lambda conn: apply_draw(conn, raffle_id, prizes), operation="draw")
+
+    def raffle_rows(self, status: Optional[str] = None) -> list[Mapping]:
+        sql = _RAFFLE_READ_SQL
+        params: tuple = ()
+        if status:
+            sql += " WHERE r.status = %s"
+            params = (status,)
+        sql += " ORDER BY r.created_at DESC"
+        return fetch_all(sql, params, row_factory=light_row)
+
+    def owner_raffle_rows(
+        self,
+        owner_id: uuid.UUID,
+        statuses: Optional[list[str]] = None,
+        after: Optional[tuple[datetime, uuid.UUID]] = None,
+        limit: int = 20,
+    ) -> list[Mapping]:
+        # Walks raffles_read_owner_created_idx newest first; the cursor is the
+        # (created_at, id) of the last row already returned.
+        sql = _RAFFLE_READ_SQL + " WHERE r.owner_id = %s"
+        params: list = [owner_id]
+        if statuses:
+            sql += " AND r.status = ANY(%s)"
+            params.append(list(statuses))
+        if after is not None:
+            sql += " AND (r.created_at, r.id) < (%s, %s)"
+            params.extend(after)
+        sql += " ORDER BY r.created_at DESC, r.id DESC LIMIT %s"
+        params.append(limit)
+        return fetch_all(sql, tuple(params), row_factory=light_row)
+
+    def raffle_row(self, raffle_id: uuid.UUID) -> Optional[dict]:
+        return fetch_one(_RAFFLE_READ_SQL + " WHERE r.id = %s", (raffle_id,))
+
+    def numbers_header(self, raffle_id: uuid.UUID) -> Optional[dict]:
+        return fetch_one(
+            """
+            SELECT r.id, r.total_tickets, r.number_start, r.number_end, r.number_padding, r.status,
+                   r.owner_id, a.raffle_id IS NOT NULL AS archived
+            FROM raffles_read r
+            LEFT JOIN raffle_archives a ON a.raffle_id = r.id
+            WHERE r.id = %s
+            """,
+            (raffle_id,),
+        )
+
+    def number_rows(
+        self, raffle_id: uuid.UUID, start: int, end: int, archived: bool = False
+    ) -> list[Mapping]:
+        if archived:
+            # Drawn and archived: only the sold numbers survive, as an array.
+            sql = """
+                SELECT n AS number, 'sold' AS status,
+                       NULL::timestamptz AS reserved_until, NULL::text AS label
+                FROM raffle_archives a
+                CROSS JOIN LATERAL unnest(a.sold_numbers) AS n
+                WHERE a.raffle_id = %s AND n BETWEEN %s AND %s
+            """
+        else:
+            sql = """
+                SELECT number, status, reserved_until, label
+                FROM raffle_numbers_read
+                WHERE raffle_id = %s AND number BETWEEN %s AND %s
+                ORDER BY number ASC
+            """
+        params = (raffle_id, start, end)
+        # Pages that fit in one batch skip the cursor's extra round trips.
+        if end - start < settings.stream_batch_size:
+            return fetch_all(sql, params, row_factory=light_row)
+        # Whole grids (up to 100k numbers) are fetched in batches of light rows
+        # instead of one pg8000 buffer, and the cursor's transaction ends here.
+        with iter_rows(sql, params, row_factory=light_row) as rows:
+            return list(rows)
+
+    def purchase_rows(self, participant_id: uuid.UUID) -> list[dict]:
+        return fetch_all(
+            """
+            SELECT purchase_id, raffle_id, participant_id, raffle_title, raffle_status,
+                   numbers, total_price, currency, status, payment_method, created_at
+            FROM purchases_read
+            WHERE participant_id = %s
+            ORDER BY created_at DESC
+            """,
+            (participant_id,),
+        )
+
+    def sold_rows(self, raffle_id: uuid.UUID, archived: bool = False) -> Iterator[dict]:
+        return stream_rows(_ARCHIVED_SOLD_SQL if archived else _SOLD_SQL, (raffle_id,))
@@ -0,0 +1 @@
+"""Local benchmarks for RifaApp hot paths."""
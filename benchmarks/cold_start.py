@@ -0,0 +1,132 @@
+"""Cold-start profile: import time per module and first-request latency.
+
+Each measurement runs in a fresh interpreter so nothing is cached:
+
+    python -m benchmarks.cold_start --top 25
+    python -m benchmarks.cold_start --json > cold_start.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+MODULE = "app.main"
+
+
+def _api_gateway_event(path: str) -> dict:
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": "GET",
+        "headers": {"host": "localhost", "accept": "application/json"},
+        "multiValueHeaders": {"host": ["localhost"], "accept": ["application/json"]},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "requestContext": {
+            "resourcePath": "/{proxy+}",
+            "httpMethod": "GET",
+            "path": path,
+            "stage": "local",
+            "identity": {"sourceIp": "127.0.0.1"},
+        },
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+
+def _child(path: str) -> None:
+    started = time.perf_counter()
+    import app.main as main
+
+    imported = time.perf_counter()
+    main.handler({"warmup": True}, None)
+    warmed = time.perf_counter()
+    first = main.handler(_api_gateway_event(path), None)
+    first_done = time.perf_counter()
+    main.handler(_api_gateway_event(path), None)
+    second_done = time.perf_counter()
+    print(
+        json.dumps(
+            {
+                "import_ms": round((imported - started) * 1000, 2),
+                "warmup_event_ms": round((warmed - imported) * 1000, 3),
+                "first_request_ms": round((first_done - warmed) * 1000, 2),
+                "second_request_ms": round((second_done - first_done) * 1000, 2),
+                "first_status": first.get("statusCode"),
+            }
+        )
+    )
+
+
+def _import_times() -> list[dict]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--path", default="/rifaapp/health")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.path)
+        return 0
+
+    modules = _import_times()
+    top_level = [item for item in modules if item["module"] == MODULE]
+    slowest = sorted(modules, key=lambda item: item["cumulative_ms"], reverse=True)[: args.top]
+    first_request = json.loads(
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child", "--path", args.path],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip().splitlines()[-1]
+    )
+    report = {
+        "total_import_ms": top_level[0]["cumulative_ms"] if top_level else None,
+        "first_request": first_request,
+        "slowest_imports": slowest,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{MODULE} import: {report['total_import_ms']:.1f} ms")
+    for key, value in first_request.items():
+        print(f"{key}: {value}")
+    print()
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for item in slowest:
+        indent = "  " * item["depth"]
+        print(f"{item['cumulative_ms']:>14.1f} {item['self_ms']:>9.1f}  {indent}{item['module']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Bytes saved and CPU cost of gzip per endpoint payload and level.
+
+Payloads are generated with the same shapes the read endpoints return and are
+encoded with the production serializer before compressing:
+
+    python -m benchmarks.compression --levels 1,5,9
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+from decimal import Decimal
+import gzip
+import json
+import statistics
+import time
+import uuid
+
+from app.api.serialization import dumps
+from benchmarks.serialization import _grid
+
+
+def _catalog(size: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Rifa {index}",
+            "description": "Gran rifa de fin de año con premios para toda la familia",
+            "ticket_price": Decimal("5000.00"),
+            "currency": "COP",
+            "total_tickets": 1000,
+            "tickets_sold": index * 3,
+            "tickets_reserved": index % 5,
+            "status": "open",
+            "draw_at": now,
+            "winner_ticket_id": None,
+            "winners": [],
+            "number_start": 1,
+            "number_end": 1000,
+            "number_padding": 4,
+            "owner_id": str(uuid.uuid4()),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index in range(size)
+    ]
+
+
+def _payloads() -> dict[str, bytes]:
+    page = _grid(500)
+    return {
+        "GET /v2/raffles/{id}/numbers (100k)": dumps(_grid(100_000)),
+        "GET /v2/raffles/{id}/numbers?limit=500": dumps(page),
+        "GET /v2/raffles (200 raffles)": dumps(_catalog(200)),
+        "GET /v2/raffles/{id}": dumps(_catalog(1)[0]),
+        "GET /health": dumps({"status": "ok", "time": datetime.now(timezone.utc)}),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="1,5,9")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-size", type=int, default=1024)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+
+    report = []
+    for name, body in _payloads().items():
+        entry = {"endpoint": name, "bytes": len(body)}
+        if len(body) < args.min_size:
+            entry["skipped"] = f"below COMPRESSION_MIN_SIZE ({args.min_size})"
+            report.append(entry)
+            continue
+        for level in levels:
+            timings = []
+            compressed = b""
+            for _ in range(args.repeat):
+                started = time.process_time()
+                compressed = gzip.compress(body, level, mtime=0)
+                timings.append(time.process_time() - started)
+            entry[f"level_{level}"] = {
+                "bytes": len(compressed),
+                "saved_pct": round(100 * (1 - len(compressed) / len(body)), 1),
+                "cpu_ms": round(statistics.median(timings) * 1000, 2),
+            }
+        report.append(entry)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
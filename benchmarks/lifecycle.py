@@ -0,0 +1,342 @@
+"""Raffle lifecycle load test through the ASGI app against a local Postgres.
+
+Seeds raffles through the API, then runs catalog browsing, grid polling and
+contended reservations on one hot raffle concurrently, followed by
+confirmations and draws. Reports throughput and p50/p95/p99 latency per
+endpoint, checks sales invariants against the database and compares with a
+saved baseline:
+
+    DB_HOST=localhost DB_NAME=rifaapp ... python -m benchmarks.lifecycle \\
+        --output bench.json [--baseline previous.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import logging
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+from app.core.config import db_configured
+from app.db.connection import fetch_all
+from app.main import app
+from benchmarks.stats import percentiles
+
+API = "/rifaapp/v2"
+
+
+@dataclass
+class Recorder:
+    samples: dict[str, dict[int, list[float]]] = field(default_factory=dict)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.samples.setdefault(name, {}).setdefault(response.status_code, []).append(elapsed)
+        return response
+
+    def report(self, wall_seconds: float) -> dict:
+        endpoints = {}
+        for name, by_status in sorted(self.samples.items()):
+            total = sum(len(values) for values in by_status.values())
+            ok = [value for status, values in by_status.items() if status < 300 for value in values]
+            endpoints[name] = {
+                "requests": total,
+                "throughput_rps": round(total / wall_seconds, 1) if wall_seconds else None,
+                "statuses": {
+                    str(status): len(values) for status, values in sorted(by_status.items())
+                },
+                **percentiles(ok),
+            }
+        return endpoints
+
+
+@dataclass
+class Sales:
+    reservations: list[dict] = field(default_factory=list)
+    confirmed: dict[str, list[int]] = field(default_factory=dict)
+    retries: int = 0
+
+
+async def _seed(client, recorder: Recorder, raffles: int, tickets: int) -> list[str]:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    ids = []
+    for index in range(raffles):
+        response = await recorder.request(
+            client,
+            "POST /v2/raffles",
+            "POST",
+            f"{API}/raffles",
+            json={
+                "title": f"bench-{stamp}-{index}",
+                "ticket_price": "1000",
+                "total_tickets": tickets,
+                "number_padding": len(str(tickets)),
+            },
+        )
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def _browse(client, recorder: Recorder, raffle_ids: list[str], requests: int) -> None:
+    for _ in range(requests):
+        if random.random() < 0.3:
+            await recorder.request(client, "GET /v2/raffles", "GET", f"{API}/raffles")
+        else:
+            raffle_id = random.choice(raffle_ids)
+            await recorder.request(
+                client, "GET /v2/raffles/{id}", "GET", f"{API}/raffles/{raffle_id}"
+            )
+
+
+async def _poll_grid(
+    client,
+    recorder: Recorder,
+    raffle_id: str,
+    polls: int,
+    tickets: int,
+    page: int,
+) -> None:
+    for _ in range(polls):
+        offset = random.randrange(0, max(1, tickets - page + 1))
+        await recorder.request(
+            client,
+            "GET /v2/raffles/{id}/numbers",
+            "GET",
+            f"{API}/raffles/{raffle_id}/numbers",
+            params={"offset": offset, "limit": page},
+        )
+
+
+async def _buy(
+    client,
+    recorder: Recorder,
+    sales: Sales,
+    buyer: int,
+    raffle_id: str,
+    hot_range: int,
+    quick_pick_ratio: float,
+) -> None:
+    participant = {"name": f"Buyer {buyer}", "email": f"buyer{buyer}@bench.example.com"}
+    for attempt in range(3):
+        if attempt:
+            sales.retries += 1
+        body: dict = {"participant": participant, "ttl_minutes": 10}
+        if random.random() < quick_pick_ratio:
+            body["count"] = random.randint(1, 5)
+        else:
+            body["numbers"] = random.sample(range(1, hot_range + 1), random.randint(1, 5))
+        response = await recorder.request(
+            client,
+            "POST /v2/raffles/{id}/reservations",
+            "POST",
+            f"{API}/raffles/{raffle_id}/reservations",
+            json=body,
+        )
+        if response.status_code == 201:
+            sales.reservations.append(response.json())
+            return
+
+
+async def _confirm(client, recorder: Recorder, sales: Sales, reservation: dict) -> None:
+    response = await recorder.request(
+        client,
+        "POST /v2/raffles/{id}/confirm",
+        "POST",
+        f"{API}/raffles/{reservation['raffle_id']}/confirm",
+        json={
+            "reservation_id": reservation["reservation_id"],
+            "participant_id": reservation["participant_id"],
+        },
+    )
+    if response.status_code == 200:
+        purchase = response.json()
+        sales.confirmed.setdefault(purchase["raffle_id"], []).extend(purchase["numbers"])
+
+
+async def _gather_limited(coroutines, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(coroutine):
+        async with semaphore:
+            await coroutine
+
+    await asyncio.gather(*(_run(coroutine) for coroutine in coroutines))
+
+
+def _check_invariants(raffle_ids: list[str], sales: Sales, api_sold: dict, winners: dict) -> dict:
+    failures: list[str] = []
+    duplicates = fetch_all(
+        """
+        SELECT raffle_id, number, COUNT(*) AS copies
+        FROM tickets
+        WHERE raffle_id = ANY(%s::uuid[])
+        GROUP BY raffle_id, number
+        HAVING COUNT(*) > 1
+        """,
+        (raffle_ids,),
+    )
+    if duplicates:
+        failures.append(f"{len(duplicates)} numbers have more than one ticket")
+    rows = fetch_all(
+        """
+        SELECT r.id,
+               (SELECT COUNT(*) FROM tickets t
+                WHERE t.raffle_id = r.id AND t.status IN ('paid', 'sold')) AS tickets_sold,
+               (SELECT COUNT(*) FROM raffle_numbers_read n
+                WHERE n.raffle_id = r.id AND n.status = 'sold') AS read_model_sold,
+               (SELECT COALESCE(SUM(cardinality(p.numbers)), 0) FROM purchases_read p
+                WHERE p.raffle_id = r.id) AS purchased_numbers
+        FROM raffles r
+        WHERE r.id = ANY(%s::uuid[])
+        """,
+        (raffle_ids,),
+    )
+    for row in rows:
+        raffle_id = str(row["id"])
+        confirmed = sales.confirmed.get(raffle_id, [])
+        if len(confirmed) != len(set(confirmed)):
+            failures.append(f"{raffle_id}: a number was confirmed to two purchases")
+        counts = {
+            "tickets": row["tickets_sold"],
+            "read_model": row["read_model_sold"],
+            "purchases_read": row["purchased_numbers"],
+            "client": len(confirmed),
+            "api": api_sold.get(raffle_id),
+        }
+        if len(set(counts.values())) != 1:
+            failures.append(f"{raffle_id}: sold counts disagree {counts}")
+        for winner in winners.get(raffle_id, []):
+            if winner["number"] not in confirmed:
+                failures.append(f"{raffle_id}: winner {winner['number']} was never sold")
+    return {"ok": not failures, "failures": failures}
+
+
+def _compare(current: dict, baseline: dict, max_regression: float) -> dict:
+    regressions = {}
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if not before or not before.get("p95_ms") or not stats.get("p95_ms"):
+            continue
+        ratio = stats["p95_ms"] / before["p95_ms"]
+        if ratio > 1 + max_regression:
+            regressions[name] = {
+                "baseline_p95_ms": before["p95_ms"],
+                "p95_ms": stats["p95_ms"],
+                "ratio": round(ratio, 2),
+            }
+    return {"max_regression": max_regression, "regressions": regressions}
+
+
+async def _run(args) -> dict:
+    recorder = Recorder()
+    sales = Sales()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        raffle_ids = await _seed(client, recorder, args.raffles, args.tickets)
+        hot_raffle = raffle_ids[0]
+        started = time.perf_counter()
+
+        buyers = []
+        for buyer in range(args.buyers):
+            raffle_id = hot_raffle if random.random() < 0.8 else random.choice(raffle_ids)
+            buyers.append(
+                _buy(client, recorder, sales, buyer, raffle_id, args.hot_range, args.quick_pick_ratio)
+            )
+        pollers = [
+            _poll_grid(client, recorder, hot_raffle, args.polls, args.tickets, args.page_size)
+            for _ in range(args.pollers)
+        ]
+        browsers = [_browse(client, recorder, raffle_ids, args.browse) for _ in range(args.browsers)]
+        await _gather_limited([*buyers, *pollers, *browsers], args.concurrency)
+
+        to_confirm = [r for r in sales.reservations if random.random() < args.confirm_ratio]
+        await _gather_limited(
+            [_confirm(client, recorder, sales, reservation) for reservation in to_confirm],
+            args.concurrency,
+        )
+
+        winners: dict[str, list] = {}
+        for raffle_id in raffle_ids:
+            if not sales.confirmed.get(raffle_id):
+                continue
+            prizes = min(3, len(sales.confirmed[raffle_id]))
+            response = await recorder.request(
+                client,
+                "POST /v2/raffles/{id}/draw",
+                "POST",
+                f"{API}/raffles/{raffle_id}/draw",
+                params={"prizes": prizes},
+            )
+            if response.status_code == 200:
+                winners[raffle_id] = response.json()["winners"]
+        wall = time.perf_counter() - started
+
+        api_sold = {}
+        for raffle_id in raffle_ids:
+            response = await client.get(f"{API}/raffles/{raffle_id}")
+            api_sold[raffle_id] = response.json()["tickets_sold"]
+
+    return {
+        "config": vars(args),
+        "wall_seconds": round(wall, 3),
+        "reservations": len(sales.reservations),
+        "reservation_retries": sales.retries,
+        "numbers_sold": sum(len(numbers) for numbers in sales.confirmed.values()),
+        "endpoints": recorder.report(wall),
+        "invariants": _check_invariants(raffle_ids, sales, api_sold, winners),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raffles", type=int, default=5)
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--buyers", type=int, default=300)
+    parser.add_argument("--hot-range", type=int, default=200, help="Numbers buyers fight over")
+    parser.add_argument("--quick-pick-ratio", type=float, default=0.3)
+    parser.add_argument("--confirm-ratio", type=float, default=0.8)
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--browsers", type=int, default=10)
+    parser.add_argument("--browse", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare p95 latency with")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if not db_configured():
+        parser.error("DB_HOST, DB_NAME, DB_USER and DB_PASSWORD must point at a local Postgres")
+    if args.seed is not None:
+        random.seed(args.seed)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(_run(args))
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        report["comparison"] = _compare(
+            report["endpoints"], baseline.get("endpoints", {}), args.max_regression
+        )
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
+    failed = not report["invariants"]["ok"] or bool(report.get("comparison", {}).get("regressions"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
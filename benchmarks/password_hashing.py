@@ -0,0 +1,134 @@
+"""Mixed login + raffle-read traffic against the ASGI app.
+
+Compares inline PBKDF2 hashing (the historical behavior) with the bounded
+hashing executor. Database access is replaced with canned rows plus a small
+simulated I/O delay so only the hashing contention is measured:
+
+    python -m benchmarks.password_hashing --logins 200 --reads 2000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import secrets
+import time
+import uuid
+from dataclasses import replace
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import httpx
+
+import app.api.dependencies as dependencies
+import app.core.security as security
+import app.cqrs.queries.auth as auth_queries
+import app.cqrs.queries.raffles as raffle_queries
+from app.main import app
+from benchmarks.stats import percentiles
+
+READ_IO_SECONDS = 0.002
+
+
+def _install_fake_db() -> str:
+    salt = secrets.token_bytes(16)
+    password = "benchmark-password"
+    now = datetime.now(timezone.utc)
+    user_row = {
+        "id": uuid.uuid4(),
+        "name": "Bench User",
+        "email": "bench@example.com",
+        "password_hash": security.hash_password(password, salt),
+        "password_salt": salt.hex(),
+        "created_at": now,
+    }
+    raffle_id = uuid.uuid4()
+    raffle_row = {
+        "id": raffle_id,
+        "title": "Benchmark raffle",
+        "description": None,
+        "ticket_price": Decimal("1000.00"),
+        "currency": "COP",
+        "total_tickets": 1000,
+        "tickets_sold": 10,
+        "tickets_reserved": 2,
+        "status": "open",
+        "draw_at": None,
+        "winner_ticket_id": None,
+        "winners": [],
+        "number_start": 1,
+        "number_end": 1000,
+        "number_padding": None,
+        "owner_id": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+    def fake_user(sql, params=()):
+        time.sleep(READ_IO_SECONDS)
+        return dict(user_row)
+
+    def fake_raffle(sql, params=()):
+        time.sleep(READ_IO_SECONDS)
+        return dict(raffle_row)
+
+    dependencies.db_configured = lambda: True
+    auth_queries.fetch_one = fake_user
+    raffle_queries.fetch_one = fake_raffle
+    return f"/rifaapp/v2/raffles/{raffle_id}"
+
+
+async def _timed(client: httpx.AsyncClient, method: str, url: str, sink: dict, **kwargs) -> None:
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - started
+    sink.setdefault(response.status_code, []).append(elapsed)
+
+
+async def _run_mix(raffle_url: str, logins: int, reads: int) -> dict:
+    login_results: dict = {}
+    read_results: dict = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tasks = []
+        body = {"email": "bench@example.com", "password": "benchmark-password"}
+        for index in range(max(logins, reads)):
+            if index < logins:
+                tasks.append(_timed(client, "POST", "/rifaapp/auth/login", login_results, json=body))
+            if index < reads:
+                tasks.append(_timed(client, "GET", raffle_url, read_results))
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - started
+    return {
+        "wall_seconds": round(wall, 3),
+        "login_ok": percentiles(login_results.get(200, [])),
+        "login_rejected_503": len(login_results.get(503, [])),
+        "raffle_read_ok": percentiles(read_results.get(200, [])),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    raffle_url = _install_fake_db()
+    base_settings = security.settings
+    report = {}
+    for mode in [item.strip() for item in args.modes.split(",") if item.strip()]:
+        security.shutdown_hasher()
+        security.settings = replace(base_settings, password_hash_executor=mode)
+        report[mode] = asyncio.run(_run_mix(raffle_url, args.logins, args.reads))
+    security.shutdown_hasher()
+    security.settings = base_settings
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
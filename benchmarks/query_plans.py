@@ -0,0 +1,659 @@
+"""Query-plan regression harness for the SQL behind the raffle endpoints.
+
+Seeds a realistically sized dataset into a local Postgres (once; rows are
+tagged ``plan-seed``), then drives the real read and write paths (the
+Postgres store, carts, exports, idempotency keys, auth, the draw scheduler
+and archival) inside a transaction that is rolled back at the end. Every
+statement they issue is first run under ``EXPLAIN (ANALYZE, BUFFERS, FORMAT
+JSON)`` in a savepoint. Plans are written to ``--output-dir`` and the run
+fails when a statement scans a large table sequentially, sorts by random()
+or exceeds its time or buffer budget:
+
+    DB_HOST=localhost DB_NAME=rifaapp ... python -m benchmarks.query_plans \\
+        --output-dir plans [--baseline plans-main] [--reseed]
+"""
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import re
+import sys
+from typing import Iterator
+import uuid
+
+from app.core.config import db_configured
+from app.cqrs.commands import archive, auto_draw, idempotency
+from app.cqrs.commands import auth as auth_commands
+from app.cqrs.commands.cart import confirm_cart_in_transaction, reserve_cart_in_transaction
+from app.cqrs.commands.participants import get_or_create_participant
+from app.cqrs.commands.raffles import (
+    apply_draw,
+    confirm_in_transaction,
+    release_in_transaction,
+    reserve_in_transaction,
+)
+from app.cqrs.queries import auth as auth_queries
+from app.db.connection import dict_row, run_transaction
+from app.models.schemas import (
+    CartConfirmRequest,
+    CartReservationRequest,
+    ParticipantCreate,
+    UserLogin,
+    UserRegister,
+)
+from app.storage import postgres
+
+SEED_TAG = "plan-seed"
+# Tables that grow with tickets sold; a sequential scan over any of them on
+# the request path is a regression regardless of how fast it is today.
+LARGE_TABLES = frozenset(
+    (
+        "raffle_numbers_read",
+        "tickets",
+        "purchases",
+        "purchases_read",
+        "participants",
+        "raffle_winners",
+        "idempotency_keys",
+    )
+)
+ANALYZED_TABLES = (
+    "participants",
+    "raffles",
+    "raffles_read",
+    "raffle_numbers_read",
+    "tickets",
+    "purchases",
+    "purchases_read",
+)
+_PARTITION_SUFFIX = re.compile(r"_p\d+$")
+_EXPLAINED = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "(")
+# Modules whose connection helpers are pointed at the explaining transaction
+# while the paths run, and the helpers that are swapped.
+_ROUTED_MODULES = (postgres, archive, auto_draw, idempotency, auth_commands, auth_queries)
+_ROUTED_HELPERS = ("fetch_all", "fetch_one", "iter_rows", "stream_rows", "run_transaction")
+
+
+@dataclass(frozen=True)
+class Budget:
+    max_ms: float
+    max_buffers: int
+
+
+DEFAULT_BUDGET = Budget(max_ms=25.0, max_buffers=1000)
+# The catalog touches every raffle, but must not touch every number.
+BUDGETS = {
+    "list_raffles": Budget(max_ms=100.0, max_buffers=5000),
+    "list_raffles_open": Budget(max_ms=100.0, max_buffers=5000),
+}
+
+
+def plan_nodes(plan) -> Iterator[dict]:
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if "Node Type" in node:
+                yield node
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+
+
+def plan_shape(plan) -> list[str]:
+    return sorted(
+        f"{node['Node Type']}:{node.get('Index Name') or node.get('Relation Name') or ''}"
+        for node in plan_nodes(plan)
+    )
+
+
+def check_plan(plan: list, budget: Budget) -> list[str]:
+    failures = []
+    for node in plan_nodes(plan):
+        relation = _PARTITION_SUFFIX.sub("", node.get("Relation Name", ""))
+        if node["Node Type"] == "Seq Scan" and relation in LARGE_TABLES:
+            failures.append(f"seq scan on {node['Relation Name']}")
+        sort_keys = node.get("Sort Key", ())
+        if node["Node Type"] == "Sort" and any("random()" in key for key in sort_keys):
+            failures.append("sort by random()")
+    top = plan[0]
+    buffers = top["Plan"].get("Shared Hit Blocks", 0) + top["Plan"].get("Shared Read Blocks", 0)
+    if buffers > budget.max_buffers:
+        failures.append(f"{buffers} buffers > {budget.max_buffers}")
+    if top["Execution Time"] > budget.max_ms:
+        failures.append(f"{top['Execution Time']:.1f} ms > {budget.max_ms} ms")
+    return failures
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.label = ""
+        self.statements: dict[str, dict] = {}
+        self._counts: dict[str, int] = {}
+
+    def record(self, sql: str, plan: list) -> None:
+        index = self._counts.get(self.label, 0)
+        self._counts[self.label] = index + 1
+        name = self.label if index == 0 else f"{self.label}.{index}"
+        budget = BUDGETS.get(name, DEFAULT_BUDGET)
+        top = plan[0]
+        self.statements[name] = {
+            "sql": " ".join(sql.split()),
+            "execution_ms": round(top["Execution Time"], 3),
+            "buffers": top["Plan"].get("Shared Hit Blocks", 0)
+            + top["Plan"].get("Shared Read Blocks", 0),
+            "budget": vars(budget),
+            "failures": check_plan(plan, budget),
+            "plan": plan,
+        }
+
+
+class _ExplainingCursor:
+    def __init__(self, cursor, recorder: _Recorder) -> None:
+        self._cursor = cursor
+        self._recorder = recorder
+
+    def execute(self, sql, params=()):
+        if sql.lstrip().upper().startswith(_EXPLAINED):
+            # ANALYZE really runs the statement: undo it so the real execute
+            # below sees the same state and returns its rows to the caller.
+            self._cursor.execute("SAVEPOINT plan_probe")
+            self._cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+            plan = self._cursor.fetchone()[0]
+            self._cursor.execute("ROLLBACK TO SAVEPOINT plan_probe")
+            self._recorder.record(sql, json.loads(plan) if isinstance(plan, str) else plan)
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _ExplainingConnection:
+    def __init__(self, conn, recorder: _Recorder) -> None:
+        self._conn = conn
+        self._recorder = recorder
+
+    def cursor(self):
+        return _ExplainingCursor(self._conn.cursor(), self._recorder)
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def _routed(explaining: _ExplainingConnection) -> Iterator[None]:
+    """Run the module-level DB helpers on ``explaining`` instead of their own
+    connections (the thread's autocommit one, a dedicated streaming one, a new
+    transaction), so every path sees the same rolled-back transaction."""
+
+    def _fetch_all(sql, params=(), row_factory=dict_row):
+        cur = explaining.cursor()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        make_row = row_factory(tuple(col[0] for col in cur.description))
+        cur.close()
+        return [make_row(row) for row in rows]
+
+    def _fetch_one(sql, params=()):
+        rows = _fetch_all(sql, params)
+        return rows[0] if rows else None
+
+    @contextmanager
+    def _iter_rows(sql, params=(), batch_size=None, row_factory=dict_row):
+        yield iter(_fetch_all(sql, params, row_factory))
+
+    def _stream_rows(sql, params=(), batch_size=None, row_factory=dict_row):
+        yield from _fetch_all(sql, params, row_factory)
+
+    def _run_transaction(handler, operation="transaction"):
+        return handler(explaining)
+
+    helpers = {
+        "fetch_all": _fetch_all,
+        "fetch_one": _fetch_one,
+        "iter_rows": _iter_rows,
+        "stream_rows": _stream_rows,
+        "run_transaction": _run_transaction,
+    }
+    originals = [
+        (module, name, getattr(module, name))
+        for module in _ROUTED_MODULES
+        for name in _ROUTED_HELPERS
+        if hasattr(module, name)
+    ]
+    for module, name, _ in originals:
+        setattr(module, name, helpers[name])
+    try:
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+
+def _seed(
+    raffles: int,
+    tickets: int,
+    buyers: int,
+    owners: int,
+    sold_ratio: float,
+    reserved_ratio: float,
+) -> None:
+    like = f"{SEED_TAG}-%"
+    statements = [
+        (
+            """
+            INSERT INTO users (id, name, email, password_hash, password_salt)
+            SELECT gen_random_uuid(), 'Plan owner ' || i, %s || '-owner-' || i || '@example.com',
+                   'x', 'x'
+            FROM generate_series(1, %s) AS i
+            ON CONFLICT (email) DO NOTHING
+            """,
+            (SEED_TAG, owners),
+        ),
+        (
+            """
+            INSERT INTO participants (id, name, email)
+            SELECT gen_random_uuid(), 'Plan buyer ' || i, %s || '-' || i || '@example.com'
+            FROM generate_series(1, %s) AS i
+            ON CONFLICT (email) DO NOTHING
+            """,
+            (SEED_TAG, buyers),
+        ),
+        (
+            """
+            WITH owners AS (
+                SELECT array_agg(id) AS ids FROM users WHERE email LIKE %s
+            )
+            INSERT INTO raffles (
+                id, title, ticket_price, currency, total_tickets, status,
+                number_start, number_padding, owner_id, created_at, updated_at
+            )
+            SELECT gen_random_uuid(), %s || '-' || i, 1000, 'COP', %s, 'open', 1, %s,
+                   o.ids[1 + i %% cardinality(o.ids)], now() - i * interval '1 hour', now()
+            FROM generate_series(1, %s) AS i
+            CROSS JOIN owners o
+            """,
+            (f"{SEED_TAG}-owner-%", SEED_TAG, tickets, len(str(tickets)), raffles),
+        ),
+        (
+            """
+            INSERT INTO raffles_read (
+                id, title, ticket_price, currency, total_tickets, status, number_start,
+                number_end, number_padding, owner_id, created_at, updated_at
+            )
+            SELECT id, title, ticket_price, currency, total_tickets, status, number_start,
+                   number_start + total_tickets - 1, number_padding, owner_id, created_at,
+                   updated_at
+            FROM raffles WHERE title LIKE %s
+            """,
+            (like,),
+        ),
+        (
+            """
+            INSERT INTO raffle_numbers_read (raffle_id, number, status, label)
+            SELECT r.id, n, 'available', lpad(n::text, r.number_padding, '0')
+            FROM raffles r
+            CROSS JOIN LATERAL generate_series(1, r.total_tickets) AS n
+            WHERE r.title LIKE %s
+            """,
+            (like,),
+        ),
+        (
+            """
+            WITH buyers AS (
+                SELECT array_agg(id) AS ids FROM participants WHERE email LIKE %s
+            )
+            INSERT INTO tickets (
+                id, raffle_id, participant_id, number, status,
+                reserved_at, reserved_until, reservation_id, purchased_at
+            )
+            SELECT gen_random_uuid(), n.raffle_id,
+                   b.ids[1 + floor(random() * cardinality(b.ids))::int], n.number,
+                   CASE WHEN pick < %s THEN 'sold' ELSE 'reserved' END,
+                   CASE WHEN pick < %s THEN NULL ELSE now() END,
+                   CASE WHEN pick < %s THEN NULL ELSE now() + interval '1 day' END,
+                   CASE WHEN pick < %s THEN NULL ELSE gen_random_uuid() END,
+                   CASE WHEN pick < %s THEN now() END
+            FROM (
+                SELECT n.raffle_id, n.number, random() AS pick
+                FROM raffle_numbers_read n
+                JOIN raffles r ON r.id = n.raffle_id
+                WHERE r.title LIKE %s
+            ) n
+            CROSS JOIN buyers b
+            WHERE n.pick < %s
+            """,
+            (like, *[sold_ratio] * 5, like, sold_ratio + reserved_ratio),
+        ),
+        (
+            """
+            WITH grouped AS (
+                SELECT gen_random_uuid() AS purchase_id, t.raffle_id, t.participant_id,
+                       array_agg(t.number ORDER BY t.number) AS numbers
+                FROM tickets t
+                JOIN raffles r ON r.id = t.raffle_id
+                WHERE r.title LIKE %s AND t.status = 'sold'
+                GROUP BY t.raffle_id, t.participant_id
+            ), purchased AS (
+                INSERT INTO purchases (
+                    id, raffle_id, participant_id, status, total_price, currency, payment_method
+                )
+                SELECT purchase_id, raffle_id, participant_id, 'confirmed',
+                       1000 * cardinality(numbers), 'COP', %s
+                FROM grouped
+            )
+            INSERT INTO purchases_read (
+                purchase_id, raffle_id, participant_id, raffle_title, raffle_status,
+                numbers, total_price, currency, status, payment_method, created_at
+            )
+            SELECT g.purchase_id, g.raffle_id, g.participant_id, r.title, r.status, g.numbers,
+                   1000 * cardinality(g.numbers), 'COP', 'confirmed', %s, now()
+            FROM grouped g
+            JOIN raffles r ON r.id = g.raffle_id
+            """,
+            (like, SEED_TAG, SEED_TAG),
+        ),
+        (
+            """
+            UPDATE tickets t
+            SET purchase_id = p.purchase_id
+            FROM purchases_read p
+            WHERE p.payment_method = %s
+              AND t.raffle_id = p.raffle_id
+              AND t.participant_id = p.participant_id
+              AND t.status = 'sold'
+            """,
+            (SEED_TAG,),
+        ),
+        (
+            """
+            UPDATE raffle_numbers_read n
+            SET status = t.status,
+                reserved_until = t.reserved_until,
+                reservation_id = t.reservation_id,
+                purchase_id = t.purchase_id,
+                participant_id = t.participant_id
+            FROM tickets t
+            JOIN raffles r ON r.id = t.raffle_id
+            WHERE r.title LIKE %s AND n.raffle_id = t.raffle_id AND n.number = t.number
+            """,
+            (like,),
+        ),
+        (
+            """
+            UPDATE raffles_read r
+            SET tickets_sold = s.sold
+            FROM (
+                SELECT raffle_id, COUNT(*) AS sold
+                FROM tickets
+                WHERE status = 'sold'
+                GROUP BY raffle_id
+            ) s
+            WHERE r.title LIKE %s AND s.raffle_id = r.id
+            """,
+            (like,),
+        ),
+    ]
+
+    def _handler(conn):
+        cur = conn.cursor()
+        for sql, params in statements:
+            cur.execute(sql, params)
+        for table in ANALYZED_TABLES:
+            cur.execute(f"ANALYZE {table}")
+        cur.close()
+
+    run_transaction(_handler, operation="benchmark")
+
+
+def _drop_seed() -> None:
+    def _handler(conn):
+        cur = conn.cursor()
+        cur.execute("DELETE FROM purchases_read WHERE payment_method = %s", (SEED_TAG,))
+        cur.execute("DELETE FROM raffles_read WHERE title LIKE %s", (f"{SEED_TAG}-%",))
+        # tickets, purchases and raffle_numbers_read cascade from raffles.
+        cur.execute("DELETE FROM raffles WHERE title LIKE %s", (f"{SEED_TAG}-%",))
+        cur.execute("DELETE FROM users WHERE email LIKE %s", (f"{SEED_TAG}-owner-%",))
+        cur.close()
+
+    run_transaction(_handler, operation="benchmark")
+
+
+def _seeded() -> bool:
+    def _handler(conn):
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM raffles WHERE title LIKE %s LIMIT 1", (f"{SEED_TAG}-%",))
+        row = cur.fetchone()
+        cur.close()
+        return row is not None
+
+    return run_transaction(_handler, operation="benchmark")
+
+
+def _fixtures(cur) -> dict:
+    cur.execute(
+        "SELECT id, total_tickets, owner_id FROM raffles "
+        "WHERE title LIKE %s AND status = 'open' ORDER BY title LIMIT 3",
+        (f"{SEED_TAG}-%",),
+    )
+    (hot_raffle, total, owner), (draw_raffle, _, _), (due_raffle, _, _) = cur.fetchall()
+    # Only this raffle is due, so the scheduler's scan finds exactly one.
+    cur.execute(
+        "UPDATE raffles SET draw_at = now() - interval '1 minute' WHERE id = %s", (due_raffle,)
+    )
+    cur.execute(
+        "SELECT number FROM raffle_numbers_read "
+        "WHERE raffle_id = %s AND status = 'available' LIMIT 10",
+        (hot_raffle,),
+    )
+    free = [row[0] for row in cur.fetchall()]
+    cur.execute(
+        "SELECT participant_id FROM purchases_read WHERE payment_method = %s LIMIT 1", (SEED_TAG,)
+    )
+    buyer = cur.fetchone()[0]
+    return {
+        "hot": hot_raffle,
+        "total": total,
+        "draw": draw_raffle,
+        "due": due_raffle,
+        "free": free[:5],
+        "cart_free": free[5:],
+        "buyer": buyer,
+        "owner": owner,
+    }
+
+
+def _explain_reads(recorder: _Recorder, store, fixtures: dict) -> None:
+    hot, total = fixtures["hot"], fixtures["total"]
+    for label, call in (
+        ("list_raffles", lambda: store.raffle_rows()),
+        ("list_raffles_open", lambda: store.raffle_rows("open")),
+        ("get_raffle", lambda: store.raffle_row(hot)),
+        ("numbers_header", lambda: store.numbers_header(hot)),
+        ("numbers_first_page", lambda: store.number_rows(hot, 1, 500)),
+        ("numbers_last_page", lambda: store.number_rows(hot, total - 499, total)),
+        ("list_purchases", lambda: store.purchase_rows(fixtures["buyer"])),
+        ("list_owner_raffles", lambda: store.owner_raffle_rows(fixtures["owner"])),
+        (
+            "list_owner_raffles_open",
+            lambda: store.owner_raffle_rows(fixtures["owner"], ["open"]),
+        ),
+        ("export_sold", lambda: list(store.sold_rows(hot))),
+    ):
+        recorder.label = label
+        call()
+
+
+def _explain_writes(recorder: _Recorder, explaining, store, fixtures: dict) -> None:
+    hot = fixtures["hot"]
+    recorder.label = "participant"
+    probe = ParticipantCreate(
+        name="Plan probe", email=f"{SEED_TAG}-probe-{uuid.uuid4().hex}@example.com"
+    )
+    participant_id = get_or_create_participant(explaining, probe)
+    recorder.label = "reserve"
+    reservation = reserve_in_transaction(explaining, hot, fixtures["free"], 10, participant_id)
+    recorder.label = "reserve_quick_pick"
+    quick_pick = reserve_in_transaction(explaining, hot, None, 10, participant_id, count=5)
+    recorder.label = "release"
+    release_in_transaction(explaining, hot, quick_pick["reservation_id"])
+    recorder.label = "confirm"
+    confirm_in_transaction(explaining, hot, reservation["reservation_id"], participant_id, "card")
+
+    recorder.label = "cart_reserve"
+    cart = reserve_cart_in_transaction(
+        explaining,
+        CartReservationRequest(
+            participant=probe,
+            items=[
+                {"raffle_id": hot, "numbers": fixtures["cart_free"]},
+                {"raffle_id": fixtures["draw"], "count": 3},
+            ],
+        ),
+        10,
+    )
+    recorder.label = "cart_confirm"
+    confirm_cart_in_transaction(
+        explaining,
+        CartConfirmRequest(
+            participant_id=cart["participant_id"],
+            items=[
+                {
+                    "raffle_id": item["raffle_id"],
+                    "reservation_id": item["reservation"]["reservation_id"],
+                }
+                for item in cart["items"]
+                if item["ok"]
+            ],
+        ),
+    )
+
+    scope = idempotency.client_scope("plan", participant_id)
+    key = uuid.uuid4().hex
+    request_fingerprint = idempotency.fingerprint(scope)
+    handler = idempotency.guard(lambda conn: {"ok": True}, "plan", scope, key, request_fingerprint)
+    recorder.label = "idempotency_claim"
+    handler(explaining)
+    recorder.label = "idempotency_replay"
+    handler(explaining)
+    recorder.label = "idempotency_lookup"
+    idempotency.lookup("plan", scope, key, request_fingerprint)
+    recorder.label = "idempotency_purge"
+    idempotency.purge_expired()
+
+    email = f"{SEED_TAG}-probe-{uuid.uuid4().hex}@example.com"
+    recorder.label = "register"
+    auth_commands.register_user(
+        UserRegister(name="Plan probe", email=email, password="plan-probe-password")
+    )
+    recorder.label = "login"
+    auth_queries.login_user(UserLogin(email=email, password="plan-probe-password"))
+
+    recorder.label = "draw"
+    apply_draw(explaining, fixtures["draw"], 3)
+    recorder.label = "auto_draw_due"
+    auto_draw.find_due_raffles(10)
+    recorder.label = "auto_draw"
+    auto_draw.draw_due_raffle(fixtures["due"])
+
+    recorder.label = "archivable"
+    archive.find_archivable(20, 0)
+    recorder.label = "archive"
+    archive.archive_raffle(fixtures["draw"])
+    recorder.label = "export_sold_archived"
+    list(store.sold_rows(fixtures["draw"], archived=True))
+
+
+def explain_paths() -> dict[str, dict]:
+    recorder = _Recorder()
+
+    def _handler(conn):
+        cur = conn.cursor()
+        fixtures = _fixtures(cur)
+        cur.close()
+        explaining = _ExplainingConnection(conn, recorder)
+        store = postgres.PostgresStore()
+        with _routed(explaining):
+            _explain_reads(recorder, store, fixtures)
+            _explain_writes(recorder, explaining, store, fixtures)
+        raise _Rollback()
+
+    try:
+        run_transaction(_handler, operation="benchmark")
+    except _Rollback:
+        pass
+    return recorder.statements
+
+
+def _compare(statements: dict, baseline_dir: Path) -> dict[str, dict]:
+    changed = {}
+    for name, statement in statements.items():
+        path = baseline_dir / f"{name}.json"
+        if not path.exists():
+            continue
+        before = plan_shape(json.loads(path.read_text())["plan"])
+        after = plan_shape(statement["plan"])
+        if before != after:
+            changed[name] = {"baseline": before, "current": after}
+    return changed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raffles", type=int, default=200)
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--buyers", type=int, default=20000)
+    parser.add_argument("--owners", type=int, default=20)
+    parser.add_argument("--sold-ratio", type=float, default=0.4)
+    parser.add_argument("--reserved-ratio", type=float, default=0.05)
+    parser.add_argument("--reseed", action="store_true", help="Drop and recreate the seeded rows")
+    parser.add_argument("--output-dir", default="plans", help="Where plan JSON files are written")
+    parser.add_argument("--baseline", help="Directory of a previous run to diff plan shapes with")
+    args = parser.parse_args()
+
+    if not db_configured():
+        parser.error("DB_HOST, DB_NAME, DB_USER and DB_PASSWORD must point at a local Postgres")
+    if args.reseed:
+        _drop_seed()
+    if args.reseed or not _seeded():
+        _seed(
+            args.raffles,
+            args.tickets,
+            args.buyers,
+            args.owners,
+            args.sold_ratio,
+            args.reserved_ratio,
+        )
+
+    statements = explain_paths()
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, statement in statements.items():
+        (output_dir / f"{name}.json").write_text(json.dumps(statement, indent=2) + "\n")
+    summary = {
+        name: {key: statement[key] for key in ("execution_ms", "buffers", "failures")}
+        for name, statement in statements.items()
+    }
+    report: dict = {"statements": summary}
+    if args.baseline:
+        report["changed_plans"] = _compare(statements, Path(args.baseline))
+    (output_dir / "summary.json").write_text(json.dumps(report, indent=2) + "\n")
+
+    width = max(len(name) for name in summary)
+    for name, entry in summary.items():
+        status = "FAIL " + "; ".join(entry["failures"]) if entry["failures"] else "ok"
+        print(
+            f"{name:<{width}}  {entry['execution_ms']:>9.2f} ms  "
+            f"{entry['buffers']:>7} buf  {status}"
+        )
+    for name in report.get("changed_plans", {}):
+        print(f"{name}: plan shape changed since baseline")
+    return 1 if any(entry["failures"] for entry in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""CPU cost of serializing a 100k-number grid: response_model vs fast path.
+
+Both variants run the same handler output through a FastAPI route; the
+"response_model" variant returns the dict (validation + jsonable encoding),
+the "fast" variant wraps it in FastJSONResponse:
+
+    python -m benchmarks.serialization --numbers 100000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.api.serialization as serialization
+from app.api.serialization import FastJSONResponse
+from app.models.schemas import RaffleNumbersResponse
+
+
+def _grid(size: int) -> dict:
+    reserved_until = datetime.now(timezone.utc) + timedelta(minutes=10)
+    numbers = []
+    counts = {"available": 0, "reserved": 0, "sold": 0}
+    for number in range(1, size + 1):
+        status = "sold" if number % 7 == 0 else "reserved" if number % 11 == 0 else "available"
+        counts[status] += 1
+        numbers.append(
+            {
+                "number": number,
+                "label": str(number).zfill(6),
+                "status": status,
+                "reserved_until": reserved_until if status == "reserved" else None,
+            }
+        )
+    return {
+        "raffle_id": str(uuid.uuid4()),
+        "number_start": 1,
+        "number_end": size,
+        "number_padding": 6,
+        "total_numbers": size,
+        "offset": 0,
+        "limit": size,
+        "counts": counts,
+        "numbers": numbers,
+    }
+
+
+def _client(grid: dict) -> TestClient:
+    bench = FastAPI()
+
+    @bench.get("/response-model", response_model=RaffleNumbersResponse)
+    def response_model_path():
+        return grid
+
+    @bench.get("/fast", response_model=RaffleNumbersResponse)
+    def fast_path():
+        return FastJSONResponse(grid)
+
+    return TestClient(bench)
+
+
+def _measure(client: TestClient, path: str, repeat: int) -> tuple[dict, bytes]:
+    cpu, wall = [], []
+    body = b""
+    for _ in range(repeat):
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        response = client.get(path)
+        cpu.append(time.process_time() - cpu_started)
+        wall.append(time.perf_counter() - wall_started)
+        body = response.content
+    return {
+        "cpu_ms_median": round(statistics.median(cpu) * 1000, 1),
+        "wall_ms_median": round(statistics.median(wall) * 1000, 1),
+        "bytes": len(body),
+    }, body
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--numbers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    grid = _grid(args.numbers)
+    client = _client(grid)
+    report = {"numbers": args.numbers}
+    baseline, baseline_body = _measure(client, "/response-model", args.repeat)
+    report["response_model"] = baseline
+    encoders = [("fast", serialization.orjson)]
+    if serialization.orjson is not None:
+        encoders.append(("fast_stdlib_json", None))
+    for name, encoder in encoders:
+        original = serialization.orjson
+        serialization.orjson = encoder
+        try:
+            result, body = _measure(client, "/fast", args.repeat)
+        finally:
+            serialization.orjson = original
+        result["same_payload"] = json.loads(body) == json.loads(baseline_body)
+        result["cpu_speedup"] = round(baseline["cpu_ms_median"] / max(result["cpu_ms_median"], 0.1), 1)
+        report[name] = result
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""Peak memory of reading a 100k-row result: fetch_all vs the streaming API.
+
+Runs one synthetic grid query (generate_series, no seed data needed) against
+a local Postgres with each read strategy and reports the tracemalloc peak and
+the wall time. "kept" variants hold every row afterwards, like list_numbers
+building a grid; "consumed" ones drop each row once used, like an export:
+
+    DB_HOST=localhost DB_NAME=rifaapp ... python -m benchmarks.streaming \\
+        --rows 100000 --batch-size 2000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Callable, Iterable, Iterator
+
+from app.core.config import db_configured
+from app.db.connection import (
+    dict_row,
+    fetch_all,
+    get_conn,
+    iter_rows,
+    light_row,
+    tuple_row,
+)
+
+GRID_SQL = """
+    SELECT n AS number,
+           CASE WHEN n %% 7 = 0 THEN 'sold' ELSE 'available' END AS status,
+           CASE WHEN n %% 11 = 0 THEN now() + interval '10 minutes' END AS reserved_until,
+           lpad(n::text, 6, '0') AS label
+    FROM generate_series(1, %s) AS n
+"""
+
+
+def _streamed(params: tuple, batch_size: int, row_factory) -> Iterator:
+    with iter_rows(GRID_SQL, params, batch_size, row_factory) as rows:
+        yield from rows
+
+
+def _strategies(rows: int, batch_size: int) -> list[tuple[str, Callable[[], Iterable], bool]]:
+    params = (rows,)
+    return [
+        ("fetch_all_dicts_kept", lambda: fetch_all(GRID_SQL, params), True),
+        ("fetch_all_light_kept", lambda: fetch_all(GRID_SQL, params, light_row), True),
+        (
+            "iter_rows_light_kept",
+            lambda: _streamed(params, batch_size, light_row),
+            True,
+        ),
+        (
+            "iter_rows_tuples_kept",
+            lambda: _streamed(params, batch_size, tuple_row),
+            True,
+        ),
+        ("fetch_all_dicts_consumed", lambda: fetch_all(GRID_SQL, params), False),
+        (
+            "iter_rows_dicts_consumed",
+            lambda: _streamed(params, batch_size, dict_row),
+            False,
+        ),
+    ]
+
+
+def _run(read: Callable[[], Iterable], keep: bool) -> int:
+    if keep:
+        kept = list(read())
+        return len(kept)
+    count = 0
+    for _ in read():
+        count += 1
+    return count
+
+
+def _measure(read: Callable[[], Iterable], keep: bool, repeat: int) -> dict:
+    walls = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        count = _run(read, keep)
+        walls.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _run(read, keep)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "rows": count,
+        "peak_mib": round(peak / 2**20, 1),
+        "wall_ms_best": round(min(walls) * 1000, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not db_configured():
+        parser.error("DB_HOST, DB_NAME, DB_USER and DB_PASSWORD must point at a local Postgres")
+
+    get_conn()
+    report: dict = {"rows": args.rows, "batch_size": args.batch_size}
+    for name, read, keep in _strategies(args.rows, args.batch_size):
+        report[name] = _measure(read, keep, args.repeat)
+    baseline = report["fetch_all_dicts_kept"]["peak_mib"]
+    for name, result in report.items():
+        if isinstance(result, dict):
+            result["peak_vs_fetch_all"] = round(result["peak_mib"] / max(baseline, 0.1), 2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
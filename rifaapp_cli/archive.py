@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from app.core.logging import configure_logging
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compact drawn raffles into raffle_archives and delete their per-number rows"
+    )
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=1.0,
+        help="Only archive raffles drawn at least this long ago",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    from app.cqrs.commands import archive
+
+    summary = archive.run_once(batch_size=args.batch_size, min_age_seconds=args.min_age_hours * 3600)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Draw raffles whose draw_at has passed")
+    parser.add_argument("--batch-size", type=int, default=settings.auto_draw_batch_size)
+    parser.add_argument("--concurrency", type=int, default=settings.auto_draw_concurrency)
+    parser.add_argument("--prizes", type=int, default=1)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Keep polling every N seconds instead of running a single pass",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    from app.cqrs.commands import auto_draw
+
+    if args.interval:
+        try:
+            auto_draw.run_forever(
+                args.interval,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                prizes=args.prizes,
+            )
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    summary = auto_draw.run_once(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        prizes=args.prizes,
+    )
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
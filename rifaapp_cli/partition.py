@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Hash-partition tickets and raffle_numbers_read by raffle_id, online"
+    )
+    parser.add_argument(
+        "--tables",
+        default="raffle_numbers_read,tickets",
+        help="Comma separated tables to partition",
+    )
+    parser.add_argument("--partitions", type=int, default=settings.partition_count)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.0,
+        help="Seconds to sleep between backfill batches to limit load",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report which partitions the hot queries scan",
+    )
+    parser.add_argument(
+        "--drop-old",
+        action="store_true",
+        help="Drop the *_unpartitioned tables kept after a successful swap",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    from app.db import partitioning
+
+    if args.check:
+        report = partitioning.check_pruning()
+        pruned = {
+            name: partitioning.is_pruned(partitioning.HOT_QUERIES[name][0], relations)
+            for name, relations in report.items()
+        }
+        print(json.dumps({"scanned": report, "pruned": pruned}))
+        return 0 if all(pruned.values()) else 1
+
+    if args.partitions < 2:
+        parser.error("--partitions must be at least 2")
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    unknown = [table for table in tables if table not in partitioning.SPECS]
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(unknown)}")
+
+    summary = {}
+    for table in tables:
+        spec = partitioning.SPECS[table]
+        if args.drop_old:
+            partitioning.drop_retired(spec)
+            summary[table] = "dropped"
+            continue
+        summary[table] = partitioning.partition_table(
+            spec,
+            args.partitions,
+            batch_size=args.batch_size,
+            pause_seconds=args.pause,
+            progress=lambda copied, table=table: logger.info("%s: %s rows copied", table, copied),
+        )
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from app.api.profiling import PROFILE_HEADER
+from app.core.config import settings
+from app.core.profiling import issue_profile_token
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Print a signed header value that turns on profiling for a request"
+    )
+    parser.add_argument("--ttl", type=int, default=300, help="Seconds the token stays valid")
+    args = parser.parse_args()
+
+    if not settings.profile_secret:
+        parser.error("PROFILE_SECRET must be set to the value the API runs with")
+    print(f"{PROFILE_HEADER}: {issue_profile_token(settings.profile_secret, args.ttl)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
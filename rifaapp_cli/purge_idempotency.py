@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from app.core.logging import configure_logging
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Delete expired Idempotency-Key responses")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    configure_logging()
+    from app.cqrs.commands import idempotency
+
+    deleted = idempotency.purge_expired(batch_size=args.batch_size)
+    print(json.dumps({"deleted": deleted}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
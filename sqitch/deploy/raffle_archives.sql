@@ -0,0 +1,15 @@
+BEGIN;
+
+-- Compact form of a drawn raffle once its per-number rows are deleted. The
+-- arrays are parallel and ordered by number: sold_numbers[i] was bought in
+-- purchase_ids[i] by participant_ids[i].
+CREATE TABLE IF NOT EXISTS raffle_archives (
+    raffle_id uuid PRIMARY KEY REFERENCES raffles(id) ON DELETE CASCADE,
+    tickets_sold int NOT NULL,
+    sold_numbers int[] NOT NULL,
+    purchase_ids uuid[] NOT NULL,
+    participant_ids uuid[] NOT NULL,
+    archived_at timestamptz NOT NULL DEFAULT now()
+);
+
+COMMIT;
@@ -0,0 +1,10 @@
+BEGIN;
+
+-- Archived raffles keep no per-number rows. An earlier fallback runner re-ran
+-- cqrs_read_model when its file changed, and that backfill rebuilt archived
+-- raffles as full 'available' grids; drop any such rows.
+DELETE FROM raffle_numbers_read n
+USING raffle_archives a
+WHERE n.raffle_id = a.raffle_id;
+
+COMMIT;
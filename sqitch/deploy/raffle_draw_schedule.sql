@@ -0,0 +1,7 @@
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS raffles_status_draw_at_idx
+    ON raffles (status, draw_at)
+    WHERE draw_at IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,9 @@
+BEGIN;
+
+-- Free numbers only: quick-pick reservations walk this index from a random
+-- pivot, so its size shrinks as a raffle sells out.
+CREATE INDEX IF NOT EXISTS raffle_numbers_available_idx
+    ON raffle_numbers_read (raffle_id, number)
+    WHERE status = 'available';
+
+COMMIT;
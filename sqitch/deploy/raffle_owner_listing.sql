@@ -0,0 +1,26 @@
+BEGIN;
+
+-- Sold count kept on the read row by confirmations, so listings don't
+-- aggregate raffle_numbers_read. Archived raffles have no per-number rows left.
+ALTER TABLE raffles_read ADD COLUMN IF NOT EXISTS tickets_sold int NOT NULL DEFAULT 0;
+
+UPDATE raffles_read r
+SET tickets_sold = s.sold
+FROM (
+    SELECT raffle_id, COUNT(*) AS sold
+    FROM raffle_numbers_read
+    WHERE status = 'sold'
+    GROUP BY raffle_id
+) s
+WHERE s.raffle_id = r.id;
+
+UPDATE raffles_read r
+SET tickets_sold = a.tickets_sold
+FROM raffle_archives a
+WHERE a.raffle_id = r.id;
+
+-- "My raffles", newest first, paginated by (created_at, id).
+CREATE INDEX IF NOT EXISTS raffles_read_owner_created_idx
+    ON raffles_read (owner_id, created_at DESC, id DESC);
+
+COMMIT;
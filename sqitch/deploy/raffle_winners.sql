@@ -0,0 +1,42 @@
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS raffle_winners (
+    raffle_id uuid NOT NULL REFERENCES raffles(id) ON DELETE CASCADE,
+    prize_rank int NOT NULL CHECK (prize_rank > 0),
+    ticket_id uuid NOT NULL,
+    participant_id uuid NOT NULL REFERENCES participants(id),
+    number int NOT NULL,
+    drawn_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (raffle_id, prize_rank),
+    UNIQUE (raffle_id, ticket_id)
+);
+
+ALTER TABLE raffles_read ADD COLUMN IF NOT EXISTS winners jsonb NOT NULL DEFAULT '[]'::jsonb;
+
+INSERT INTO raffle_winners (raffle_id, prize_rank, ticket_id, participant_id, number, drawn_at)
+SELECT r.id, 1, t.id, t.participant_id, t.number, r.updated_at
+FROM raffles r
+JOIN tickets t ON t.id = r.winner_ticket_id
+WHERE r.status = 'drawn'
+ON CONFLICT DO NOTHING;
+
+UPDATE raffles_read r
+SET winners = w.winners
+FROM (
+    SELECT raffle_id,
+           jsonb_agg(
+               jsonb_build_object(
+                   'prize_rank', prize_rank,
+                   'ticket_id', ticket_id::text,
+                   'participant_id', participant_id::text,
+                   'number', number
+               )
+               ORDER BY prize_rank
+           ) AS winners
+    FROM raffle_winners
+    GROUP BY raffle_id
+) w
+WHERE r.id = w.raffle_id
+  AND r.winners = '[]'::jsonb;
+
+COMMIT;
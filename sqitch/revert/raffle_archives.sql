@@ -0,0 +1,5 @@
+BEGIN;
+
+DROP TABLE IF EXISTS raffle_archives;
+
+COMMIT;
@@ -0,0 +1,5 @@
+BEGIN;
+
+-- Nothing to restore: the deleted rows were rebuilt by mistake.
+
+COMMIT;
@@ -0,0 +1,5 @@
+BEGIN;
+
+DROP INDEX IF EXISTS raffles_status_draw_at_idx;
+
+COMMIT;
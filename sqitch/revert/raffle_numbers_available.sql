@@ -0,0 +1,5 @@
+BEGIN;
+
+DROP INDEX IF EXISTS raffle_numbers_available_idx;
+
+COMMIT;
@@ -0,0 +1,6 @@
+BEGIN;
+
+DROP INDEX IF EXISTS raffles_read_owner_created_idx;
+ALTER TABLE raffles_read DROP COLUMN IF EXISTS tickets_sold;
+
+COMMIT;
@@ -0,0 +1,6 @@
+BEGIN;
+
+ALTER TABLE raffles_read DROP COLUMN IF EXISTS winners;
+DROP TABLE IF EXISTS raffle_winners;
+
+COMMIT;
@@ -0,0 +1,3 @@
+SELECT scope, key, fingerprint, response, created_at, expires_at
+FROM idempotency_keys
+WHERE FALSE;
@@ -0,0 +1,3 @@
+SELECT raffle_id, tickets_sold, sold_numbers, purchase_ids, participant_ids, archived_at
+FROM raffle_archives
+WHERE FALSE;
@@ -0,0 +1,3 @@
+SELECT 1 / (COUNT(*) = 0)::int
+FROM raffle_numbers_read n
+JOIN raffle_archives a ON a.raffle_id = n.raffle_id;
@@ -0,0 +1,3 @@
+SELECT 1
+FROM pg_indexes
+WHERE tablename = 'raffles' AND indexname = 'raffles_status_draw_at_idx';
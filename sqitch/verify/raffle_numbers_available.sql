@@ -0,0 +1,3 @@
+SELECT 1
+FROM pg_indexes
+WHERE tablename = 'raffle_numbers_read' AND indexname = 'raffle_numbers_available_idx';
@@ -0,0 +1,7 @@
+SELECT tickets_sold
+FROM raffles_read
+WHERE FALSE;
+
+SELECT 1
+FROM pg_indexes
+WHERE tablename = 'raffles_read' AND indexname = 'raffles_read_owner_created_idx';
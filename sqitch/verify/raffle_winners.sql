@@ -0,0 +1,7 @@
+SELECT raffle_id, prize_rank, ticket_id, participant_id, number, drawn_at
+FROM raffle_winners
+WHERE FALSE;
+
+SELECT 1
+FROM information_schema.columns
+WHERE table_name = 'raffles_read' AND column_name = 'winners';
@@ -0,0 +1,132 @@
+import os
+from typing import Callable, Optional, Union
+
+import pytest
+
+# Session tokens are signed with SESSION_SECRET; set it before app.core.config
+# reads the environment.
+os.environ.setdefault("SESSION_SECRET", "test-session-secret")
+
+
+@pytest.fixture
+def api_gateway_event():
+    """Build a minimal API Gateway (REST, proxy integration) GET event."""
+
+    def _event(path: str) -> dict:
+        return {
+            "resource": "/{proxy+}",
+            "path": path,
+            "httpMethod": "GET",
+            "headers": {"host": "localhost", "accept": "application/json"},
+            "multiValueHeaders": {"host": ["localhost"], "accept": ["application/json"]},
+            "queryStringParameters": None,
+            "multiValueQueryStringParameters": None,
+            "pathParameters": {"proxy": path.lstrip("/")},
+            "requestContext": {
+                "resourcePath": "/{proxy+}",
+                "httpMethod": "GET",
+                "path": path,
+                "stage": "local",
+                "identity": {"sourceIp": "127.0.0.1"},
+            },
+            "body": None,
+            "isBase64Encoded": False,
+        }
+
+    return _event
+
+
+Rows = Union[list, Callable[[str, tuple], list]]
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConn") -> None:
+        self.conn = conn
+        self.description = conn.description
+        self.rowcount = -1
+        self._rows: list = []
+
+    def execute(self, sql: str, params: tuple = (), stream=None) -> None:
+        sql = " ".join(sql.split())
+        self.conn.executed.append((sql, params))
+        self._rows = list(self.conn.answer(sql, params))
+        self.rowcount = len(self._rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self) -> list:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConn:
+    """pg8000 connection double that records statements and scripts answers.
+
+    ``responses`` maps a SQL fragment to the rows returned by the first
+    statement containing it (whitespace collapsed), or to a callable
+    ``(sql, params) -> rows``. Anything else returns no rows, and ``rowcount``
+    is the number of rows answered. Every statement lands in ``executed`` as
+    ``(sql, params)``, whichever cursor ran it.
+    """
+
+    def __init__(self, responses: Optional[dict[str, Rows]] = None, description=None) -> None:
+        self.responses = responses or {}
+        self.description = description
+        self.executed: list[tuple[str, tuple]] = []
+        self.autocommit = True
+        self.committed = False
+        self.rolled_back = False
+
+    def answer(self, sql: str, params: tuple) -> list:
+        for fragment, rows in self.responses.items():
+            if fragment in sql:
+                return rows(sql, params) if callable(rows) else rows
+        return []
+
+    def statements(self, prefix: str = "") -> list[str]:
+        return [sql for sql, _ in self.executed if sql.startswith(prefix)]
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        self.committed = True
+
+    def rollback(self) -> None:
+        self.rolled_back = True
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_conn():
+    """Build a :class:`FakeConn` (see its docstring for ``responses``)."""
+    return FakeConn
+
+
+@pytest.fixture
+def use_store():
+    """Install a store process-wide for one test; the previous one comes back after."""
+    from app import storage
+
+    previous = []
+
+    def _install(store):
+        previous.append(storage.set_store(store))
+        return store
+
+    yield _install
+    if previous:
+        storage.set_store(previous[0])
+
+
+@pytest.fixture
+def memory_store(use_store):
+    from app.storage.memory import MemoryStore
+
+    return use_store(MemoryStore())
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from fastapi import HTTPException
+import pytest
+
+from app.core.admission import REQUESTS, WAITING, AdmissionController
+
+
+def _hold(controller, key, entered, release):
+    with controller.admit(key, "test"):
+        entered.set()
+        release.wait(2)
+
+
+def _admit_once(controller, key):
+    with controller.admit(key, "test"):
+        return True
+
+
+def test_queue_full_is_rejected_with_retry_after():
+    controller = AdmissionController(
+        max_active=1, max_waiting=0, max_wait_seconds=1.5, max_waiting_total=8
+    )
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, "r1", entered, release))
+    holder.start()
+    entered.wait(2)
+    before = REQUESTS.value(operation="test", outcome="rejected_queue_full")
+
+    with pytest.raises(HTTPException) as exc_info:
+        with controller.admit("r1", "test"):
+            pass
+    # Other raffles are unaffected.
+    with controller.admit("r2", "test"):
+        pass
+
+    release.set()
+    holder.join()
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "2"}
+    assert REQUESTS.value(operation="test", outcome="rejected_queue_full") == before + 1
+    assert controller._slots == {}
+
+
+def test_waiter_is_admitted_when_a_slot_frees_up():
+    controller = AdmissionController(
+        max_active=1, max_waiting=4, max_wait_seconds=2, max_waiting_total=8
+    )
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, "r1", entered, release))
+    holder.start()
+    entered.wait(2)
+
+    admitted = []
+    waiter = threading.Thread(
+        target=lambda: admitted.append(_admit_once(controller, "r1"))
+    )
+    waiter.start()
+    deadline = time.time() + 2
+    while WAITING.value() < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert admitted == []
+    release.set()
+    holder.join()
+    waiter.join()
+    assert admitted == [True]
+
+
+def test_wait_deadline_expires():
+    controller = AdmissionController(
+        max_active=1, max_waiting=4, max_wait_seconds=0.05, max_waiting_total=8
+    )
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, "r1", entered, release))
+    holder.start()
+    entered.wait(2)
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            _admit_once(controller, "r1")
+    finally:
+        release.set()
+        holder.join()
+    assert exc_info.value.status_code == 429
+
+
+def test_total_queue_is_capped_across_raffles():
+    controller = AdmissionController(
+        max_active=1, max_waiting=4, max_wait_seconds=2, max_waiting_total=1
+    )
+    holders = []
+    release = threading.Event()
+    for key in ("r1", "r2"):
+        entered = threading.Event()
+        holder = threading.Thread(target=_hold, args=(controller, key, entered, release))
+        holder.start()
+        entered.wait(2)
+        holders.append(holder)
+    waiter = threading.Thread(target=_admit_once, args=(controller, "r1"))
+    waiter.start()
+    deadline = time.time() + 2
+    while controller._waiting_total < 1 and time.time() < deadline:
+        time.sleep(0.01)
+
+    try:
+        # r2 has room in its own queue, but the shared budget is spent.
+        with pytest.raises(HTTPException) as exc_info:
+            _admit_once(controller, "r2")
+    finally:
+        release.set()
+        for thread in (*holders, waiter):
+            thread.join()
+    assert exc_info.value.status_code == 429
+    assert controller._slots == {}
@@ -0,0 +1,70 @@
+import uuid
+
+from app.cqrs.commands import archive
+from app.cqrs.queries import raffles as raffles_queries
+from app.storage import postgres
+
+
+def _archive(monkeypatch, conn):
+    monkeypatch.setattr(archive, "run_transaction", lambda handler, operation: handler(conn))
+    return archive.archive_raffle(uuid.uuid4())
+
+
+def test_archive_compacts_then_deletes_per_number_rows(monkeypatch, fake_conn):
+    conn = fake_conn(
+        {
+            "SELECT status": [("drawn",)],
+            "INSERT INTO raffle_archives": [(2,)],
+            # Three deleted rows, read back through rowcount.
+            "DELETE FROM raffle_numbers_read": [()] * 3,
+        }
+    )
+    result = _archive(monkeypatch, conn)
+
+    assert result["tickets_sold"] == 2
+    assert result["raffle_numbers_removed"] == 3
+    statements = conn.statements()
+    assert statements[1].startswith("INSERT INTO raffle_archives")
+    assert statements[2].startswith("DELETE FROM raffle_numbers_read")
+    assert statements[3].startswith("DELETE FROM tickets")
+
+
+def test_archive_skips_raffles_that_are_not_drawn(monkeypatch, fake_conn):
+    conn = fake_conn({"SELECT status": [("open",)]})
+    result = _archive(monkeypatch, conn)
+
+    assert result is None
+    assert len(conn.executed) == 1
+
+
+def test_list_numbers_reads_archived_raffles(monkeypatch, use_store):
+    raffle_id = uuid.uuid4()
+    queries = []
+    use_store(postgres.PostgresStore())
+    monkeypatch.setattr(
+        postgres,
+        "fetch_one",
+        lambda sql, params: {
+            "id": raffle_id,
+            "total_tickets": 5,
+            "number_start": 1,
+            "number_end": 5,
+            "number_padding": 2,
+            "status": "drawn",
+            "archived": True,
+        },
+    )
+
+    def fake_fetch_all(sql, params, row_factory=None):
+        queries.append(sql)
+        return [
+            {"number": 2, "status": "sold", "reserved_until": None, "label": None},
+            {"number": 4, "status": "sold", "reserved_until": None, "label": None},
+        ]
+
+    monkeypatch.setattr(postgres, "fetch_all", fake_fetch_all)
+    result = raffles_queries.list_numbers(raffle_id)
+
+    assert "raffle_archives" in queries[0]
+    assert result["counts"] == {"available": 3, "reserved": 0, "sold": 2}
+    assert [n["label"] for n in result["numbers"] if n["status"] == "sold"] == ["02", "04"]
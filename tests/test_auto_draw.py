@@ -0,0 +1,49 @@
+import threading
+import uuid
+
+from fastapi import HTTPException
+
+from app.cqrs.commands import auto_draw
+
+
+def test_run_once_draws_due_raffles_with_bounded_concurrency(monkeypatch):
+    raffles = [{"id": uuid.uuid4(), "draw_at": None} for _ in range(6)]
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(2, timeout=2)
+
+    def fake_draw(raffle_id, prizes):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        with lock:
+            active["now"] -= 1
+        if raffle_id == raffles[0]["id"]:
+            return None
+        if raffle_id == raffles[1]["id"]:
+            raise HTTPException(status_code=400, detail="No tickets sold")
+        return {"winner_ticket_id": str(uuid.uuid4())}
+
+    monkeypatch.setattr(auto_draw, "find_due_raffles", lambda limit: raffles[:limit])
+    monkeypatch.setattr(auto_draw, "draw_due_raffle", fake_draw)
+
+    summary = auto_draw.run_once(batch_size=10, concurrency=2)
+
+    assert summary["due"] == 6
+    assert summary["drawn"] == 4
+    assert summary["skipped"] == 1
+    assert summary["failed"] == 1
+    assert active["peak"] == 2
+
+
+def test_run_once_without_due_raffles(monkeypatch):
+    monkeypatch.setattr(auto_draw, "find_due_raffles", lambda limit: [])
+
+    summary = auto_draw.run_once(batch_size=5, concurrency=3)
+
+    assert summary["due"] == 0
+    assert summary["drawn"] == summary["skipped"] == summary["failed"] == 0
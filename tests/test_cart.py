@@ -0,0 +1,113 @@
+import uuid
+
+from decimal import Decimal
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import pytest
+
+from app.cqrs.commands import cart
+from app.cqrs.commands import raffles as raffles_commands
+from app.main import app
+from app.models.schemas import CartReservationItem, RaffleCreateV2
+
+
+def test_items_are_applied_in_raffle_id_order_with_savepoints(fake_conn):
+    ids = sorted(uuid.uuid4() for _ in range(3))
+    items = [CartReservationItem(raffle_id=raffle_id, numbers=[1]) for raffle_id in (ids[2], ids[0], ids[1])]
+    conn = fake_conn()
+    applied = []
+
+    def apply(item):
+        applied.append(item.raffle_id)
+        if item.raffle_id == ids[1]:
+            raise HTTPException(status_code=409, detail={"numbers": [1]})
+        conn.cursor().execute("work")
+        return {"raffle_id": str(item.raffle_id)}
+
+    results = cart.apply_cart_items(items, "reservation", apply, conn)
+
+    assert applied == ids
+    assert [result["raffle_id"] for result in results] == [str(ids[2]), str(ids[0]), str(ids[1])]
+    assert [result["ok"] for result in results] == [True, True, False]
+    assert results[2]["error"] == {"status_code": 409, "detail": {"numbers": [1]}}
+    assert conn.statements() == [
+        "SAVEPOINT cart_item",
+        "work",
+        "RELEASE SAVEPOINT cart_item",
+        "SAVEPOINT cart_item",
+        "ROLLBACK TO SAVEPOINT cart_item",
+        "SAVEPOINT cart_item",
+        "work",
+        "RELEASE SAVEPOINT cart_item",
+    ]
+
+
+def test_duplicate_raffles_are_rejected():
+    raffle_id = uuid.uuid4()
+    items = [CartReservationItem(raffle_id=raffle_id, numbers=[n]) for n in (1, 2)]
+    with pytest.raises(HTTPException) as exc_info:
+        cart._check_unique_raffles(items)
+    assert exc_info.value.status_code == 400
+
+
+def _raffle(total_tickets=10):
+    raffle = raffles_commands.create_raffle(
+        RaffleCreateV2(title="Carrito", ticket_price=Decimal("100"), total_tickets=total_tickets)
+    )
+    return raffle["id"]
+
+
+def test_cart_runs_on_the_memory_store(memory_store):
+    first, second = _raffle(), _raffle()
+    client = TestClient(app)
+
+    response = client.post(
+        "/rifaapp/v2/cart/reservations",
+        json={
+            "participant": {"name": "Ana", "email": "ana@example.com"},
+            "items": [
+                {"raffle_id": first, "numbers": [3, 4]},
+                {"raffle_id": second, "numbers": [11]},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    reserved = response.json()
+    assert [item["ok"] for item in reserved["items"]] == [True, False]
+    assert reserved["items"][1]["error"]["status_code"] == 400
+
+    reservation_id = reserved["items"][0]["reservation"]["reservation_id"]
+    response = client.post(
+        "/rifaapp/v2/cart/confirm",
+        json={
+            "participant_id": reserved["participant_id"],
+            "items": [{"raffle_id": first, "reservation_id": reservation_id}],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["purchase"]["numbers"] == [3, 4]
+    assert memory_store.raffle_row(uuid.UUID(first))["tickets_sold"] == 2
+
+
+def test_cart_idempotency_keys_are_scoped_per_buyer(memory_store):
+    raffle_id = _raffle()
+    client = TestClient(app)
+
+    def _reserve(email, number):
+        return client.post(
+            "/rifaapp/v2/cart/reservations",
+            headers={"Idempotency-Key": "same-key"},
+            json={
+                "participant": {"name": "Buyer", "email": email},
+                "items": [{"raffle_id": raffle_id, "numbers": [number]}],
+            },
+        )
+
+    ana = _reserve("ana@example.com", 1)
+    beto = _reserve("beto@example.com", 2)
+    assert ana.status_code == beto.status_code == 200
+    assert ana.json()["participant_id"] != beto.json()["participant_id"]
+    # A retry by the same buyer still replays.
+    assert _reserve("ana@example.com", 1).json() == ana.json()
+    assert _reserve("ana@example.com", 5).status_code == 422
@@ -0,0 +1,71 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api.compression import CompressionMiddleware, BYTES_IN, BYTES_OUT
+
+PAYLOAD = {"numbers": [{"number": n, "status": "available"} for n in range(500)]}
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=512, level=5)
+
+    @app.get("/big")
+    def big():
+        return JSONResponse(PAYLOAD)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/not-modified")
+    def not_modified():
+        return Response(status_code=304)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (f'{{"number":{n},"status":"available"}}\n' for n in range(2000)),
+            media_type="application/x-ndjson",
+        )
+
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped_and_recorded():
+    client = _client()
+    before = BYTES_IN.value(route="/big")
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == PAYLOAD
+    assert int(response.headers["content-length"]) < BYTES_IN.value(route="/big") - before
+    assert BYTES_OUT.value(route="/big") > 0
+
+
+def test_small_responses_304_and_identity_clients_are_untouched():
+    client = _client()
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert client.get("/not-modified", headers={"Accept-Encoding": "gzip"}).status_code == 304
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    refused = client.get("/big", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+
+
+def test_streaming_response_is_compressed_incrementally():
+    client = _client()
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert len(lines) == 2000
@@ -0,0 +1,67 @@
+import uuid
+
+from fastapi import HTTPException
+import pytest
+
+from app.cqrs.commands import raffles as raffles_commands
+
+
+def _draw_conn(fake_conn, status, sold, stored_winners=()):
+    """Answer apply_draw's statements for a raffle with ``sold`` tickets."""
+    stored_winners = list(stored_winners)
+    winner = stored_winners[0][0] if stored_winners else None
+    return fake_conn(
+        {
+            "FOR UPDATE": [(status, winner)],
+            "FROM raffle_winners": stored_winners,
+            "COUNT(*)": [(len(sold),)],
+            "position = ANY": lambda sql, params: [
+                (*sold[position], position) for position in params[1]
+            ],
+        }
+    )
+
+
+def _sold(count):
+    return [(uuid.uuid4(), uuid.uuid4(), number) for number in range(1, count + 1)]
+
+
+def test_multi_prize_draw_picks_distinct_winners_ranked_from_one(fake_conn):
+    conn = _draw_conn(fake_conn, "open", _sold(10))
+
+    result = raffles_commands.apply_draw(conn, uuid.uuid4(), prizes=4)
+
+    winners = result["winners"]
+    assert [winner["prize_rank"] for winner in winners] == [1, 2, 3, 4]
+    assert len({winner["ticket_id"] for winner in winners}) == 4
+    assert result["winner_ticket_id"] == winners[0]["ticket_id"]
+    insert = next(params for sql, params in conn.executed if "INSERT INTO raffle_winners" in sql)
+    assert insert[1] == [1, 2, 3, 4]
+
+
+def test_draw_needs_at_least_one_sold_ticket_per_prize(fake_conn):
+    conn = _draw_conn(fake_conn, "open", _sold(2))
+
+    with pytest.raises(HTTPException) as exc_info:
+        raffles_commands.apply_draw(conn, uuid.uuid4(), prizes=3)
+
+    assert exc_info.value.status_code == 400
+    assert not any("INSERT" in sql for sql in conn.statements())
+
+
+def test_drawn_raffle_replays_its_stored_winners(fake_conn):
+    stored = [
+        (ticket, participant, number, rank)
+        for rank, (ticket, participant, number) in enumerate(_sold(2), start=1)
+    ]
+    conn = _draw_conn(fake_conn, "drawn", [], stored)
+
+    result = raffles_commands.apply_draw(conn, uuid.uuid4(), prizes=2)
+
+    assert [winner["number"] for winner in result["winners"]] == [1, 2]
+    assert not any("COUNT(*)" in sql for sql in conn.statements())
+
+    with pytest.raises(HTTPException) as exc_info:
+        raffles_commands.apply_draw(conn, uuid.uuid4(), prizes=1)
+    assert exc_info.value.status_code == 409
+    assert exc_info.value.detail["prizes"] == 2
@@ -0,0 +1,116 @@
+import csv
+from decimal import Decimal
+import io
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.api import serialization
+from app.core import security
+from app.cqrs.commands import raffles as raffles_commands
+from app.main import app
+from app.models.schemas import (
+    ParticipantCreate,
+    PurchaseConfirmRequest,
+    RaffleCreateV2,
+    ReservationRequest,
+)
+
+
+@pytest.fixture
+def owner_id(memory_store):
+    return uuid.uuid4()
+
+
+def _sold_raffle(owner_id):
+    raffle = raffles_commands.create_raffle(
+        RaffleCreateV2(
+            title="Export",
+            ticket_price=Decimal("500"),
+            total_tickets=20,
+            number_padding=2,
+            owner_id=owner_id,
+        )
+    )
+    raffle_id = uuid.UUID(raffle["id"])
+    for name, numbers in (("Ana", [7, 2]), ("Beto", [15])):
+        reservation = raffles_commands.reserve_numbers(
+            raffle_id,
+            ReservationRequest(
+                participant=ParticipantCreate(name=name, email=f"{name.lower()}@example.com"),
+                numbers=numbers,
+            ),
+        )
+        raffles_commands.confirm_purchase(
+            raffle_id,
+            PurchaseConfirmRequest(
+                reservation_id=reservation["reservation_id"],
+                participant_id=reservation["participant_id"],
+                payment_method="card",
+            ),
+        )
+    # Reserved but unpaid numbers are not part of the export.
+    raffles_commands.reserve_numbers(
+        raffle_id,
+        ReservationRequest(participant=ParticipantCreate(name="Caro"), numbers=[3]),
+    )
+    return raffle_id
+
+
+def _url(raffle_id):
+    return f"/rifaapp/v2/raffles/{raffle_id}/export"
+
+
+def _auth(user_id):
+    token, _ = security.issue_session_token(user_id)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_owner_exports_sold_numbers_as_csv_and_ndjson(owner_id):
+    raffle_id = _sold_raffle(owner_id)
+    client = TestClient(app)
+
+    response = client.get(_url(raffle_id), headers=_auth(owner_id))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f"raffle-{raffle_id}.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["label"], row["participant_name"]) for row in rows] == [
+        ("02", "Ana"),
+        ("07", "Ana"),
+        ("15", "Beto"),
+    ]
+    assert rows[2]["participant_email"] == "beto@example.com"
+    assert rows[2]["payment_method"] == "card"
+
+    response = client.get(_url(raffle_id), params={"format": "ndjson"}, headers=_auth(owner_id))
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["number"] for line in lines] == [2, 7, 15]
+    assert lines[0]["purchase_id"] == lines[1]["purchase_id"] != lines[2]["purchase_id"]
+
+
+def test_export_requires_the_owner_session(owner_id):
+    raffle_id = _sold_raffle(owner_id)
+    client = TestClient(app)
+
+    assert client.get(_url(raffle_id)).status_code == 401
+    response = client.get(_url(raffle_id), headers=_auth(uuid.uuid4()))
+    assert response.status_code == 403
+    response = client.get(_url(uuid.uuid4()), headers=_auth(owner_id))
+    assert response.status_code == 404
+    response = client.get(_url(raffle_id), params={"format": "xml"}, headers=_auth(owner_id))
+    assert response.status_code == 422
+
+
+def test_stream_encoders_batch_rows_into_chunks(monkeypatch):
+    monkeypatch.setattr(serialization, "STREAM_CHUNK_BYTES", 64)
+    rows = ({"number": n, "label": f"{n:03d}", "purchase_id": None} for n in range(20))
+
+    chunks = list(serialization.iter_csv(rows, ("number", "label", "purchase_id")))
+
+    assert 1 < len(chunks) < 21
+    assert b"".join(chunks).decode().splitlines()[:2] == ["number,label,purchase_id", "0,000,"]
+    assert list(serialization.iter_ndjson([])) == []
@@ -0,0 +1,68 @@
+from decimal import Decimal
+import json
+import uuid
+
+from fastapi import HTTPException
+import pytest
+
+from app.cqrs.commands import idempotency
+from app.models.schemas import ParticipantCreate, ReservationRequest
+
+
+def _payload(numbers):
+    return ReservationRequest(participant=ParticipantCreate(name="Ana"), numbers=numbers)
+
+
+def test_fingerprint_depends_on_payload():
+    assert idempotency.fingerprint(_payload([1, 2])) == idempotency.fingerprint(_payload([1, 2]))
+    assert idempotency.fingerprint(_payload([1, 2])) != idempotency.fingerprint(_payload([2, 1]))
+
+
+def test_guard_without_key_is_a_no_op():
+    handler = lambda conn: {}
+    assert idempotency.guard(handler, "reserve", "reserve:x", None, "fp") is handler
+
+
+def test_first_request_runs_handler_and_stores_response(fake_conn):
+    calls = []
+
+    def handler(conn):
+        calls.append(conn)
+        return {"reservation_id": "r1", "total_price": Decimal("10.00")}
+
+    conn = fake_conn({"INSERT INTO idempotency_keys": [(1,)]})
+    result = idempotency.guard(handler, "reserve", "reserve:x", "key-1", "fp")(conn)
+
+    assert result["reservation_id"] == "r1"
+    assert calls == [conn]
+    stored_sql, stored_params = conn.executed[-1]
+    assert stored_sql.startswith("UPDATE idempotency_keys")
+    assert json.loads(stored_params[0]) == {"reservation_id": "r1", "total_price": "10.00"}
+
+
+def test_concurrent_retry_replays_committed_response_without_running_handler(fake_conn):
+    stored = {"reservation_id": "r1"}
+    conn = fake_conn({"SELECT fingerprint": [("fp", stored)]})
+    wrapped = idempotency.guard(lambda conn: pytest.fail("handler ran"), "reserve", "s", "k", "fp")
+
+    assert wrapped(conn) == stored
+
+
+def test_key_reused_with_different_payload_is_rejected(fake_conn):
+    conn = fake_conn({"SELECT fingerprint": [("other", {"reservation_id": "r1"})]})
+    wrapped = idempotency.guard(lambda conn: pytest.fail("handler ran"), "reserve", "s", "k", "fp")
+
+    with pytest.raises(HTTPException) as exc_info:
+        wrapped(conn)
+    assert exc_info.value.status_code == 422
+
+
+def test_lookup_replays_without_a_transaction(monkeypatch):
+    raffle_id = uuid.uuid4()
+    monkeypatch.setattr(
+        idempotency,
+        "fetch_one",
+        lambda sql, params: {"fingerprint": "fp", "response": {"raffle_id": str(raffle_id)}},
+    )
+    assert idempotency.lookup("reserve", "s", None, "fp") is None
+    assert idempotency.lookup("reserve", "s", "k", "fp") == {"raffle_id": str(raffle_id)}
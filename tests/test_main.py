@@ -0,0 +1,36 @@
+from dataclasses import replace
+
+import app.main as main
+from app.cqrs.commands import auto_draw
+
+
+def test_warmup_event_short_circuits_handler(monkeypatch):
+    monkeypatch.setattr(main, "_mangum", None)
+
+    assert main.handler({"warmup": True}, None) == {"warmed": True}
+    assert main.handler({"source": "serverless-plugin-warmup"}, None) == {"warmed": True}
+    assert main._mangum is None
+
+
+def test_handler_serves_api_gateway_events(api_gateway_event):
+    response = main.handler(api_gateway_event("/rifaapp/health"), None)
+
+    assert response["statusCode"] == 200
+    assert main._mangum is not None
+
+
+def test_lambda_handler_never_starts_the_auto_draw_loop(
+    monkeypatch, caplog, api_gateway_event
+):
+    # On Lambda auto-draw runs as the scheduled auto-draw CLI, not in-process.
+    monkeypatch.setattr(main, "_mangum", None)
+    monkeypatch.setattr(main, "settings", replace(main.settings, auto_draw_interval_seconds=5))
+    started = []
+    monkeypatch.setattr(auto_draw, "start_background_loop", lambda: started.append(True))
+
+    with caplog.at_level("WARNING", logger="rifaapp"):
+        response = main.handler(api_gateway_event("/rifaapp/health"), None)
+
+    assert response["statusCode"] == 200
+    assert started == []
+    assert "run the auto-draw CLI on a schedule" in caplog.text
@@ -0,0 +1,138 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import threading
+import uuid
+
+from fastapi import HTTPException
+import pytest
+
+from app.cqrs.commands import raffles as raffles_commands
+from app.cqrs.queries import purchases as purchases_queries
+from app.cqrs.queries import raffles as raffles_queries
+from app.models.schemas import (
+    ParticipantCreate,
+    PurchaseConfirmRequest,
+    RaffleCreateV2,
+    ReservationRequest,
+)
+from app.storage import memory
+
+
+def _raffle(total_tickets=10, **overrides):
+    payload = RaffleCreateV2(
+        title="Memory raffle", ticket_price=Decimal("1000"), total_tickets=total_tickets, **overrides
+    )
+    return uuid.UUID(raffles_commands.create_raffle(payload)["id"])
+
+
+def _reserve(raffle_id, email="ana@example.com", **selection):
+    payload = ReservationRequest(
+        participant=ParticipantCreate(name="Ana", email=email), **selection
+    )
+    return raffles_commands.reserve_numbers(raffle_id, payload)
+
+
+def _confirm(reservation):
+    payload = PurchaseConfirmRequest(
+        reservation_id=reservation["reservation_id"],
+        participant_id=reservation["participant_id"],
+    )
+    return raffles_commands.confirm_purchase(uuid.UUID(reservation["raffle_id"]), payload)
+
+
+def test_reserve_conflict_and_release(memory_store):
+    raffle_id = _raffle()
+    reservation = _reserve(raffle_id, numbers=[3, 1])
+    assert reservation["numbers"] == [1, 3]
+    assert reservation["total_price"] == Decimal("2000")
+
+    with pytest.raises(HTTPException) as exc:
+        _reserve(raffle_id, email="beto@example.com", numbers=[3, 4])
+    assert exc.value.status_code == 409
+    assert exc.value.detail["numbers"] == [3]
+    with pytest.raises(HTTPException) as exc:
+        _reserve(raffle_id, numbers=[11])
+    assert exc.value.detail == "Number out of range"
+
+    assert raffles_queries.get_raffle(raffle_id)["tickets_reserved"] == 2
+    released = raffles_commands.release_reservation(raffle_id, reservation["reservation_id"])
+    assert released == {"status": "released", "released": 2}
+    assert raffles_queries.list_numbers(raffle_id)["counts"]["available"] == 10
+
+
+def test_expired_reservations_are_released_and_cannot_be_confirmed(memory_store):
+    raffle_id = _raffle()
+    reservation = _reserve(raffle_id, numbers=[5])
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    memory_store._raffles[raffle_id].tickets[5].reserved_until = past
+
+    assert raffles_queries.list_numbers(raffle_id)["counts"]["reserved"] == 0
+    with pytest.raises(HTTPException) as exc:
+        _confirm(reservation)
+    assert exc.value.detail == "Reservation expired or not found"
+    assert _reserve(raffle_id, email="beto@example.com", numbers=[5])["numbers"] == [5]
+
+
+def test_selling_out_closes_the_raffle_and_draw_is_stable(memory_store):
+    raffle_id = _raffle(total_tickets=3)
+    purchase = _confirm(_reserve(raffle_id, count=3))
+    assert purchase["numbers"] == [1, 2, 3]
+
+    raffle = raffles_queries.get_raffle(raffle_id)
+    assert (raffle["status"], raffle["tickets_sold"]) == ("closed", 3)
+    bought = purchases_queries.list_purchases(uuid.UUID(purchase["participant_id"]))
+    assert bought[0]["numbers"] == [1, 2, 3]
+
+    with pytest.raises(HTTPException) as exc:
+        raffles_commands.draw_raffle(raffle_id, prizes=4)
+    assert exc.value.status_code == 400
+    draw = raffles_commands.draw_raffle(raffle_id, prizes=2)
+    assert sorted(w["prize_rank"] for w in draw["winners"]) == [1, 2]
+    assert raffles_commands.draw_raffle(raffle_id, prizes=2) == draw
+    with pytest.raises(HTTPException) as exc:
+        raffles_commands.draw_raffle(raffle_id, prizes=1)
+    assert exc.value.status_code == 409
+    assert raffles_queries.get_raffle(raffle_id)["winners"] == draw["winners"]
+
+
+def test_concurrent_reservations_never_share_a_number(memory_store):
+    raffle_id = _raffle(total_tickets=200)
+    taken: list[int] = []
+    errors: list[int] = []
+
+    def _buyer(index):
+        try:
+            taken.extend(_reserve(raffle_id, email=f"b{index}@example.com", count=5)["numbers"])
+        except HTTPException as exc:
+            errors.append(exc.status_code)
+
+    threads = [threading.Thread(target=_buyer, args=(index,)) for index in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(taken) == len(set(taken)) == 200
+    assert errors == [409] * 10
+
+
+def test_idempotency_state_is_pruned(memory_store, monkeypatch):
+    raffle_id = _raffle(total_tickets=20)
+
+    def _keyed(key, number):
+        payload = ReservationRequest(participant=ParticipantCreate(name="Ana"), numbers=[number])
+        return raffles_commands.reserve_numbers(raffle_id, payload, idempotency_key=key)
+
+    first = _keyed("k1", 1)
+    assert _keyed("k1", 1) == first
+    # The per-key lock goes once the response is stored.
+    assert memory_store._key_locks == {}
+
+    monkeypatch.setattr(memory_store, "max_stored_responses", 1)
+    _keyed("k2", 2)
+    assert [key for _, key in memory_store._responses] == ["k2"]
+
+    monkeypatch.setattr(memory, "settings", replace(memory.settings, idempotency_ttl_seconds=0))
+    _keyed("k3", 3)
+    assert memory_store._responses == {}
@@ -0,0 +1,43 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.timing import REQUEST_DB_QUERIES, TimingMiddleware
+from app.core import metrics, timing
+
+
+def test_render_prometheus_histogram_and_counter():
+    counter = metrics.counter("rifaapp_test_events_total", "Test events")
+    histogram = metrics.histogram("rifaapp_test_latency_seconds", "Test latency", buckets=(0.1, 1))
+    counter.reset()
+    histogram.reset()
+    counter.inc(route='/a"b')
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE rifaapp_test_events_total counter" in text
+    assert 'rifaapp_test_events_total{route="/a\\"b"} 1' in text
+    assert 'rifaapp_test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'rifaapp_test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'rifaapp_test_latency_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'rifaapp_test_latency_seconds_count{route="/a"} 2' in text
+
+
+def test_timing_middleware_reports_db_time_from_sync_endpoints():
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        timing.record_query(0.002)
+        timing.record_query(0.003)
+        return {"id": item_id}
+
+    before = REQUEST_DB_QUERIES.count(route="/items/{item_id}")
+    response = TestClient(app).get("/items/1")
+
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("app;dur=")
+    assert 'db;dur=5.0;desc="2 queries"' in server_timing
+    assert REQUEST_DB_QUERIES.count(route="/items/{item_id}") == before + 1
@@ -67,3 +67,87 @@ def test_ensure_migrations_runs_once(monkeypatch):
     migrations.ensure_migrations()
 
     assert counter["count"] == 1
+
+
+def _ledger_conn(fake_conn, ledger):
+    """A connection whose rifaapp_migrations table holds ``ledger`` (None: no table)."""
+
+    def _select(sql, params):
+        if conn.ledger is None:
+            import pg8000.dbapi as pgapi
+
+            raise pgapi.ProgrammingError({"C": "42P01", "M": "relation does not exist"})
+        return list(conn.ledger.items())
+
+    def _create(sql, params):
+        conn.ledger = {} if conn.ledger is None else conn.ledger
+        return []
+
+    def _insert(sql, params):
+        conn.ledger[params[0]] = params[1]
+        return []
+
+    conn = fake_conn(
+        {
+            "SELECT name, checksum": _select,
+            "CREATE TABLE IF NOT EXISTS rifaapp_migrations": _create,
+            "INSERT INTO rifaapp_migrations": _insert,
+        }
+    )
+    conn.autocommit = False
+    conn.ledger = ledger
+    return conn
+
+
+def _fallback_repo(tmp_path):
+    (tmp_path / "sqitch" / "deploy").mkdir(parents=True)
+    (tmp_path / "sqitch.plan").write_text("%project=rifaapp\n\ninit # base\nextra # more\n")
+    (tmp_path / "sqitch" / "deploy" / "init.sql").write_text("CREATE TABLE a (id int);")
+    (tmp_path / "sqitch" / "deploy" / "extra.sql").write_text("CREATE TABLE b (id int);")
+
+
+def _run_fallback(monkeypatch, fake_conn, tmp_path, ledger):
+    conn = _ledger_conn(fake_conn, ledger)
+    monkeypatch.setenv("SQITCH_DIR", str(tmp_path))
+    monkeypatch.setattr(migrations, "_connect_direct", lambda: conn)
+    migrations._run_sql_migrations()
+    return conn
+
+
+def test_sql_fallback_applies_each_change_once(monkeypatch, fake_conn, tmp_path):
+    _fallback_repo(tmp_path)
+    first = _run_fallback(monkeypatch, fake_conn, tmp_path, None)
+    assert "CREATE TABLE a (id int);" in first.statements()
+    assert "CREATE TABLE b (id int);" in first.statements()
+    assert first.statements()[1] == "SELECT pg_advisory_lock(%s)"
+    assert first.statements()[-1] == "SELECT pg_advisory_unlock(%s)"
+
+    second = _run_fallback(monkeypatch, fake_conn, tmp_path, first.ledger)
+    assert second.statements() == ["SELECT name, checksum FROM rifaapp_migrations"]
+
+
+def test_sql_fallback_never_replays_a_changed_deployed_file(monkeypatch, fake_conn, tmp_path, caplog):
+    _fallback_repo(tmp_path)
+    ledger = _run_fallback(monkeypatch, fake_conn, tmp_path, None).ledger
+    applied = dict(ledger)
+    (tmp_path / "sqitch" / "deploy" / "init.sql").write_text("DROP TABLE a;")
+
+    conn = _run_fallback(monkeypatch, fake_conn, tmp_path, ledger)
+    assert conn.statements() == ["SELECT name, checksum FROM rifaapp_migrations"]
+    assert conn.ledger == applied
+    assert "init.sql changed on disk" in caplog.text
+
+
+def test_sql_fallback_applies_only_new_changes(monkeypatch, fake_conn, tmp_path):
+    _fallback_repo(tmp_path)
+    ledger = _run_fallback(monkeypatch, fake_conn, tmp_path, None).ledger
+    (tmp_path / "sqitch.plan").write_text(
+        "%project=rifaapp\n\ninit # base\nextra # more\nlast # newest\n"
+    )
+    (tmp_path / "sqitch" / "deploy" / "last.sql").write_text("CREATE TABLE c (id int);")
+
+    conn = _run_fallback(monkeypatch, fake_conn, tmp_path, ledger)
+    assert "CREATE TABLE c (id int);" in conn.statements()
+    assert "CREATE TABLE a (id int);" not in conn.statements()
+    assert "CREATE TABLE b (id int);" not in conn.statements()
+    assert set(conn.ledger) == {"init", "extra", "last"}
@@ -0,0 +1,151 @@
+import base64
+from datetime import datetime, timezone
+from decimal import Decimal
+import uuid
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.cqrs.commands import raffles as raffles_commands
+from app.main import app
+from app.models.schemas import (
+    ParticipantCreate,
+    PurchaseConfirmRequest,
+    RaffleCreateV2,
+    RaffleUpdateV2,
+    ReservationRequest,
+)
+from app.storage import postgres
+
+
+@pytest.fixture
+def owner_id(memory_store):
+    return uuid.uuid4()
+
+
+def _create(owner_id, title):
+    raffle = raffles_commands.create_raffle(
+        RaffleCreateV2(
+            title=title, ticket_price=Decimal("100"), total_tickets=10, owner_id=owner_id
+        )
+    )
+    return uuid.UUID(raffle["id"])
+
+
+def _url(owner_id):
+    return f"/rifaapp/v2/owners/{owner_id}/raffles"
+
+
+def test_owner_raffles_are_paginated_newest_first(owner_id):
+    created = [_create(owner_id, f"Rifa {i}") for i in range(5)]
+    _create(uuid.uuid4(), "Someone else's")
+    client = TestClient(app)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get(_url(owner_id), params=params).json()
+        assert len(page["items"]) <= 2
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [str(raffle_id) for raffle_id in reversed(created)]
+
+
+def test_owner_raffles_filter_by_status_and_carry_counts(owner_id):
+    sold = _create(owner_id, "Vendida")
+    closed = _create(owner_id, "Cerrada")
+    raffles_commands.update_raffle(closed, RaffleUpdateV2(status="closed"), owner_id)
+    reservation = raffles_commands.reserve_numbers(
+        sold, ReservationRequest(participant=ParticipantCreate(name="Ana"), numbers=[1, 2])
+    )
+    raffles_commands.confirm_purchase(
+        sold,
+        PurchaseConfirmRequest(
+            reservation_id=reservation["reservation_id"],
+            participant_id=reservation["participant_id"],
+        ),
+    )
+    raffles_commands.reserve_numbers(
+        sold, ReservationRequest(participant=ParticipantCreate(name="Beto"), numbers=[3])
+    )
+    client = TestClient(app)
+
+    page = client.get(_url(owner_id), params={"status": ["published"]}).json()
+    assert [item["id"] for item in page["items"]] == [str(sold)]
+    assert page["items"][0]["tickets_sold"] == 2
+    assert page["items"][0]["tickets_reserved"] == 1
+
+    page = client.get(_url(owner_id), params={"status": ["open", "closed"]}).json()
+    assert len(page["items"]) == 2
+    assert page["next_cursor"] is None
+
+
+def test_owner_raffles_reject_bad_cursors_and_limits(owner_id):
+    client = TestClient(app)
+
+    response = client.get(_url(owner_id), params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+    assert client.get(_url(owner_id), params={"limit": 101}).status_code == 422
+    assert client.get(_url(owner_id)).json() == {"items": [], "next_cursor": None}
+
+
+def test_naive_cursor_timestamps_are_rejected(owner_id):
+    cursor = base64.urlsafe_b64encode(f"2026-01-01T00:00:00|{uuid.uuid4()}".encode()).decode()
+
+    response = TestClient(app).get(_url(owner_id), params={"cursor": cursor})
+
+    assert response.status_code == 400
+
+
+def test_postgres_owner_listing_uses_the_keyset_and_status_filter(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        postgres, "fetch_all", lambda sql, params, row_factory: calls.append((sql, params)) or []
+    )
+    owner = uuid.uuid4()
+    after = (datetime(2026, 5, 1, tzinfo=timezone.utc), uuid.uuid4())
+
+    postgres.PostgresStore().owner_raffle_rows(owner, ["open", "closed"], after, 21)
+    postgres.PostgresStore().owner_raffle_rows(owner, None, None, 5)
+
+    sql, params = calls[0]
+    assert sql.endswith(
+        " WHERE r.owner_id = %s AND r.status = ANY(%s)"
+        " AND (r.created_at, r.id) < (%s, %s)"
+        " ORDER BY r.created_at DESC, r.id DESC LIMIT %s"
+    )
+    assert params == (owner, ["open", "closed"], *after, 21)
+    sql, params = calls[1]
+    assert "ANY" not in sql and "r.created_at, r.id) <" not in sql
+    assert params == (owner, 5)
+
+
+def test_confirm_keeps_the_sold_counter_on_the_read_row(fake_conn):
+    raffle_id = uuid.uuid4()
+    conn = fake_conn(
+        {
+            "SELECT total_tickets": [(10, "open", Decimal("100"), "COP")],
+            "SELECT id, number FROM tickets": [(uuid.uuid4(), 4), (uuid.uuid4(), 9)],
+            "SELECT COUNT(*)": [(7,)],
+            "SELECT created_at": [(datetime(2026, 5, 1, tzinfo=timezone.utc),)],
+            "SELECT title, status": [("Rifa", "open")],
+        }
+    )
+
+    raffles_commands.confirm_in_transaction(conn, raffle_id, "reservation", uuid.uuid4(), "card")
+
+    update = [
+        (sql, params) for sql, params in conn.executed if sql.startswith("UPDATE raffles_read")
+    ]
+    assert update == [
+        (
+            "UPDATE raffles_read SET status = %s, tickets_sold = %s, updated_at = now() "
+            "WHERE id = %s",
+            ("open", 7, raffle_id),
+        )
+    ]
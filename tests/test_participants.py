@@ -0,0 +1,43 @@
+import uuid
+
+import pytest
+
+from app.cqrs.commands import participants
+from app.models.schemas import ParticipantCreate
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    participants._PARTICIPANT_IDS.clear()
+    yield
+    participants._PARTICIPANT_IDS.clear()
+
+
+def test_upsert_uses_single_statement_and_skips_cache_for_new_rows(fake_conn):
+    participant_id = uuid.uuid4()
+    conn = fake_conn({"INSERT INTO participants": [(participant_id, True)]})
+    buyer = ParticipantCreate(name="Ana", email="ana@example.com")
+
+    assert participants.get_or_create_participant(conn, buyer) == participant_id
+    assert len(conn.executed) == 1
+    assert "ON CONFLICT (email)" in conn.executed[0][0]
+    assert len(participants._PARTICIPANT_IDS) == 0
+
+
+def test_returning_buyer_is_served_from_cache(fake_conn):
+    participant_id = uuid.uuid4()
+    buyer = ParticipantCreate(name="Ana", email="ana@example.com")
+    returning = fake_conn({"INSERT INTO participants": [(participant_id, False)]})
+    participants.get_or_create_participant(returning, buyer)
+
+    conn = fake_conn()
+    assert participants.get_or_create_participant(conn, buyer) == participant_id
+    assert conn.executed == []
+
+
+def test_participant_without_email_is_always_inserted(fake_conn):
+    conn = fake_conn()
+    participant_id = participants.get_or_create_participant(conn, ParticipantCreate(name="Ana"))
+
+    assert isinstance(participant_id, uuid.UUID)
+    assert conn.statements("INSERT INTO participants")
@@ -0,0 +1,92 @@
+from app.db import partitioning
+
+
+def test_scanned_relations_walks_nested_plans():
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Plans": [
+                    {
+                        "Node Type": "Index Scan",
+                        "Relation Name": "raffle_numbers_read_p3",
+                        "Index Name": "raffle_numbers_read_p3_pkey",
+                    }
+                ],
+            }
+        }
+    ]
+    assert partitioning.scanned_relations(plan) == {"raffle_numbers_read_p3"}
+
+
+def test_only_a_single_partition_counts_as_pruned():
+    assert partitioning.is_pruned("tickets", ["tickets_p7"])
+    assert not partitioning.is_pruned("tickets", ["tickets_p1", "tickets_p7"])
+    # Not partitioned yet: the plan scans the plain table.
+    assert not partitioning.is_pruned("tickets", ["tickets"])
+    assert not partitioning.is_pruned("tickets", ["tickets_partitioned"])
+    assert not partitioning.is_pruned("tickets", ["tickets_p7_old"])
+
+
+def test_partitioned_keys_include_the_partition_key():
+    for spec in partitioning.SPECS.values():
+        assert spec.key[0] == "raffle_id"
+        primary = next(c for c in spec.constraints if c.startswith("PRIMARY KEY"))
+        assert primary == f"PRIMARY KEY ({', '.join(spec.key)})"
+
+
+def _fake_db(monkeypatch, fake_conn, responses=None):
+    conn = fake_conn(responses)
+    monkeypatch.setattr(partitioning, "run_transaction", lambda handler, operation: handler(conn))
+    return conn
+
+
+def test_prepare_resumes_an_existing_shadow(monkeypatch, fake_conn):
+    conn = _fake_db(monkeypatch, fake_conn, {"SELECT relkind": [("p",)]})
+
+    assert partitioning.prepare(partitioning.TICKETS, 8) is True
+
+    statements = conn.statements()
+    assert not any(
+        "PARTITION OF" in sql or "DELETE FROM rifaapp_partition_progress" in sql
+        for sql in statements
+    )
+    trigger = "CREATE OR REPLACE TRIGGER tickets_partition_sync"
+    assert any(sql.startswith(trigger) for sql in statements)
+
+
+def test_fresh_prepare_is_idempotent_ddl(monkeypatch, fake_conn):
+    conn = _fake_db(monkeypatch, fake_conn)
+
+    assert partitioning.prepare(partitioning.RAFFLE_NUMBERS_READ, 4) is False
+
+    ddl = conn.statements("CREATE")
+    assert all("IF NOT EXISTS" in sql or sql.startswith("CREATE OR REPLACE") for sql in ddl)
+    assert sum("PARTITION OF raffle_numbers_read_partitioned" in sql for sql in ddl) == 4
+
+
+def test_backfill_resumes_from_the_checkpoint(monkeypatch, fake_conn):
+    conn = _fake_db(
+        monkeypatch,
+        fake_conn,
+        {
+            "FROM rifaapp_partition_progress": [("raffle-a", "41")],
+            "WITH batch AS": [(2, "raffle-b", 7)],
+        },
+    )
+
+    copied = partitioning.backfill(partitioning.RAFFLE_NUMBERS_READ, batch_size=5)
+
+    assert copied == 2
+    copy_sql, copy_params = conn.executed[1]
+    assert "WHERE (raffle_id, number) > (%s, %s)" in copy_sql
+    assert copy_params == ("raffle-a", "41", 5)
+    assert conn.executed[2][1] == ("raffle_numbers_read", "raffle-b", "7")
+
+
+def test_swap_passes_lock_timeout_as_a_parameter(monkeypatch, fake_conn):
+    conn = _fake_db(monkeypatch, fake_conn)
+
+    partitioning.swap(partitioning.TICKETS, lock_timeout="3s")
+
+    assert conn.executed[0] == ("SELECT set_config('lock_timeout', %s, true)", ("3s",))
@@ -0,0 +1,110 @@
+import asyncio
+from collections import Counter
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import profiling as app_profiling
+from app.api.profiling import PROFILE_HEADER, ProfilingMiddleware
+from app.api.serialization import FastJSONResponse
+from app.core import profiling
+
+PAYLOAD = {"numbers": [{"number": n, "status": "available"} for n in range(2000)]}
+
+
+def _client(tmp_path, **options) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        ProfilingMiddleware,
+        sampler=profiling.StackSampler(interval=0.001, max_overhead=0.5),
+        directory=str(tmp_path),
+        **options,
+    )
+
+    @app.get("/raffles/{raffle_id}/numbers")
+    def numbers(raffle_id: int):
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            response = FastJSONResponse(PAYLOAD)
+        return response
+
+    return TestClient(app)
+
+
+def test_sampled_requests_write_collapsed_stacks_per_route(tmp_path):
+    client = _client(tmp_path, sample_rate=1.0)
+
+    assert client.get("/raffles/1/numbers").status_code == 200
+    assert client.get("/raffles/2/numbers").status_code == 200
+
+    folded = tmp_path / "GET_raffles_raffle_id_numbers.folded"
+    lines = folded.read_text().splitlines()
+    assert lines
+    assert any("app.api.serialization:FastJSONResponse.render" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_stacks_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    writers = []
+    write = profiling.write_collapsed
+
+    def _recording_write(*args):
+        try:
+            asyncio.get_running_loop()
+            writers.append("event loop")
+        except RuntimeError:
+            writers.append("worker thread")
+        return write(*args)
+
+    monkeypatch.setattr(app_profiling, "write_collapsed", _recording_write)
+    client = _client(tmp_path, sample_rate=1.0)
+    assert client.get("/raffles/1/numbers").status_code == 200
+    assert writers == ["worker thread"]
+
+
+
+def test_profiles_are_merged_per_stack_and_capped(tmp_path):
+    folded = profiling.write_collapsed(str(tmp_path), "GET /x", Counter({"a;b": 2}))
+    profiling.write_collapsed(str(tmp_path), "GET /x", Counter({"a;b": 3, "a": 1}))
+    assert folded.read_text().splitlines() == ["a;b 5", "a 1"]
+
+    profiling.write_collapsed(str(tmp_path), "GET /x", Counter({"c": 4, "d": 1}), max_stacks=2)
+    assert folded.read_text().splitlines() == ["a;b 5", "c 4"]
+    assert [path.name for path in tmp_path.iterdir()] == ["GET_x.folded"]
+
+
+def test_only_signed_headers_enable_profiling_when_not_sampling(tmp_path):
+    client = _client(tmp_path, secret="s3cret")
+
+    client.get("/raffles/1/numbers", headers={PROFILE_HEADER: "9999999999.forged"})
+    assert not list(tmp_path.iterdir())
+
+    token = profiling.issue_profile_token("s3cret", ttl_seconds=60)
+    client.get("/raffles/1/numbers", headers={PROFILE_HEADER: token})
+    assert list(tmp_path.iterdir())
+
+
+def test_profile_tokens_expire_and_are_bound_to_the_secret():
+    token = profiling.issue_profile_token("s3cret", ttl_seconds=60)
+
+    assert profiling.verify_profile_token("s3cret", token)
+    assert not profiling.verify_profile_token("other", token)
+    assert not profiling.verify_profile_token("", token)
+    assert not profiling.verify_profile_token("s3cret", profiling.issue_profile_token("s3cret", -1))
+
+
+def test_malformed_profile_headers_are_ignored(tmp_path):
+    client = _client(tmp_path, secret="s3cret")
+
+    for header in ("².x", "9999999999.\xe9", "9999999999", ".", "-1.x"):
+        assert not profiling.verify_profile_token("s3cret", header)
+        # Header values reach the app decoded as latin-1.
+        response = client.get("/raffles/1/numbers", headers={PROFILE_HEADER: header.encode("latin-1")})
+        assert response.status_code == 200
+    assert not list(tmp_path.iterdir())
+
+
+def test_collapse_skips_stacks_outside_the_request_path():
+    assert profiling.collapse(sys._getframe()) is None
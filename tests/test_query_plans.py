@@ -0,0 +1,75 @@
+from app.cqrs.commands import auto_draw
+from app.cqrs.queries import auth as auth_queries
+from app.db import connection
+from app.storage import postgres
+from benchmarks.query_plans import Budget, _routed, check_plan, plan_shape
+
+
+def _plan(root, execution_ms=1.0):
+    return [{"Plan": root, "Planning Time": 0.1, "Execution Time": execution_ms}]
+
+
+def test_check_plan_flags_seq_scans_on_large_tables_only():
+    plan = _plan(
+        {
+            "Node Type": "Hash Join",
+            "Shared Hit Blocks": 40,
+            "Shared Read Blocks": 2,
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "raffles_read"},
+                {"Node Type": "Seq Scan", "Relation Name": "raffle_numbers_read_p3"},
+            ],
+        }
+    )
+
+    assert check_plan(plan, Budget(max_ms=10, max_buffers=100)) == [
+        "seq scan on raffle_numbers_read_p3"
+    ]
+
+
+def test_check_plan_flags_random_sorts_and_budgets():
+    plan = _plan(
+        {
+            "Node Type": "Limit",
+            "Shared Hit Blocks": 900,
+            "Plans": [
+                {
+                    "Node Type": "Sort",
+                    "Sort Key": ["(random())"],
+                    "Plans": [{"Node Type": "Index Scan", "Index Name": "tickets_raffle_id_number_key"}],
+                }
+            ],
+        },
+        execution_ms=80.0,
+    )
+
+    assert check_plan(plan, Budget(max_ms=25, max_buffers=500)) == [
+        "sort by random()",
+        "900 buffers > 500",
+        "80.0 ms > 25 ms",
+    ]
+    assert plan_shape(plan) == [
+        "Index Scan:tickets_raffle_id_number_key",
+        "Limit:",
+        "Sort:",
+    ]
+
+
+def test_routed_runs_every_path_on_the_explaining_connection(fake_conn):
+    conn = fake_conn(
+        {"FROM users": [("user-1", "Ana")], "FROM tickets": [(1,), (2,)]},
+        description=[("id",), ("name",)],
+    )
+
+    with _routed(conn):
+        assert auto_draw.run_transaction(lambda tx: tx, operation="auto_draw") is conn
+        assert auth_queries.fetch_one("SELECT id, name FROM users") == {"id": "user-1", "name": "Ana"}
+        assert len(list(postgres.stream_rows("SELECT number FROM tickets"))) == 2
+
+    assert [sql for sql, _ in conn.executed] == [
+        "SELECT id, name FROM users",
+        "SELECT number FROM tickets",
+    ]
+    assert auth_queries.fetch_one is connection.fetch_one
+    assert postgres.stream_rows is connection.stream_rows
+    assert auto_draw.run_transaction is connection.run_transaction
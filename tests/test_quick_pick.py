@@ -0,0 +1,35 @@
+import uuid
+
+from fastapi import HTTPException
+import pytest
+
+from app.cqrs.commands import raffles
+
+
+def _cursor(fake_conn, rows):
+    return fake_conn({"FROM raffle_numbers_read": rows}).cursor()
+
+
+def test_quick_pick_samples_distinct_numbers_from_the_window(fake_conn):
+    cur = _cursor(fake_conn, [(n,) for n in range(40, 60)])
+    picked = raffles._pick_available_numbers(cur, uuid.uuid4(), 5, 1, 100)
+
+    assert len(set(picked)) == 5
+    assert all(40 <= number < 60 for number in picked)
+    # Window is count * QUICK_PICK_SPREAD rows from each side of the pivot.
+    assert cur.conn.executed[0][1][2] == 5 * raffles.QUICK_PICK_SPREAD
+
+
+def test_quick_pick_conflicts_when_raffle_is_nearly_sold_out(fake_conn):
+    cur = _cursor(fake_conn, [(7,), (93,)])
+    with pytest.raises(HTTPException) as exc_info:
+        raffles._pick_available_numbers(cur, uuid.uuid4(), 3, 1, 100)
+    assert exc_info.value.status_code == 409
+    assert exc_info.value.detail["available"] == 2
+
+
+@pytest.mark.parametrize("numbers, count", [(None, None), ([1], 1), ([1, 1], None)])
+def test_reservation_needs_exactly_one_selection(numbers, count):
+    with pytest.raises(HTTPException) as exc_info:
+        raffles.check_reservation_selection(numbers, count)
+    assert exc_info.value.status_code == 400
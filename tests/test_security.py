@@ -0,0 +1,105 @@
+from dataclasses import replace
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+import app.core.security as security
+
+
+@pytest.fixture
+def thread_hasher(monkeypatch):
+    security.shutdown_hasher()
+    monkeypatch.setattr(
+        security,
+        "settings",
+        replace(security.settings, password_hash_executor="thread", password_hash_max_pending=1),
+    )
+    yield
+    security.shutdown_hasher()
+
+
+def test_bounded_hash_matches_inline_hash(thread_hasher):
+    salt = b"s" * 16
+    assert security.hash_password_bounded("secret-pass", salt) == security.hash_password(
+        "secret-pass", salt
+    )
+    assert security.HASH_QUEUE_DEPTH.value() == 0
+
+
+def test_bounded_hash_rejects_when_queue_is_full(thread_hasher, monkeypatch):
+    monkeypatch.setattr(security, "_PENDING", 1)
+    rejected = security.HASH_REJECTED.value()
+
+    with pytest.raises(HTTPException) as exc_info:
+        security.hash_password_bounded("secret-pass", b"s" * 16)
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
+    assert security.HASH_REJECTED.value() == rejected + 1
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes(thread_hasher, monkeypatch):
+    monkeypatch.setattr(
+        security,
+        "settings",
+        replace(security.settings, password_hash_timeout_seconds=0.01),
+    )
+    finish = threading.Event()
+    monkeypatch.setattr(security, "hash_password", lambda password, salt: finish.wait(2))
+
+    with pytest.raises(HTTPException) as exc_info:
+        security.hash_password_bounded("secret-pass", b"s" * 16)
+    assert exc_info.value.status_code == 503
+    assert security.HASH_QUEUE_DEPTH.value() == 1
+
+    finish.set()
+    security.shutdown_hasher()
+    assert security.HASH_QUEUE_DEPTH.value() == 0
+
+
+def test_session_token_round_trip():
+    user_id = uuid.uuid4()
+    token, expires_at = security.issue_session_token(user_id)
+
+    assert security.verify_session_token(token) == user_id
+    assert expires_at.timestamp() > time.time()
+
+
+def test_session_token_rejects_tampering():
+    token, _ = security.issue_session_token(uuid.uuid4())
+    payload, signature = token.split(".")
+    forged_payload = security._b64encode(
+        ('{"sub":"%s","exp":9999999999}' % uuid.uuid4()).encode("utf-8")
+    )
+
+    for bad in (f"{forged_payload}.{signature}", f"{payload}.x{signature}", "garbage", "ñ.ñ"):
+        with pytest.raises(HTTPException) as exc_info:
+            security.verify_session_token(bad)
+        assert exc_info.value.status_code == 401
+
+
+def test_session_token_expiry_is_checked_on_cache_hits(monkeypatch):
+    token, _ = security.issue_session_token(uuid.uuid4())
+    security.verify_session_token(token)
+    monkeypatch.setattr(security.time, "time", lambda: 10**11)
+
+    with pytest.raises(HTTPException) as exc_info:
+        security.verify_session_token(token)
+    assert exc_info.value.detail == "Session token expired"
+
+
+def test_session_tokens_need_a_configured_secret(monkeypatch):
+    token, _ = security.issue_session_token(uuid.uuid4())
+    monkeypatch.setattr(security, "settings", replace(security.settings, session_secret=""))
+    security._verified_claims.cache_clear()
+
+    for call in (
+        lambda: security.issue_session_token(uuid.uuid4()),
+        lambda: security.verify_session_token(token),
+    ):
+        with pytest.raises(HTTPException) as exc_info:
+            call()
+        assert exc_info.value.status_code == 500
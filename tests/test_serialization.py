@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import json
+import uuid
+
+import pytest
+
+import app.api.serialization as serialization
+from app.models.schemas import RaffleNumbersResponse, RaffleOutV2
+
+
+def _raffle() -> dict:
+    now = datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    return {
+        "id": str(uuid.uuid4()),
+        "title": "Rifa ñandú",
+        "description": None,
+        "ticket_price": Decimal("1500.50"),
+        "currency": "COP",
+        "total_tickets": 100,
+        "tickets_sold": 3,
+        "tickets_reserved": 1,
+        "status": "drawn",
+        "draw_at": now,
+        "winner_ticket_id": str(uuid.uuid4()),
+        "winners": [
+            {"prize_rank": 1, "ticket_id": str(uuid.uuid4()), "participant_id": str(uuid.uuid4()), "number": 7}
+        ],
+        "number_start": 1,
+        "number_end": 100,
+        "number_padding": 3,
+        "owner_id": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _numbers() -> dict:
+    reserved_until = datetime(2026, 3, 1, 12, 40, tzinfo=timezone.utc)
+    return {
+        "raffle_id": str(uuid.uuid4()),
+        "number_start": 1,
+        "number_end": 3,
+        "number_padding": None,
+        "total_numbers": 3,
+        "offset": 0,
+        "limit": 3,
+        "counts": {"available": 1, "reserved": 1, "sold": 1},
+        "numbers": [
+            {"number": 1, "label": "1", "status": "available", "reserved_until": None},
+            {"number": 2, "label": "2", "status": "reserved", "reserved_until": reserved_until},
+            {"number": 3, "label": "3", "status": "sold", "reserved_until": None},
+        ],
+    }
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("model, content", [(RaffleOutV2, _raffle()), (RaffleNumbersResponse, _numbers())])
+def test_fast_encoder_matches_response_model_output(monkeypatch, use_orjson, model, content):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+
+    expected = json.loads(model(**content).model_dump_json())
+
+    assert json.loads(serialization.dumps(content)) == expected
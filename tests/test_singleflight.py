@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from app.core.singleflight import CALLS, SingleFlight, coalesce
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    group = SingleFlight("test-share")
+    executions = []
+    release = threading.Event()
+
+    def slow_query(raffle_id):
+        executions.append(raffle_id)
+        release.wait(2)
+        return {"raffle_id": raffle_id}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(group.do("r1", slow_query, "r1")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 2
+    while CALLS.value(group="test-share", role="follower") < 7 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert executions == ["r1"]
+    assert len(results) == 8
+    assert all(result is results[0] for result in results)
+    assert CALLS.value(group="test-share", role="leader") == 1
+    assert CALLS.value(group="test-share", role="follower") == 7
+
+
+def test_errors_propagate_and_nothing_is_cached():
+    calls = {"count": 0}
+
+    @coalesce("test-errors", key=lambda value: value)
+    def flaky(value):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise LookupError("not found")
+        return value
+
+    with pytest.raises(LookupError):
+        flaky("x")
+    assert flaky("x") == "x"
+    assert calls["count"] == 2
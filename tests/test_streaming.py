@@ -0,0 +1,55 @@
+import pytest
+
+from app.db import connection
+
+
+@pytest.fixture
+def conn(monkeypatch, fake_conn):
+    rows = [[number, "sold"] for number in range(1, 6)]
+
+    def _fetch(sql, params):
+        size = int(sql.split()[2])
+        batch, rows[:] = rows[:size], rows[size:]
+        return batch
+
+    conn = fake_conn({"FETCH": _fetch}, description=[("number",), ("status",)])
+    monkeypatch.setattr(connection, "get_conn", lambda: conn)
+    return conn
+
+
+def _commands(conn):
+    return [sql.split(" ", 1)[0] for sql in conn.statements()]
+
+
+def test_iter_rows_fetches_in_batches_inside_a_transaction(conn):
+    with connection.iter_rows("SELECT number, status FROM t", batch_size=2) as rows:
+        assert next(rows) == {"number": 1, "status": "sold"}
+        assert _commands(conn) == ["BEGIN", "DECLARE", "FETCH"]
+        assert [row["number"] for row in rows] == [2, 3, 4, 5]
+
+    assert _commands(conn) == ["BEGIN", "DECLARE", "FETCH", "FETCH", "FETCH", "FETCH", "COMMIT"]
+
+
+def test_iter_rows_ends_its_transaction_when_the_block_exits(conn):
+    with connection.iter_rows("SELECT number, status FROM t", batch_size=2) as rows:
+        next(rows)
+    # Abandoned half-read: the transaction still ends with the block.
+    assert _commands(conn)[-1] == "COMMIT"
+
+    with pytest.raises(RuntimeError):
+        with connection.iter_rows("SELECT number, status FROM t", batch_size=2) as rows:
+            next(rows)
+            raise RuntimeError("boom")
+    assert _commands(conn)[-1] == "ROLLBACK"
+
+
+def test_light_rows_read_like_dicts_without_per_row_keys(conn):
+    with connection.iter_rows("SELECT 1", row_factory=connection.light_row) as batches:
+        rows = list(batches)
+
+    assert rows[0]["status"] == "sold"
+    assert rows[0].get("label") is None
+    assert rows[0][0] == 1
+    assert dict(rows[4]) == {"number": 5, "status": "sold"}
+    assert type(rows[0]) is connection.light_row(("number", "status"))
+    assert connection.tuple_row(("number",))([7]) == (7,)
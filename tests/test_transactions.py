@@ -0,0 +1,107 @@
+import dataclasses
+
+from fastapi import HTTPException
+from pg8000.dbapi import DatabaseError
+import pytest
+
+from app.db import connection
+
+
+@pytest.fixture
+def conns(monkeypatch, fake_conn):
+    opened = []
+
+    def _connect():
+        opened.append(fake_conn())
+        return opened[-1]
+
+    monkeypatch.setattr(connection, "_connect", _connect)
+    monkeypatch.setattr(
+        connection,
+        "settings",
+        dataclasses.replace(
+            connection.settings,
+            auto_migrate=False,
+            db_max_retries=2,
+            db_retry_base_ms=0,
+            db_operation_timeouts={"draw": (3000, 20000)},
+        ),
+    )
+    return opened
+
+
+def _failing(*sqlstates):
+    errors = [DatabaseError({"C": sqlstate, "M": "conflict"}) for sqlstate in sqlstates]
+
+    def _handler(conn):
+        if errors:
+            raise errors.pop(0)
+        return "done"
+
+    return _handler
+
+
+def test_deadlocks_are_retried_on_a_fresh_transaction(conns):
+    retries = connection.TRANSACTION_RETRIES.value(operation="reserve", sqlstate="40P01")
+
+    assert connection.run_transaction(_failing("40P01", "55P03"), operation="reserve") == "done"
+
+    assert [conn.rolled_back for conn in conns] == [True, True, False]
+    assert conns[-1].committed
+    assert connection.TRANSACTION_RETRIES.value(operation="reserve", sqlstate="40P01") == (
+        retries + 1
+    )
+
+
+def test_backoff_starts_at_the_base_delay(conns, monkeypatch):
+    monkeypatch.setattr(
+        connection, "settings", dataclasses.replace(connection.settings, db_retry_base_ms=25)
+    )
+    delays = []
+    monkeypatch.setattr(connection.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(connection.time, "sleep", delays.append)
+
+    connection.run_transaction(_failing("40P01", "40P01"), operation="reserve")
+
+    assert delays == [0.025, 0.05]
+
+
+def test_exhausted_retries_and_statement_timeouts_answer_503(conns):
+    with pytest.raises(HTTPException) as exc_info:
+        connection.run_transaction(_failing("40001", "40001", "40001"), operation="confirm")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
+    assert len(conns) == 3
+
+    with pytest.raises(HTTPException):
+        connection.run_transaction(_failing("57014"), operation="confirm")
+    assert len(conns) == 4
+
+    with pytest.raises(DatabaseError):
+        connection.run_transaction(_failing("23505"), operation="confirm")
+    assert len(conns) == 5
+
+
+def test_timeouts_are_set_per_operation(conns):
+    connection.run_transaction(lambda conn: None, operation="draw")
+    connection.run_transaction(lambda conn: None, operation="partition")
+    connection.run_transaction(lambda conn: None)
+
+    defaults = connection.settings.db_lock_timeout_ms, connection.settings.db_statement_timeout_ms
+    assert [conn.executed[0][1] for conn in conns] == [
+        ("3000", "20000"),
+        ("5000", "0"),
+        tuple(str(value) for value in defaults),
+    ]
+
+
+def test_row_locking_statements_feed_the_lock_wait_histogram(conns):
+    def _handler(conn):
+        cur = conn.cursor()
+        cur.execute("SELECT status FROM raffles WHERE id = %s FOR UPDATE", (1,))
+        cur.execute("SELECT 1")
+
+    before = connection.LOCK_WAIT_SECONDS.count(operation="draw")
+    connection.run_transaction(_handler, operation="draw")
+
+    assert connection.LOCK_WAIT_SECONDS.count(operation="draw") == before + 1